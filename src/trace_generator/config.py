@@ -3,79 +3,239 @@
 
 import os
 import logging
+from dataclasses import dataclass, asdict
+from types import MappingProxyType, SimpleNamespace
+from typing import Any, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Host values that mean "no external database, use the in-memory store"
+_DISABLED_HOSTS = frozenset({"none", "disabled", "mock", "false", "inmemory", "memory"})
+
+
+def _first_env(names: tuple) -> Optional[str]:
+    """Return the first non-empty value among the given environment variables."""
+    for name in names:
+        value = os.getenv(name)
+        if value:
+            return value
+    return None
+
+
+def _env_int(*names: str, default: int, minimum: Optional[int] = None) -> int:
+    """Parse an integer setting, naming the offending variable on bad input."""
+    raw = _first_env(names)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"{names[0]} must be an integer, got {raw!r}") from None
+    if minimum is not None and value < minimum:
+        raise ValueError(f"{names[0]} must be at least {minimum}, got {value}")
+    return value
+
+
+def _env_float(*names: str, default: float, minimum: Optional[float] = None) -> float:
+    """Parse a float setting, naming the offending variable on bad input."""
+    raw = _first_env(names)
+    if raw is None:
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        raise ValueError(f"{names[0]} must be a number, got {raw!r}") from None
+    if minimum is not None and value < minimum:
+        raise ValueError(f"{names[0]} must be at least {minimum}, got {value}")
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class DatabaseSettings:
+    """Database settings resolved once from the unified and legacy variables."""
+
+    type: str
+    host: str
+    port: int
+    user: str
+    password: str
+    database: str
+    max_traces: int
+
+    def as_dict(self) -> dict:
+        """Return the settings in the shape expected by ``create_database``."""
+        return asdict(self)
+
+
+def _resolve_database_settings(
+    database_type: str,
+    database_host: str,
+    database_port: int,
+    database_user: str,
+    database_password: str,
+    database_name: str,
+    clickhouse_host: str,
+    clickhouse_port: int,
+    clickhouse_user: str,
+    clickhouse_password: str,
+    clickhouse_database: str,
+    max_traces: int,
+) -> DatabaseSettings:
+    """Collapse the unified/legacy fallback chains into a single settings object."""
+    # Use unified config first, fall back to legacy
+    host = database_host or clickhouse_host
+
+    if database_type:
+        db_type = database_type.lower()
+    elif not host or host.lower() in _DISABLED_HOSTS:
+        db_type = "inmemory"
+    else:
+        # Default to ClickHouse if host is configured
+        db_type = "clickhouse"
+
+    return DatabaseSettings(
+        type=db_type,
+        host=host,
+        port=database_port if database_host else clickhouse_port,
+        user=database_user or clickhouse_user,
+        password=database_password or clickhouse_password,
+        database=database_name or clickhouse_database,
+        max_traces=max_traces,
+    )
 
 
 class Config:
     """Application configuration constants with database abstraction support"""
 
-    # OpenTelemetry Configuration
-    OTLP_ENDPOINT = os.getenv(
-        "OTEL_EXPORTER_OTLP_ENDPOINT", "http://otel-collector:4317"
-    )
-
-    # Scenarios Configuration
-    # Path to scenarios directory (default: 'scenarios/'). Can be overridden by SCENARIOS_PATH env var.
-    SCENARIOS_PATH = os.getenv("SCENARIOS_PATH", "scenarios/")
-
-    # Trace Generation Configuration
-    TRACE_INTERVAL_MIN = float(os.getenv("TRACE_INTERVAL_MIN", "0.5"))
-    TRACE_INTERVAL_MAX = float(os.getenv("TRACE_INTERVAL_MAX", "2.0"))
-    MAX_TEMPLATE_ITERATIONS = int(os.getenv("MAX_TEMPLATE_ITERATIONS", "10"))
-
-    # Database Configuration (Unified)
-    DATABASE_TYPE = os.getenv("DATABASE_TYPE", "")  # auto-detect if empty
-    DATABASE_HOST = os.getenv("DATABASE_HOST", "") or os.getenv("CLICKHOUSE_HOST", "")
-    DATABASE_PORT = int(
-        os.getenv("DATABASE_PORT", os.getenv("CLICKHOUSE_PORT", "8123"))
-    )
-    DATABASE_USER = os.getenv("DATABASE_USER", "") or os.getenv(
-        "CLICKHOUSE_USER", "user"
-    )
-    DATABASE_PASSWORD = os.getenv("DATABASE_PASSWORD", "") or os.getenv(
-        "CLICKHOUSE_PASSWORD", "password"
-    )
-    DATABASE_NAME = os.getenv("DATABASE_NAME", "") or os.getenv(
-        "CLICKHOUSE_DATABASE", "otel"
-    )
-
-    # Legacy ClickHouse Configuration (for backward compatibility)
-    CLICKHOUSE_HOST = os.getenv("CLICKHOUSE_HOST", "clickhouse")
-    CLICKHOUSE_PORT = int(os.getenv("CLICKHOUSE_PORT", "8123"))
-    CLICKHOUSE_USER = os.getenv("CLICKHOUSE_USER", "user")
-    CLICKHOUSE_PASSWORD = os.getenv("CLICKHOUSE_PASSWORD", "password")
-    CLICKHOUSE_DATABASE = os.getenv("CLICKHOUSE_DATABASE", "otel")
-
-    # In-Memory Database Configuration
-    INMEMORY_MAX_TRACES = int(os.getenv("INMEMORY_MAX_TRACES", "100"))
-
-    # Server Configuration
-    SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
-    SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
-
-    # UI Configuration
-    TRACE_FETCH_LIMIT = int(os.getenv("TRACE_FETCH_LIMIT", "30"))
-    CARD_DISPLAY_LIMIT = int(os.getenv("CARD_DISPLAY_LIMIT", "10"))
-    STATUS_UPDATE_INTERVAL = float(os.getenv("STATUS_UPDATE_INTERVAL", "2.0"))
+    @classmethod
+    def refresh(cls) -> None:
+        """Re-read every setting from the environment into the class attributes.
+
+        Settings are parsed into a scratch namespace first, so a bad value
+        raises without leaving the class half-updated.
+        """
+        s = SimpleNamespace()
+
+        # OpenTelemetry Configuration
+        s.OTLP_ENDPOINT = os.getenv(
+            "OTEL_EXPORTER_OTLP_ENDPOINT", "http://otel-collector:4317"
+        )
+
+        # Scenarios Configuration
+        # Path to scenarios directory (default: 'scenarios/'). Can be overridden by SCENARIOS_PATH env var.
+        s.SCENARIOS_PATH = os.getenv("SCENARIOS_PATH", "scenarios/")
+
+        # Trace Generation Configuration
+        s.TRACE_INTERVAL_MIN = _env_float("TRACE_INTERVAL_MIN", default=0.5, minimum=0)
+        s.TRACE_INTERVAL_MAX = _env_float("TRACE_INTERVAL_MAX", default=2.0, minimum=0)
+        s.MAX_TEMPLATE_ITERATIONS = _env_int(
+            "MAX_TEMPLATE_ITERATIONS", default=10, minimum=1
+        )
+
+        # Database Configuration (Unified)
+        s.DATABASE_TYPE = os.getenv("DATABASE_TYPE", "")  # auto-detect if empty
+        s.DATABASE_HOST = (
+            os.getenv("DATABASE_HOST") or os.getenv("CLICKHOUSE_HOST") or ""
+        )
+        s.DATABASE_PORT = _env_int("DATABASE_PORT", "CLICKHOUSE_PORT", default=8123)
+        s.DATABASE_USER = (
+            os.getenv("DATABASE_USER") or os.getenv("CLICKHOUSE_USER") or "user"
+        )
+        s.DATABASE_PASSWORD = (
+            os.getenv("DATABASE_PASSWORD")
+            or os.getenv("CLICKHOUSE_PASSWORD")
+            or "password"
+        )
+        s.DATABASE_NAME = (
+            os.getenv("DATABASE_NAME") or os.getenv("CLICKHOUSE_DATABASE") or "otel"
+        )
+
+        # Size of the shared HTTP connection pool used for ClickHouse queries
+        s.DATABASE_POOL_SIZE = _env_int("DATABASE_POOL_SIZE", default=25, minimum=1)
+        s.DATABASE_POOL_NUM_POOLS = _env_int(
+            "DATABASE_POOL_NUM_POOLS", default=12, minimum=1
+        )
+        # Seconds of history the ClickHouse trace counts cover (0 = whole table)
+        s.DATABASE_COUNTS_WINDOW = _env_int(
+            "DATABASE_COUNTS_WINDOW", default=0, minimum=0
+        )
+        # Seconds between background refreshes of ClickHouse counts (0 = on demand)
+        s.DATABASE_REFRESH_INTERVAL = _env_float(
+            "DATABASE_REFRESH_INTERVAL", default=0.0, minimum=0.0
+        )
+
+        # Seconds a ClickHouse count or service-name result is reused
+        s.DATABASE_CACHE_TTL = _env_float("DATABASE_CACHE_TTL", default=3.0, minimum=0)
+        # Serve fetch_unique_traces from the otel_traces_latest view
+        s.DATABASE_LATEST_VIEW = os.getenv("DATABASE_LATEST_VIEW", "").lower() in (
+            "true",
+            "1",
+            "yes",
+        )
+
+        # Legacy ClickHouse Configuration (for backward compatibility)
+        s.CLICKHOUSE_HOST = os.getenv("CLICKHOUSE_HOST", "clickhouse")
+        s.CLICKHOUSE_PORT = _env_int("CLICKHOUSE_PORT", default=8123)
+        s.CLICKHOUSE_USER = os.getenv("CLICKHOUSE_USER", "user")
+        s.CLICKHOUSE_PASSWORD = os.getenv("CLICKHOUSE_PASSWORD", "password")
+        s.CLICKHOUSE_DATABASE = os.getenv("CLICKHOUSE_DATABASE", "otel")
+
+        # In-Memory Database Configuration
+        s.INMEMORY_MAX_TRACES = _env_int("INMEMORY_MAX_TRACES", default=100, minimum=1)
+
+        # Resolved database settings (computed once per refresh)
+        s.DATABASE = _resolve_database_settings(
+            s.DATABASE_TYPE,
+            s.DATABASE_HOST,
+            s.DATABASE_PORT,
+            s.DATABASE_USER,
+            s.DATABASE_PASSWORD,
+            s.DATABASE_NAME,
+            s.CLICKHOUSE_HOST,
+            s.CLICKHOUSE_PORT,
+            s.CLICKHOUSE_USER,
+            s.CLICKHOUSE_PASSWORD,
+            s.CLICKHOUSE_DATABASE,
+            s.INMEMORY_MAX_TRACES,
+        )
+        # Read-only view handed out by get_database_config
+        s._DB_CONFIG = MappingProxyType(s.DATABASE.as_dict())
+
+        # Server Configuration
+        s.SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+        s.SERVER_PORT = _env_int("SERVER_PORT", default=8000)
+
+        # UI Configuration
+        s.TRACE_FETCH_LIMIT = _env_int("TRACE_FETCH_LIMIT", default=30, minimum=1)
+        s.CARD_DISPLAY_LIMIT = _env_int("CARD_DISPLAY_LIMIT", default=10, minimum=0)
+        s.STATUS_UPDATE_INTERVAL = _env_float(
+            "STATUS_UPDATE_INTERVAL", default=2.0, minimum=0
+        )
+
+        for name, value in vars(s).items():
+            setattr(cls, name, value)
 
     @classmethod
     def print_config(cls):
-        logger = logging.getLogger(__name__)
         logger.info("=== TRACE GENERATOR ENGINE CONFIG ===")
         logger.info(f"UI SERVER: http://{cls.SERVER_HOST}:{cls.SERVER_PORT}")
         logger.info(f"OTLP ENDPOINT: {cls.OTLP_ENDPOINT}")
         logger.info(f"SCENARIOS FILE: {cls.SCENARIOS_PATH}")
 
         # Database configuration
-        db_type = cls._detect_database_type()
-        logger.info(f"DATABASE TYPE: {db_type}")
-
-        if db_type == "inmemory":
-            logger.info(f"IN-MEMORY MAX TRACES: {cls.INMEMORY_MAX_TRACES}")
-        elif db_type == "clickhouse":
-            # Use unified config first, fall back to legacy
-            host = cls.DATABASE_HOST or cls.CLICKHOUSE_HOST
-            port = cls.DATABASE_PORT if cls.DATABASE_HOST else cls.CLICKHOUSE_PORT
-            logger.info(f"CLICKHOUSE: {host}:{port}")
+        db = cls.DATABASE
+        logger.info(f"DATABASE TYPE: {db.type}")
+
+        if db.type == "inmemory":
+            logger.info(f"IN-MEMORY MAX TRACES: {db.max_traces}")
+        elif db.type == "clickhouse":
+            logger.info(f"CLICKHOUSE: {db.host}:{db.port}")
+            logger.info(
+                f"DATABASE POOL SIZE: {cls.DATABASE_POOL_SIZE} "
+                f"({cls.DATABASE_POOL_NUM_POOLS} pools)"
+            )
+            if cls.DATABASE_COUNTS_WINDOW:
+                logger.info(f"TRACE COUNTS WINDOW: {cls.DATABASE_COUNTS_WINDOW}s")
 
         logger.info("FORMAT: Probability 0-100%, Duration in ms")
         logger.info("CONTEXT STORE: Auto-configured based on scenarios")
@@ -84,34 +244,12 @@ class Config:
     @classmethod
     def _detect_database_type(cls) -> str:
         """Detect the database type based on current configuration."""
-        # Check explicit database type
-        if cls.DATABASE_TYPE:
-            return cls.DATABASE_TYPE.lower()
-
-        # Check if host is configured
-        host = cls.DATABASE_HOST or cls.CLICKHOUSE_HOST
-        if not host or host.lower() in [
-            "none",
-            "disabled",
-            "mock",
-            "false",
-            "inmemory",
-            "memory",
-        ]:
-            return "inmemory"
-
-        # Default to ClickHouse if host is configured
-        return "clickhouse"
+        return cls.DATABASE.type
 
     @classmethod
-    def get_database_config(cls) -> dict:
-        """Get database configuration as a dictionary."""
-        return {
-            "type": cls._detect_database_type(),
-            "host": cls.DATABASE_HOST or cls.CLICKHOUSE_HOST,
-            "port": cls.DATABASE_PORT if cls.DATABASE_HOST else cls.CLICKHOUSE_PORT,
-            "user": cls.DATABASE_USER or cls.CLICKHOUSE_USER,
-            "password": cls.DATABASE_PASSWORD or cls.CLICKHOUSE_PASSWORD,
-            "database": cls.DATABASE_NAME or cls.CLICKHOUSE_DATABASE,
-            "max_traces": cls.INMEMORY_MAX_TRACES,
-        }
+    def get_database_config(cls) -> Mapping[str, Any]:
+        """Get database configuration as a read-only mapping."""
+        return cls._DB_CONFIG
+
+
+Config.refresh()
@@ -1,70 +1,249 @@
 # data.py
 """Data access service for trace generator using the unified database abstraction."""
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Hashable, Optional
+from collections import Counter
+from operator import methodcaller
 import logging
-from trace_generator.database import get_database, DatabaseInterface
+import threading
+import time
+from trace_generator.database import (
+    get_database,
+    DatabaseInterface,
+    InMemoryDatabase,
+    is_ok_status,
+)
+
+logger = logging.getLogger(__name__)
+
+_get_status_code = methodcaller("get", "StatusCode", "")
+_get_status_color = methodcaller("get", "status_color")
+
+# Cache lifetimes in seconds. Traces are short-lived so multiple UI clients
+# polling at STATUS_UPDATE_INTERVAL share one query; service names only
+# change when a new service starts emitting spans.
+TRACES_CACHE_TTL = 1.0
+COUNTS_CACHE_TTL = 5.0
+SERVICE_NAMES_CACHE_TTL = 60.0
+
+# Buffered add_trace writes are flushed at the batch size, or by a timer
+# this many seconds after the first trace was buffered
+ADD_TRACE_BATCH_SIZE = 100
+ADD_TRACE_FLUSH_INTERVAL = 0.25
+
+_MISSING = object()
+
+
+class _TTLCache:
+    """Minimal time-based cache for backend query results."""
+
+    __slots__ = ("ttl", "maxsize", "_entries")
+
+    def __init__(self, ttl: float, maxsize: int = 4):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: Dict[Hashable, tuple] = {}
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value for key, or _MISSING if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return _MISSING
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if key not in self._entries and len(self._entries) >= self.maxsize:
+            self._entries.clear()
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self) -> None:
+        self._entries.clear()
 
 
 class TraceDataService:
     """Service layer for accessing trace data through the database abstraction."""
 
+    __slots__ = (
+        "db",
+        "_db_type_name",
+        "_supports_direct_insert",
+        "_max_traces",
+        "_host",
+        "_port",
+        "_supports_bulk_insert",
+        "_buffer",
+        "_buffer_lock",
+        "_flush_timer",
+        "_traces_cache",
+        "_counts_cache",
+        "_service_names_cache",
+    )
+
     def __init__(self, db: DatabaseInterface = None):
         self.db = db or get_database()
-        self.logger = logging.getLogger(__name__)
+
+        # The backend never changes for the lifetime of the service, so
+        # introspect it once instead of on every status request
+        self._db_type_name = type(self.db).__name__
+        self._supports_direct_insert = isinstance(self.db, InMemoryDatabase)
+        self._max_traces = getattr(self.db, "max_traces", None)
+        self._host = getattr(self.db, "host", None)
+        self._port = getattr(self.db, "port", None)
+
+        # Buffer add_trace writes only when the backend has its own bulk path;
+        # the DatabaseInterface default just loops over add_trace
+        self._supports_bulk_insert = (
+            getattr(type(self.db), "add_traces_bulk", DatabaseInterface.add_traces_bulk)
+            is not DatabaseInterface.add_traces_bulk
+        )
+        self._buffer: List[Dict[str, Any]] = []
+        self._buffer_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+
+        # Short-lived result caches, dropped whenever a trace is added
+        self._traces_cache = _TTLCache(TRACES_CACHE_TTL)
+        self._counts_cache = _TTLCache(COUNTS_CACHE_TTL, maxsize=1)
+        self._service_names_cache = _TTLCache(SERVICE_NAMES_CACHE_TTL, maxsize=1)
 
         # Log the database type being used
-        db_type = type(self.db).__name__
-        self.logger.info(f"TraceDataService initialized with {db_type}")
+        logger.info(f"TraceDataService initialized with {self._db_type_name}")
+
+    def warmup(self) -> None:
+        """Open the backend connection and prime caches before the first UI request."""
+        try:
+            self.db.connect()
+            # Run the cheap probe and a one-row fetch so the first page render
+            # does not pay for connection setup and query planning
+            self.db.health_check()
+            self.db.fetch_unique_traces(1)
+        except Exception as e:
+            logger.warning(f"Database warmup failed: {e}")
+
+        self._service_names_cache.clear()
+        self.get_service_names()
+        logger.info("TraceDataService warmup complete")
 
     def fetch_unique_traces(self, limit: int = 30) -> List[Dict[str, Any]]:
         """Fetch unique traces from the configured database."""
+        self.flush()
+        cached = self._traces_cache.get(limit)
+        if cached is not _MISSING:
+            return list(cached)
+
         try:
             traces = self.db.fetch_unique_traces(limit)
-            self.logger.debug(f"Fetched {len(traces)} traces from database")
+            logger.debug("Fetched %d traces from database", len(traces))
+            self._traces_cache.put(limit, list(traces))
             return traces
         except Exception as e:
-            self.logger.error(f"Error fetching traces: {e}")
+            logger.error(f"Error fetching traces: {e}")
             return []
 
     def get_trace_counts(self) -> Dict[str, int]:
         """Get trace count statistics from the database."""
+        self.flush()
+        cached = self._counts_cache.get(None)
+        if cached is not _MISSING:
+            return dict(cached)
+
         try:
             counts = self.db.get_trace_counts()
-            self.logger.debug(f"Retrieved trace counts: {counts}")
+            logger.debug("Retrieved trace counts: %s", counts)
+            self._counts_cache.put(None, dict(counts))
             return counts
         except Exception as e:
-            self.logger.error(f"Error getting trace counts: {e}")
+            logger.error(f"Error getting trace counts: {e}")
             return {"total": 0, "errors": 0, "success": 0}
 
     def get_service_names(self) -> List[str]:
         """Get list of service names from the database."""
+        self.flush()
+        cached = self._service_names_cache.get(None)
+        if cached is not _MISSING:
+            return list(cached)
+
         try:
             services = self.db.get_service_names()
-            self.logger.debug(f"Retrieved {len(services)} service names")
+            logger.debug("Retrieved %d service names", len(services))
+            self._service_names_cache.put(None, list(services))
             return services
         except Exception as e:
-            self.logger.error(f"Error getting service names: {e}")
+            logger.error(f"Error getting service names: {e}")
             return []
 
     def add_trace(self, trace: Dict[str, Any]) -> None:
         """Add a trace to the database (mainly for in-memory database)."""
+        if not self._supports_bulk_insert:
+            try:
+                self.db.add_trace(trace)
+                self._invalidate_caches()
+                logger.debug(
+                    "Added trace to database: %.16s", trace.get("TraceId", "unknown")
+                )
+            except Exception as e:
+                logger.error(f"Error adding trace: {e}")
+            return
+
+        with self._buffer_lock:
+            if not self._buffer:
+                # Flush on a timer so a quiet generator does not leave traces
+                # sitting in the buffer until the next add or read
+                self._flush_timer = threading.Timer(
+                    ADD_TRACE_FLUSH_INTERVAL, self.flush
+                )
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+            self._buffer.append(trace)
+            flush_due = len(self._buffer) >= ADD_TRACE_BATCH_SIZE
+
+        if flush_due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write any buffered traces to the database in a single batch."""
+        if not self._buffer:
+            return
+
+        with self._buffer_lock:
+            batch, self._buffer = self._buffer, []
+            timer, self._flush_timer = self._flush_timer, None
+
+        if timer is not None:
+            timer.cancel()
+
+        if not batch:
+            return
+
         try:
-            self.db.add_trace(trace)
-            self.logger.debug(
-                f"Added trace to database: {trace.get('TraceId', 'unknown')[:16]}"
-            )
+            self.db.add_traces_bulk(batch)
+            logger.debug("Added %d buffered traces to database", len(batch))
         except Exception as e:
-            self.logger.error(f"Error adding trace: {e}")
+            logger.error(f"Error adding trace: {e}")
+        finally:
+            self._invalidate_caches()
+
+    def _invalidate_caches(self) -> None:
+        """Drop cached query results so the next read sees new data."""
+        self._traces_cache.clear()
+        self._counts_cache.clear()
+        self._service_names_cache.clear()
 
     def count_error_traces(self, traces: List[Dict[str, Any]]) -> int:
         """Count error traces in the provided list."""
-        return len(
-            [
-                t
-                for t in traces
-                if t.get("StatusCode", "").upper() not in ["OK", "STATUS_CODE_OK"]
-            ]
+        # Backends classify each trace once at ingest (status_color), so the
+        # common case is a C-level tally with no string normalisation at all
+        colors = Counter(map(_get_status_color, traces))
+        errors = colors["negative"]
+        if not colors[None]:
+            return errors
+
+        # Fall back to the raw status code for traces that were never
+        # formatted, normalising each distinct code only once
+        status_counts = Counter(
+            map(_get_status_code, (t for t in traces if "status_color" not in t))
+        )
+        return errors + sum(
+            count for code, count in status_counts.items() if not is_ok_status(code)
         )
 
     def health_check(self) -> bool:
@@ -72,24 +251,44 @@ class TraceDataService:
         try:
             return self.db.health_check()
         except Exception as e:
-            self.logger.error(f"Database health check failed: {e}")
+            logger.error(f"Database health check failed: {e}")
             return False
 
     def get_database_info(self) -> Dict[str, Any]:
         """Get information about the current database configuration."""
-        db_type = type(self.db).__name__
-        health = self.health_check()
-
         info = {
-            "type": db_type,
-            "healthy": health,
-            "supports_direct_insert": db_type == "InMemoryDatabase",
+            "type": self._db_type_name,
+            "healthy": self.health_check(),
+            "supports_direct_insert": self._supports_direct_insert,
         }
 
-        if hasattr(self.db, "max_traces"):
-            info["max_traces"] = self.db.max_traces
-        if hasattr(self.db, "host"):
-            info["host"] = self.db.host
-            info["port"] = self.db.port
+        if self._max_traces is not None:
+            info["max_traces"] = self._max_traces
+        if self._host is not None:
+            info["host"] = self._host
+            info["port"] = self._port
 
         return info
+
+
+_instance: Optional[TraceDataService] = None
+_instance_lock = threading.Lock()
+
+
+def get_trace_data_service(db: Optional[DatabaseInterface] = None) -> TraceDataService:
+    """Return the shared TraceDataService, creating it on first use.
+
+    Passing db binds the shared service to that backend, replacing a service
+    that was built for a different one.
+    """
+    global _instance
+    service = _instance
+    if service is not None and (db is None or service.db is db):
+        return service
+
+    with _instance_lock:
+        if _instance is None or (db is not None and _instance.db is not db):
+            if _instance is not None:
+                _instance.flush()
+            _instance = TraceDataService(db)
+        return _instance
@@ -2,14 +2,31 @@
 """Database abstraction layer for trace data storage."""
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 import os
-from collections import deque
-from datetime import datetime, timezone
+from itertools import chain, count, repeat
+from datetime import datetime, timedelta, timezone
 import threading
+import time
 import uuid
 
+from trace_generator.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Database types and host placeholders that select the in-memory backend
+_INMEMORY_TYPES = frozenset({"inmemory", "memory"})
+_DISABLED_HOSTS = frozenset({"none", "disabled", "mock", "false", "inmemory", "memory"})
+
+# Consecutive ClickHouse failures before queries are short-circuited, and how
+# long to wait before letting a probe query through again
+BREAKER_FAIL_MAX = 3
+BREAKER_RESET_TIMEOUT = 10.0
+
+# Rows per block when streaming trace results back from ClickHouse
+FETCH_BLOCK_SIZE = 1024
+
 
 class DatabaseInterface(ABC):
     """Abstract interface for trace data storage backends."""
@@ -49,18 +66,345 @@ class DatabaseInterface(ABC):
         """Add a trace to the database (for in-memory and testing)."""
         pass
 
+    def add_traces_bulk(self, traces: List[Dict[str, Any]]) -> None:
+        """Add a batch of traces. Backends override this to write in one pass."""
+        for trace in traces:
+            self.add_trace(trace)
+
+
+class _CircuitBreaker:
+    """Fails fast after repeated backend errors instead of waiting on timeouts."""
+
+    def __init__(
+        self,
+        fail_max: int = BREAKER_FAIL_MAX,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+    ):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        """Return True if a call may go to the backend."""
+        opened_at = self._opened_at
+        if opened_at is None:
+            return True
+        if time.monotonic() - opened_at < self.reset_timeout:
+            return False
+
+        # Half-open: let exactly one caller probe the backend; everyone else
+        # keeps failing fast until that probe reports back
+        with self._lock:
+            if self._opened_at is not opened_at:
+                return False
+            self._opened_at = time.monotonic()
+            return True
+
+    def record_success(self) -> None:
+        if self._failures or self._opened_at is not None:
+            with self._lock:
+                self._failures = 0
+                self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max:
+                if self._failures == self.fail_max:
+                    logger.warning(
+                        f"Database unavailable after {self.fail_max} failures, "
+                        f"skipping queries for {self.reset_timeout}s"
+                    )
+                self._opened_at = time.monotonic()
+
+
+# Status codes treated as success, and the display formats for timestamps
+_OK_STATUSES = frozenset({"OK", "STATUS_CODE_OK"})
+_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+_TIME_FORMAT = "%H:%M:%S"
+
+
+def is_ok_status(status_code) -> bool:
+    """Return True for OK status codes, matching case-insensitively."""
+    # Exact matches are the common case; only upper-case the rest
+    if status_code in _OK_STATUSES:
+        return True
+    return status_code is not None and str(status_code).upper() in _OK_STATUSES
+
+
+# Display strings for the most recently formatted second. Traces arrive in
+# bursts within the same second, so most lookups skip both strftime calls.
+# Keyed on the UTC offset too, since the strings show local wall-clock time.
+_last_formatted_second = (None, "", "")
+_UTC_OFFSET = timedelta(0)
+
+
+def _format_datetime(timestamp: datetime):
+    """Return the full and short display strings for a datetime."""
+    global _last_formatted_second
+    try:
+        key = (int(timestamp.timestamp()), timestamp.utcoffset())
+    except (OverflowError, OSError, ValueError):
+        # Outside the platform's epoch range; format without caching
+        return timestamp.strftime(_TIMESTAMP_FORMAT), timestamp.strftime(_TIME_FORMAT)
+    cached_key, formatted, short = _last_formatted_second
+    if key != cached_key:
+        formatted = timestamp.strftime(_TIMESTAMP_FORMAT)
+        short = timestamp.strftime(_TIME_FORMAT)
+        # Replace the whole tuple so concurrent readers never see a torn entry
+        _last_formatted_second = (key, formatted, short)
+    return formatted, short
+
+
+def _format_epoch_ns(timestamp_ns: int):
+    """Return the display strings for a UTC timestamp in epoch nanoseconds.
+
+    Shares the per-second cache with _format_datetime, so a cache hit never
+    builds a datetime at all.
+    """
+    global _last_formatted_second
+    seconds = timestamp_ns // 1_000_000_000
+    key = (seconds, _UTC_OFFSET)
+    cached_key, formatted, short = _last_formatted_second
+    if key != cached_key:
+        timestamp = datetime.fromtimestamp(seconds, tz=timezone.utc)
+        formatted = timestamp.strftime(_TIMESTAMP_FORMAT)
+        short = timestamp.strftime(_TIME_FORMAT)
+        _last_formatted_second = (key, formatted, short)
+    return formatted, short
+
+
+def _format_trace_data(trace_dict: Dict[str, Any], key_info: bool = False) -> None:
+    """Add the UI display fields to a trace dictionary in place."""
+    # Format timestamp for display
+    timestamp = trace_dict.get("Timestamp")
+    if timestamp:
+        try:
+            if isinstance(timestamp, int):
+                # Spans from the in-memory processor carry raw epoch ns
+                formatted, short = _format_epoch_ns(timestamp)
+            elif isinstance(timestamp, datetime):
+                formatted, short = _format_datetime(timestamp)
+            elif hasattr(timestamp, "strftime"):
+                formatted = timestamp.strftime(_TIMESTAMP_FORMAT)
+                short = timestamp.strftime(_TIME_FORMAT)
+            else:
+                formatted = short = str(timestamp)
+        except Exception:
+            formatted, short = "Invalid Date", "Invalid"
+    else:
+        formatted, short = "No Timestamp", "N/A"
+    trace_dict["formatted_timestamp"] = formatted
+    trace_dict["FormattedTime"] = short
+
+    # Format duration
+    if "Duration" in trace_dict:
+        duration = trace_dict["Duration"]
+        duration_ms = (int(duration) if duration else 0) / 1_000_000
+        if duration_ms < 1:
+            trace_dict["DurationMs"] = f"{duration_ms:.2f}ms"
+        else:
+            trace_dict["DurationMs"] = f"{duration_ms:.1f}ms"
+    else:
+        trace_dict["DurationMs"] = "N/A"
+
+    # Short IDs for display
+    trace_dict["ShortTraceId"] = str(trace_dict.get("TraceId", "unknown"))[:16]
+    trace_dict["ShortSpanId"] = str(trace_dict.get("SpanId", "unknown"))[:16]
+
+    # Determine status color
+    trace_dict["status_color"] = (
+        "positive" if is_ok_status(trace_dict.get("StatusCode")) else "negative"
+    )
+
+    # Extract key info for display
+    if key_info:
+        trace_dict["KeyInfo"] = _extract_key_info(trace_dict.get("SpanAttributes", {}))
+
+
+def _extract_key_info(attrs: Dict[str, Any]) -> str:
+    """Extract key information from span attributes for display."""
+    if not attrs:
+        return ""
+
+    parts = []
+    if attrs.get("error.type"):
+        parts.append(f"🚨 {attrs['error.type']}")
+    if not parts and attrs.get("user.id"):
+        parts.append(f"👤 {attrs['user.id']}")
+    if not parts and attrs.get("job.id"):
+        parts.append(f"⚙️ {attrs['job.id']}")
+
+    return " | ".join(parts)
+
+
+# Fields the in-memory store needs on every stored trace. A trace that
+# already carries all of them (e.g. one re-added from another store) is not
+# formatted again; a caller's own dict with just some of them still is.
+_INMEMORY_FORMATTED_FIELDS = frozenset(
+    {"formatted_timestamp", "status_color", "KeyInfo"}
+)
+
+
+# Span columns read from otel_traces, besides TraceId. The table is columnar,
+# so only these (and SpanAttributes, for KeyInfo below) are scanned; the many
+# unused OTel columns never leave disk.
+_TRACE_COLUMNS = (
+    "SpanId",
+    "ParentSpanId",
+    "ServiceName",
+    "SpanName",
+    "StatusCode",
+    "StatusMessage",
+    "Duration",
+    "Timestamp",
+)
+# KeyInfo as _extract_key_info renders it, computed from the three attribute
+# keys it reads so the SpanAttributes map is never shipped to Python
+_KEY_INFO_EXPR = """multiIf(
+    SpanAttributes['error.type'] != '', concat('🚨 ', SpanAttributes['error.type']),
+    SpanAttributes['user.id'] != '', concat('👤 ', SpanAttributes['user.id']),
+    SpanAttributes['job.id'] != '', concat('⚙️ ', SpanAttributes['job.id']),
+    ''
+)"""
+_TRACE_COLUMNS_UNPACKED = ", ".join(
+    f"t.{i} AS {name}" for i, name in enumerate((*_TRACE_COLUMNS, "KeyInfo"), start=1)
+)
+
+# Display fields rendered by ClickHouse so fetched rows need no per-row Python
+# formatting; mirrors _format_trace_data. %i is minutes in
+# formatDateTime, and % is doubled because the query is %-bound with parameters
+_DISPLAY_COLUMNS = """
+    formatDateTime(Timestamp, '%%Y-%%m-%%d %%H:%%i:%%S') AS formatted_timestamp,
+    formatDateTime(Timestamp, '%%H:%%i:%%S') AS FormattedTime,
+    concat(
+        if(Duration < 1000000,
+           toDecimalString(Duration / 1e6, 2),
+           toDecimalString(Duration / 1e6, 1)),
+        'ms'
+    ) AS DurationMs,
+    substring(TraceId, 1, 16) AS ShortTraceId,
+    substring(SpanId, 1, 16) AS ShortSpanId,
+    if(upper(StatusCode) IN ('OK', 'STATUS_CODE_OK'), 'positive', 'negative')
+        AS status_color
+"""
+
+
+_TRACE_COUNTS_QUERY = (
+    "SELECT uniqExact(TraceId), uniqExactIf(TraceId, StatusCode = 'Error') "
+    "FROM otel_traces"
+)
+# Counts and service names in one scan, for the background refresher
+_REFRESH_QUERY = (
+    "SELECT uniqExactIf(TraceId, {in_window}), "
+    "uniqExactIf(TraceId, {in_window} AND StatusCode = 'Error'), "
+    "arraySort(groupUniqArray(ServiceName)) "
+    "FROM otel_traces"
+)
+_IN_COUNTS_WINDOW = "Timestamp > now() - toIntervalSecond(%s)"
+# Optional time bound for the counts. PREWHERE reads only the Timestamp column
+# to discard out-of-window granules before TraceId/StatusCode are loaded.
+_COUNTS_WINDOW_PREWHERE = " PREWHERE Timestamp > now() - toIntervalSecond(%s)"
+
+# One representative span per trace: its error span if it has one, otherwise
+# its latest. argMax keeps a single row of state per trace instead of
+# buffering ordered window partitions.
+_LATEST_SPAN_VALUE = f"tuple({', '.join(_TRACE_COLUMNS)}, {_KEY_INFO_EXPR})"
+_LATEST_SPAN_KEY = "tuple(StatusCode = 'Error', Timestamp)"
+_FETCH_UNIQUE_TRACES_QUERY = f"""
+    SELECT TraceId, {_TRACE_COLUMNS_UNPACKED}, {_DISPLAY_COLUMNS}
+    FROM (
+        SELECT
+            TraceId,
+            argMax({_LATEST_SPAN_VALUE}, {_LATEST_SPAN_KEY}) AS t
+        FROM otel_traces
+        GROUP BY TraceId
+    )
+    ORDER BY Timestamp DESC
+    LIMIT %s
+"""
+
+# Opt-in (DATABASE_LATEST_VIEW) materialized view holding the same argMax as a
+# partial aggregate per trace, maintained by ClickHouse on every insert. Fetches
+# then merge one small state per trace instead of scanning every span. A
+# materialized view only aggregates each insert block, so the states live in
+# an AggregatingMergeTree and are combined with argMaxMerge at read time.
+# It fills from creation onwards and expires with the source table's TTL.
+LATEST_VIEW_NAME = "otel_traces_latest"
+_CREATE_LATEST_VIEW = f"""
+    CREATE MATERIALIZED VIEW IF NOT EXISTS {LATEST_VIEW_NAME}
+    ENGINE = AggregatingMergeTree
+    ORDER BY TraceId
+    TTL toDateTime(LastSeen) + INTERVAL 72 HOUR
+    AS SELECT
+        TraceId,
+        argMaxState({_LATEST_SPAN_VALUE}, {_LATEST_SPAN_KEY}) AS t,
+        maxSimpleState(Timestamp) AS LastSeen
+    FROM otel_traces
+    GROUP BY TraceId
+"""
+_FETCH_LATEST_VIEW_QUERY = f"""
+    SELECT TraceId, {_TRACE_COLUMNS_UNPACKED}, {_DISPLAY_COLUMNS}
+    FROM (
+        SELECT TraceId, argMaxMerge(t) AS t
+        FROM {LATEST_VIEW_NAME}
+        GROUP BY TraceId
+    )
+    ORDER BY Timestamp DESC
+    LIMIT %s
+"""
+
 
 class ClickHouseDatabase(DatabaseInterface):
     """ClickHouse implementation of the database interface."""
 
-    def __init__(self, host: str, port: int, user: str, password: str, database: str):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        database: str,
+        pool_size: Optional[int] = None,
+        num_pools: Optional[int] = None,
+        counts_window: Optional[int] = None,
+    ):
         self.host = host
         self.port = port
         self.user = user
         self.password = password
         self.database = database
-        self.logger = logging.getLogger(__name__)
+        self.pool_size = pool_size or Config.DATABASE_POOL_SIZE
+        self.num_pools = num_pools or Config.DATABASE_POOL_NUM_POOLS
+        self.use_latest_view = Config.DATABASE_LATEST_VIEW
+        self._latest_view_ready = False
+        # Seconds of history get_trace_counts covers; 0 counts the whole table
+        self.counts_window = (
+            counts_window
+            if counts_window is not None
+            else Config.DATABASE_COUNTS_WINDOW
+        )
+        self.logger = logger
         self._client = None
+        self._client_lock = threading.Lock()
+        self._retryable_errors: tuple = ()
+        self._pool_mgr = None
+        self._breaker = _CircuitBreaker()
+        # Short-lived memo of the aggregate queries dashboards poll repeatedly
+        self._cache_ttl = Config.DATABASE_CACHE_TTL
+        self._cache_lock = threading.Lock()
+        self._counts_cache = (0.0, None)
+        self._services_cache = (0.0, None)
+        # Optional background refresh of those aggregates (0 = on demand only)
+        self.refresh_interval = Config.DATABASE_REFRESH_INTERVAL
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._refresh_stop = threading.Event()
         self.clickhouse_connect = None
         self.ch_exceptions = None
 
@@ -68,9 +412,20 @@ class ClickHouseDatabase(DatabaseInterface):
         try:
             import clickhouse_connect
             from clickhouse_connect.driver import exceptions as ch_exceptions
+            from clickhouse_connect.driver.httputil import get_pool_manager
 
             self.clickhouse_connect = clickhouse_connect
             self.ch_exceptions = ch_exceptions
+            # Connection-level failures worth one reconnect attempt
+            self._retryable_errors = (ch_exceptions.OperationalError,)
+
+            # One keep-alive HTTP pool shared by every client this instance
+            # creates, so repeated queries reuse sockets instead of reconnecting.
+            # block=False lets a burst of UI polls open overflow connections
+            # rather than queueing behind a saturated pool.
+            self._pool_mgr = get_pool_manager(
+                maxsize=self.pool_size, num_pools=self.num_pools, block=False
+            )
         except ImportError:
             self.logger.warning(
                 "ClickHouse dependencies not found. ClickHouse functionality will be limited."
@@ -84,212 +439,447 @@ class ClickHouseDatabase(DatabaseInterface):
             return False
 
         try:
-            self._client = self.clickhouse_connect.get_client(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-            )
-            return True
+            with self._client_lock:
+                self._client = self._create_client()
         except Exception as e:
             self.logger.error(f"Failed to connect to ClickHouse: {e}")
             return False
 
+        if self.use_latest_view:
+            self._ensure_latest_view()
+        if self.refresh_interval > 0:
+            self._start_refresh()
+        return True
+
+    def _start_refresh(self) -> None:
+        """Start the background aggregate refresher if it is not running."""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        # Refreshed values must outlive the gap between refreshes, or getters
+        # would fall through to on-demand queries anyway
+        self._cache_ttl = max(self._cache_ttl, 2 * self.refresh_interval)
+        self._refresh_stop.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop, name="clickhouse-refresh", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def _refresh_loop(self) -> None:
+        while True:
+            self._refresh_aggregates()
+            if self._refresh_stop.wait(self.refresh_interval):
+                return
+
+    def _refresh_aggregates(self) -> None:
+        """Refresh cached counts and service names with one combined query."""
+        if not self._breaker.allow():
+            return
+        try:
+            if self.counts_window:
+                query = _REFRESH_QUERY.format(in_window=_IN_COUNTS_WINDOW)
+                result = self._query(query, [self.counts_window] * 2)
+            else:
+                result = self._query(_REFRESH_QUERY.format(in_window="1"))
+            total, errors, services = result.result_rows[0]
+            self._breaker.record_success()
+        except Exception as e:
+            self._breaker.record_failure()
+            self.logger.warning(f"Background aggregate refresh failed: {e}")
+            return
+
+        now = time.monotonic()
+        # Whole-tuple assignment, so lock-free readers see old or new values
+        self._counts_cache = (
+            now,
+            {"total": total, "errors": errors, "success": total - errors},
+        )
+        self._services_cache = (now, list(services))
+
+    def _ensure_latest_view(self) -> None:
+        """Create the latest-span view if needed; fall back to scans on failure."""
+        try:
+            self._call("command", _CREATE_LATEST_VIEW)
+            self._latest_view_ready = True
+        except Exception as e:
+            self._latest_view_ready = False
+            self.logger.warning(
+                f"Could not create {LATEST_VIEW_NAME}, fetching from otel_traces: {e}"
+            )
+
     def disconnect(self) -> None:
         """Close ClickHouse connection."""
-        if self._client:
+        self._refresh_stop.set()
+        refresh_thread, self._refresh_thread = self._refresh_thread, None
+        if refresh_thread and refresh_thread is not threading.current_thread():
+            refresh_thread.join(timeout=5)
+        self._counts_cache = (0.0, None)
+        self._services_cache = (0.0, None)
+        self._close_client()
+
+    def _close_client(self) -> None:
+        """Close and drop the current client; the next query creates a new one."""
+        with self._client_lock:
+            client, self._client = self._client, None
+        if client:
             try:
-                self._client.close()
+                client.close()
             except Exception as e:
                 self.logger.error(f"Error closing ClickHouse connection: {e}")
-            finally:
-                self._client = None
+
+    def _create_client(self):
+        """Create a client on the shared pool. Caller holds the client lock."""
+        return self.clickhouse_connect.get_client(
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            database=self.database,
+            pool_mgr=self._pool_mgr,
+            # The client is shared across threads, so it must not pin every
+            # query to one server-side session
+            autogenerate_session_id=False,
+        )
+
+    def _get_client(self):
+        """Return the persistent client, creating it on first use."""
+        client = self._client
+        if client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+                client = self._client
+        return client
+
+    def _query(self, query: str, *args):
+        """Run a query on the persistent client, reconnecting once if it dropped."""
+        return self._call("query", query, *args)
+
+    def _call(self, method: str, *args, **kwargs):
+        """Invoke a client method, rebuilding the client once on connection loss."""
+        try:
+            return getattr(self._get_client(), method)(*args, **kwargs)
+        except self._retryable_errors as e:
+            self.logger.warning(f"ClickHouse connection lost, reconnecting: {e}")
+            self._close_client()
+            return getattr(self._get_client(), method)(*args, **kwargs)
 
     def health_check(self) -> bool:
         """Check ClickHouse health."""
-        if not self.clickhouse_connect:
+        if not self.clickhouse_connect or not self._breaker.allow():
             return False
 
         try:
-            with self.clickhouse_connect.get_client(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-            ) as client:
-                client.query("SELECT 1")
-                return True
+            self._query("SELECT 1")
+            self._breaker.record_success()
+            return True
         except Exception as e:
+            self._breaker.record_failure()
             self.logger.error(f"ClickHouse health check failed: {e}")
             return False
 
     def fetch_unique_traces(self, limit: int) -> List[Dict[str, Any]]:
         """Fetch unique traces from ClickHouse."""
-        if not self.clickhouse_connect:
+        if not self.clickhouse_connect or not self._breaker.allow():
             return []
 
         try:
-            with self.clickhouse_connect.get_client(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-            ) as client:
-                query = """
-                    SELECT * FROM (
-                        SELECT *, ROW_NUMBER() OVER (PARTITION BY TraceId ORDER BY CASE WHEN StatusCode = 'Error' THEN 1 ELSE 2 END, Timestamp DESC) as rn
-                        FROM otel_traces ORDER BY Timestamp DESC
-                    ) WHERE rn = 1 LIMIT %s
-                """
-                result = client.query(query, [limit])
-                return self._process_query_results(result)
+            # Stream row blocks so only one block of raw tuples is held at a
+            # time while the result list is built
+            with self._call(
+                "query_row_block_stream",
+                (
+                    _FETCH_LATEST_VIEW_QUERY
+                    if self._latest_view_ready
+                    else _FETCH_UNIQUE_TRACES_QUERY
+                ),
+                [limit],
+                settings={"max_block_size": FETCH_BLOCK_SIZE},
+            ) as stream:
+                traces = self._process_rows(
+                    stream.source.column_names, chain.from_iterable(stream)
+                )
+            self._breaker.record_success()
+            return traces
         except Exception as e:
+            self._breaker.record_failure()
             self.logger.error(f"Error fetching traces: {e}")
             return []
 
+    def _cached(self, entry):
+        """Return a cache entry's value while it is younger than the TTL."""
+        stamp, value = entry
+        if value is not None and time.monotonic() - stamp < self._cache_ttl:
+            return value
+        return None
+
     def get_trace_counts(self) -> Dict[str, int]:
         """Get trace count statistics from ClickHouse."""
         if not self.clickhouse_connect:
             return {"total": 0, "errors": 0, "success": 0}
 
-        try:
-            with self.clickhouse_connect.get_client(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-            ) as client:
-                # Get total traces
-                total_result = client.query(
-                    "SELECT COUNT(DISTINCT TraceId) FROM otel_traces"
-                )
-                total_traces = (
-                    total_result.result_rows[0][0] if total_result.result_rows else 0
-                )
-
-                # Get error traces
-                error_result = client.query(
-                    "SELECT COUNT(DISTINCT TraceId) FROM otel_traces WHERE StatusCode = 'Error'"
-                )
-                error_traces = (
-                    error_result.result_rows[0][0] if error_result.result_rows else 0
+        # Fresh cached counts are served even while the breaker is open
+        counts = self._cached(self._counts_cache)
+        if counts is not None:
+            return dict(counts)
+
+        # Serialise refreshes so concurrent pollers share one round-trip
+        with self._cache_lock:
+            counts = self._cached(self._counts_cache)
+            if counts is not None:
+                return dict(counts)
+            # Ask the breaker only once a query will really run, so a cache
+            # hit never spends the half-open probe
+            if not self._breaker.allow():
+                return {"total": 0, "errors": 0, "success": 0}
+            try:
+                # One scan yields both totals; uniqExact matches COUNT(DISTINCT)
+                if self.counts_window:
+                    result = self._query(
+                        _TRACE_COUNTS_QUERY + _COUNTS_WINDOW_PREWHERE,
+                        [self.counts_window],
+                    )
+                else:
+                    result = self._query(_TRACE_COUNTS_QUERY)
+                total_traces, error_traces = (
+                    result.result_rows[0] if result.result_rows else (0, 0)
                 )
 
-                return {
+                self._breaker.record_success()
+                counts = {
                     "total": total_traces,
                     "errors": error_traces,
                     "success": total_traces - error_traces,
                 }
-        except Exception as e:
-            self.logger.error(f"Error getting trace counts: {e}")
-            return {"total": 0, "errors": 0, "success": 0}
+                self._counts_cache = (time.monotonic(), counts)
+                return dict(counts)
+            except Exception as e:
+                self._breaker.record_failure()
+                self.logger.error(f"Error getting trace counts: {e}")
+                return {"total": 0, "errors": 0, "success": 0}
 
     def get_service_names(self) -> List[str]:
         """Get list of service names from ClickHouse."""
         if not self.clickhouse_connect:
             return []
 
-        try:
-            with self.clickhouse_connect.get_client(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-            ) as client:
-                result = client.query(
+        names = self._cached(self._services_cache)
+        if names is not None:
+            return list(names)
+
+        with self._cache_lock:
+            names = self._cached(self._services_cache)
+            if names is not None:
+                return list(names)
+            if not self._breaker.allow():
+                return []
+            try:
+                result = self._query(
                     "SELECT DISTINCT ServiceName FROM otel_traces ORDER BY ServiceName"
                 )
-                return (
+                self._breaker.record_success()
+                names = (
                     [row[0] for row in result.result_rows] if result.result_rows else []
                 )
-        except Exception as e:
-            self.logger.error(f"Error getting service names: {e}")
-            return []
+                self._services_cache = (time.monotonic(), names)
+                return list(names)
+            except Exception as e:
+                self._breaker.record_failure()
+                self.logger.error(f"Error getting service names: {e}")
+                return []
 
     def add_trace(self, trace: Dict[str, Any]) -> None:
         """ClickHouse doesn't support direct trace addition (uses OTLP pipeline)."""
         self.logger.debug("ClickHouse trace insertion handled by OTLP pipeline")
 
+    def add_traces_bulk(self, traces: List[Dict[str, Any]]) -> None:
+        """ClickHouse doesn't support direct trace addition (uses OTLP pipeline)."""
+        self.logger.debug("ClickHouse trace insertion handled by OTLP pipeline")
+
     def _process_query_results(self, result) -> List[Dict[str, Any]]:
         """Process ClickHouse query results into dictionaries."""
         if not result.result_rows:
             return []
 
-        columns = result.column_names
-        traces = []
-
-        for row in result.result_rows:
-            trace_dict = dict(zip(columns, row))
-            self._format_trace_data(trace_dict)
-            traces.append(trace_dict)
+        return self._process_rows(result.column_names, result.result_rows)
 
+    def _process_rows(self, columns, rows) -> List[Dict[str, Any]]:
+        """Turn an iterable of result rows into formatted trace dictionaries."""
+        # Build every dict in C via map/zip rather than a Python loop per row
+        traces = list(map(dict, map(zip, repeat(columns), rows)))
+        if "status_color" not in columns:
+            for trace_dict in traces:
+                self._format_trace_data(trace_dict)
+        # Otherwise the display fields were already rendered server-side
         return traces
 
     def _format_trace_data(self, trace_dict: Dict[str, Any]) -> None:
         """Format trace data for UI display."""
-        # Format timestamp for display
-        if "Timestamp" in trace_dict and trace_dict["Timestamp"]:
-            try:
-                if hasattr(trace_dict["Timestamp"], "strftime"):
-                    trace_dict["formatted_timestamp"] = trace_dict[
-                        "Timestamp"
-                    ].strftime("%Y-%m-%d %H:%M:%S")
-                    trace_dict["FormattedTime"] = trace_dict["Timestamp"].strftime(
-                        "%H:%M:%S"
-                    )
-                else:
-                    trace_dict["formatted_timestamp"] = str(trace_dict["Timestamp"])
-                    trace_dict["FormattedTime"] = str(trace_dict["Timestamp"])
-            except Exception:
-                trace_dict["formatted_timestamp"] = "Invalid Date"
-                trace_dict["FormattedTime"] = "Invalid"
-        else:
-            trace_dict["formatted_timestamp"] = "No Timestamp"
-            trace_dict["FormattedTime"] = "N/A"
-
-        # Format duration
-        if "Duration" in trace_dict:
-            duration_ns = int(trace_dict["Duration"]) if trace_dict["Duration"] else 0
-            duration_ms = duration_ns / 1_000_000
-            if duration_ms < 1:
-                trace_dict["DurationMs"] = f"{duration_ms:.2f}ms"
-            else:
-                trace_dict["DurationMs"] = f"{duration_ms:.1f}ms"
-        else:
-            trace_dict["DurationMs"] = "N/A"
-
-        # Short IDs for display
-        trace_dict["ShortTraceId"] = str(trace_dict.get("TraceId", "unknown"))[:16]
-        trace_dict["ShortSpanId"] = str(trace_dict.get("SpanId", "unknown"))[:16]
-
-        # Determine status color
-        status_code = trace_dict.get("StatusCode", "")
-        if status_code is None:
-            status_code = ""
-        status_code = str(status_code).upper()
-        if status_code in ["OK", "STATUS_CODE_OK"]:
-            trace_dict["status_color"] = "positive"
-        else:
-            trace_dict["status_color"] = "negative"
+        _format_trace_data(trace_dict)
 
 
-class InMemoryDatabase(DatabaseInterface):
-    """In-memory database implementation using a thread-safe deque."""
+def _round_up_pow2(n: int) -> int:
+    """Smallest power of two that is at least n (and at least 1)."""
+    return 1 << max(n - 1, 0).bit_length()
+
+
+class _TraceRing:
+    """Fixed-size circular buffer of traces with a lock-free write path.
+
+    Writers claim a sequence number with next() on an itertools.count, which
+    runs in C without releasing the GIL, so no two writers share a slot.
+    Storage is column-wise: the trace rows plus the fields the aggregates
+    need (error flag, service name) live in parallel lists, so counting
+    walks flat lists instead of looking keys up in every row.
+
+    A slot's sequence is cleared before its columns are rewritten and set
+    again afterwards. Readers accept a slot only if it carries the sequence
+    they expect both before and after reading it, which skips slots that
+    were lapped or are still being written.
+    """
+
+    __slots__ = (
+        "_seqs",
+        "_traces",
+        "_errors",
+        "_services",
+        "_mask",
+        "_seq",
+        "_published",
+    )
 
-    def __init__(self, max_traces: Optional[int] = None):
-        self.max_traces = max_traces or int(os.getenv("INMEMORY_MAX_TRACES", "100"))
-        self.traces = deque(maxlen=self.max_traces)
-        self.lock = threading.RLock()  # Thread-safe access
-        self.logger = logging.getLogger(__name__)
+    def __init__(self, capacity: int):
+        size = _round_up_pow2(capacity)
+        self._seqs = [-1] * size
+        self._traces = [None] * size
+        self._errors = [False] * size
+        self._services = [None] * size
+        self._mask = size - 1
+        self._seq = count()
+        # One past the newest stored sequence; a hint that may briefly lag
+        # when two writers race, which readers correct for
+        self._published = 0
+
+    def push(self, trace: Dict[str, Any]) -> None:
+        """Store a trace, overwriting the oldest slot once the ring is full."""
+        seq = next(self._seq)
+        i = seq & self._mask
+        seqs = self._seqs
+        seqs[i] = -1
+        self._traces[i] = trace
+        self._errors[i] = trace["status_color"] == "negative"
+        self._services[i] = trace.get("ServiceName")
+        seqs[i] = seq
+        if seq >= self._published:
+            self._published = seq + 1
+
+    def _high(self) -> int:
+        """One past the newest fully stored sequence."""
+        seqs = self._seqs
+        mask = self._mask
+        high = self._published
+        # Pick up writers that stored their slot but lost the race to
+        # advance the hint
+        while seqs[high & mask] == high:
+            high += 1
+        return high
+
+    def newest(self, window: int, limit: int) -> List[Dict[str, Any]]:
+        """Up to 'limit' traces among the last 'window' writes, newest first."""
+        if limit <= 0:
+            return []
+        seqs = self._seqs
+        traces = self._traces
+        mask = self._mask
+        high = self._high()
+
+        result = []
+        for seq in range(high - 1, max(high - window, 0) - 1, -1):
+            i = seq & mask
+            if seqs[i] == seq:
+                trace = traces[i]
+                if seqs[i] == seq:
+                    result.append(trace)
+                    if len(result) == limit:
+                        break
+        return result
+
+    def column_stats(self, window: int) -> Tuple[int, int, set]:
+        """Stored count, error count and service names over the last 'window' writes."""
+        high = self._high()
+        low = max(high - window, 0)
+        start = low & self._mask
+        n = high - low
+        # Copy the window's sequences around the column copies; a slot
+        # rewritten in between shows a different sequence in the second copy
+        before = _ring_slice(self._seqs, start, n)
+        errors = _ring_slice(self._errors, start, n)
+        services = _ring_slice(self._services, start, n)
+        after = _ring_slice(self._seqs, start, n)
+
+        # Common case: every slot holds the sequence it should, so the
+        # aggregates are a sum and a set built in C
+        expected = list(range(low, high))
+        if before == expected == after:
+            names = set(services)
+            names.discard(None)
+            return n, sum(errors), names
+
+        # A writer raced the copies: fall back to checking slot by slot
+        total = error_count = 0
+        names = set()
+        for seq, seq_before, seq_after, is_error, service in zip(
+            expected, before, after, errors, services
+        ):
+            if seq == seq_before == seq_after:
+                total += 1
+                error_count += is_error
+                names.add(service)
+        names.discard(None)
+        return total, error_count, names
+
+
+def _ring_slice(column: list, start: int, n: int) -> list:
+    """'n' consecutive ring entries from 'start', wrapping past the end."""
+    end = start + n
+    if end <= len(column):
+        return column[start:end]
+    return column[start:] + column[: end - len(column)]
+
+
+class InMemoryDatabase(DatabaseInterface):
+    """In-memory database implementation backed by a lock-free ring buffer."""
+
+    def __init__(
+        self, max_traces: Optional[int] = None, evict_batch: Optional[int] = None
+    ):
+        self.max_traces = max_traces or _default_max_traces()
+        # Spare slots past max_traces: evicted traces stay referenced until a
+        # later lap reuses their slot, and in-flight writers have room to
+        # land without overwriting the window readers walk. 1 keeps the ring
+        # as tight as the power-of-two rounding allows.
+        self._evict_batch = evict_batch or max(16, self.max_traces // 16)
+        # Writers never block each other; only disconnect() takes the lock,
+        # to swap in an empty ring
+        self._ring = self._new_ring()
+        # Placeholder rows for an empty store, built and formatted once
+        self._sample_traces = self._build_sample_traces()
+        self.lock = threading.Lock()
+        self.logger = logger
         self.logger.info(
             f"Initialized InMemory Database - max traces: {self.max_traces}"
         )
 
+    def _new_ring(self) -> _TraceRing:
+        """Build an empty ring sized for max_traces plus eviction headroom."""
+        return _TraceRing(self.max_traces + self._evict_batch - 1)
+
+    @property
+    def traces(self) -> List[Dict[str, Any]]:
+        """Snapshot of the stored traces, oldest first."""
+        stored = self._ring.newest(self.max_traces, self.max_traces)
+        stored.reverse()
+        return stored
+
     def connect(self) -> bool:
         """In-memory connection always succeeds."""
         self.logger.info("InMemory database connection established")
@@ -298,7 +888,7 @@ class InMemoryDatabase(DatabaseInterface):
     def disconnect(self) -> None:
         """In-memory disconnect."""
         with self.lock:
-            self.traces.clear()
+            self._ring = self._new_ring()
         self.logger.info("InMemory database disconnected and cleared")
 
     def health_check(self) -> bool:
@@ -307,73 +897,76 @@ class InMemoryDatabase(DatabaseInterface):
 
     def fetch_unique_traces(self, limit: int) -> List[Dict[str, Any]]:
         """Return traces from memory, newest first."""
-        with self.lock:
-            if not self.traces:
-                # Return sample traces for UI testing when empty
-                return self._get_sample_traces()
+        ring = self._ring
+        traces = ring.newest(self.max_traces, limit)
+        if traces or ring.newest(self.max_traces, 1):
+            return traces
 
-            # Return up to 'limit' most recent traces
-            traces_list = list(self.traces)
-            # Reverse to get newest first
-            traces_list.reverse()
-            return traces_list[:limit]
+        # Return sample traces for UI testing when empty
+        return self._get_sample_traces()
 
     def get_trace_counts(self) -> Dict[str, int]:
         """Return trace counts from in-memory database."""
-        with self.lock:
-            if not self.traces:
-                return {"total": 2, "errors": 1, "success": 1}  # Sample data counts
-
-            total = len(self.traces)
-            errors = len(
-                [
-                    t
-                    for t in self.traces
-                    if t.get("StatusCode", "").upper() not in ["OK", "STATUS_CODE_OK"]
-                ]
-            )
-            return {"total": total, "errors": errors, "success": total - errors}
+        total, errors, _ = self._ring.column_stats(self.max_traces)
+        if not total:
+            return {"total": 2, "errors": 1, "success": 1}  # Sample data counts
+
+        return {"total": total, "errors": errors, "success": total - errors}
 
     def get_service_names(self) -> List[str]:
         """Return service names from in-memory database."""
-        with self.lock:
-            if not self.traces:
-                return [
-                    "api-gateway",
-                    "auth-service",
-                    "billing-service",
-                    "order-service",
-                    "notification-service",
-                ]
-
-            services = set()
-            for trace in self.traces:
-                if "ServiceName" in trace:
-                    services.add(trace["ServiceName"])
-            return sorted(list(services))
+        total, _, services = self._ring.column_stats(self.max_traces)
+        if not total:
+            return [
+                "api-gateway",
+                "auth-service",
+                "billing-service",
+                "order-service",
+                "notification-service",
+            ]
+
+        return sorted(services)
 
     def add_trace(self, trace: Dict[str, Any]) -> None:
         """Add a trace to the in-memory database."""
-        with self.lock:
-            # Add timestamp if not present
+        # Add timestamp if not present
+        if "Timestamp" not in trace:
+            trace["Timestamp"] = datetime.now(timezone.utc)
+
+        # Format the trace data for UI consistency before it is published
+        if not trace.keys() >= _INMEMORY_FORMATTED_FIELDS:
+            _format_trace_data(trace, key_info=True)
+
+        # The ring overwrites its oldest trace once full
+        self._ring.push(trace)
+
+        # Log the trace addition
+        self.logger.debug(
+            f"Added trace to in-memory store: {trace.get('TraceId', 'unknown')[:16]} "
+            f"| Service: {trace.get('ServiceName', 'unknown')} "
+            f"| Operation: {trace.get('SpanName', 'unknown')} "
+            f"| Status: {trace.get('StatusCode', 'unknown')}"
+        )
+
+    def add_traces_bulk(self, traces: List[Dict[str, Any]]) -> None:
+        """Add a batch of traces."""
+        for trace in traces:
             if "Timestamp" not in trace:
                 trace["Timestamp"] = datetime.now(timezone.utc)
+            if not trace.keys() >= _INMEMORY_FORMATTED_FIELDS:
+                _format_trace_data(trace, key_info=True)
 
-            # Format the trace data for UI consistency
-            self._format_trace_data(trace)
+        push = self._ring.push
+        for trace in traces:
+            push(trace)
 
-            # Add to memory (deque automatically handles max size)
-            self.traces.append(trace)
-
-            # Log the trace addition
-            self.logger.debug(
-                f"Added trace to in-memory store: {trace.get('TraceId', 'unknown')[:16]} "
-                f"| Service: {trace.get('ServiceName', 'unknown')} "
-                f"| Operation: {trace.get('SpanName', 'unknown')} "
-                f"| Status: {trace.get('StatusCode', 'unknown')}"
-            )
+        self.logger.debug("Added %d traces to in-memory store", len(traces))
 
     def _get_sample_traces(self) -> List[Dict[str, Any]]:
+        """Return copies of the sample traces shown when no real traces exist."""
+        return [dict(trace) for trace in self._sample_traces]
+
+    def _build_sample_traces(self) -> List[Dict[str, Any]]:
         """Generate sample traces for UI testing when no real traces exist."""
         sample_traces = [
             {
@@ -405,76 +998,22 @@ class InMemoryDatabase(DatabaseInterface):
 
         # Format each sample trace
         for trace in sample_traces:
-            self._format_trace_data(trace)
+            _format_trace_data(trace, key_info=True)
 
         return sample_traces
 
     def _format_trace_data(self, trace_dict: Dict[str, Any]) -> None:
         """Format trace data for UI display."""
-        # Format timestamp for display
-        if "Timestamp" in trace_dict and trace_dict["Timestamp"]:
-            try:
-                if hasattr(trace_dict["Timestamp"], "strftime"):
-                    trace_dict["formatted_timestamp"] = trace_dict[
-                        "Timestamp"
-                    ].strftime("%Y-%m-%d %H:%M:%S")
-                    trace_dict["FormattedTime"] = trace_dict["Timestamp"].strftime(
-                        "%H:%M:%S"
-                    )
-                else:
-                    trace_dict["formatted_timestamp"] = str(trace_dict["Timestamp"])
-                    trace_dict["FormattedTime"] = str(trace_dict["Timestamp"])
-            except Exception:
-                trace_dict["formatted_timestamp"] = "Invalid Date"
-                trace_dict["FormattedTime"] = "Invalid"
-        else:
-            trace_dict["formatted_timestamp"] = "No Timestamp"
-            trace_dict["FormattedTime"] = "N/A"
-
-        # Format duration
-        if "Duration" in trace_dict:
-            duration_ns = int(trace_dict["Duration"]) if trace_dict["Duration"] else 0
-            duration_ms = duration_ns / 1_000_000
-            if duration_ms < 1:
-                trace_dict["DurationMs"] = f"{duration_ms:.2f}ms"
-            else:
-                trace_dict["DurationMs"] = f"{duration_ms:.1f}ms"
-        else:
-            trace_dict["DurationMs"] = "N/A"
-
-        # Short IDs for display
-        trace_dict["ShortTraceId"] = str(trace_dict.get("TraceId", "unknown"))[:16]
-        trace_dict["ShortSpanId"] = str(trace_dict.get("SpanId", "unknown"))[:16]
-
-        # Determine status color
-        status_code = trace_dict.get("StatusCode", "")
-        if status_code is None:
-            status_code = ""
-        status_code = str(status_code).upper()
-        if status_code in ["OK", "STATUS_CODE_OK"]:
-            trace_dict["status_color"] = "positive"
-        else:
-            trace_dict["status_color"] = "negative"
-
-        # Extract key info for display
-        trace_dict["KeyInfo"] = self._extract_key_info(
-            trace_dict.get("SpanAttributes", {})
-        )
+        _format_trace_data(trace_dict, key_info=True)
 
     def _extract_key_info(self, attrs: Dict[str, Any]) -> str:
         """Extract key information from span attributes for display."""
-        if not attrs:
-            return ""
+        return _extract_key_info(attrs)
 
-        parts = []
-        if attrs.get("error.type"):
-            parts.append(f"🚨 {attrs['error.type']}")
-        if not parts and attrs.get("user.id"):
-            parts.append(f"👤 {attrs['user.id']}")
-        if not parts and attrs.get("job.id"):
-            parts.append(f"⚙️ {attrs['job.id']}")
 
-        return " | ".join(parts)
+def _default_max_traces() -> int:
+    """In-memory capacity from the validated Config, read at call time."""
+    return Config.INMEMORY_MAX_TRACES
 
 
 # Factory function to create database instances
@@ -486,17 +1025,15 @@ def create_database(db_type: str = None, **kwargs) -> DatabaseInterface:
 
     # Check if we should use in-memory database
     if should_use_inmemory_database(db_type, **kwargs):
-        max_traces = kwargs.get("max_traces") or int(
-            os.getenv("INMEMORY_MAX_TRACES", "100")
-        )
+        max_traces = kwargs.get("max_traces") or _default_max_traces()
         return InMemoryDatabase(max_traces=max_traces)
 
     if db_type.lower() == "clickhouse":
+        # max_traces only sizes the in-memory store
+        kwargs.pop("max_traces", None)
         return ClickHouseDatabase(**kwargs)
-    elif db_type.lower() in ["inmemory", "memory"]:
-        max_traces = kwargs.get("max_traces") or int(
-            os.getenv("INMEMORY_MAX_TRACES", "100")
-        )
+    elif db_type.lower() in _INMEMORY_TYPES:
+        max_traces = kwargs.get("max_traces") or _default_max_traces()
         return InMemoryDatabase(max_traces=max_traces)
     else:
         raise ValueError(
@@ -506,10 +1043,8 @@ def create_database(db_type: str = None, **kwargs) -> DatabaseInterface:
 
 def should_use_inmemory_database(db_type: str = None, **kwargs) -> bool:
     """Determine if we should use the in-memory database based on configuration."""
-    logger = logging.getLogger(__name__)
-
     # Check if database type is explicitly set to in-memory
-    if db_type and db_type.lower() in ["inmemory", "memory"]:
+    if db_type and db_type.lower() in _INMEMORY_TYPES:
         logger.info("Using in-memory database (explicitly configured)")
         return True
 
@@ -526,7 +1061,7 @@ def should_use_inmemory_database(db_type: str = None, **kwargs) -> bool:
         return True
 
     # Check if host is set to a placeholder value
-    if host.lower() in ["none", "disabled", "mock", "false", "inmemory", "memory"]:
+    if host.lower() in _DISABLED_HOSTS:
         logger.info(
             f"Database explicitly disabled (host='{host}'), using in-memory database"
         )
@@ -546,14 +1081,7 @@ def _auto_detect_database_type(**kwargs) -> str:
     clickhouse_host = (
         kwargs.get("host") or os.getenv("DATABASE_HOST") or os.getenv("CLICKHOUSE_HOST")
     )
-    if clickhouse_host and clickhouse_host.lower() not in [
-        "none",
-        "disabled",
-        "mock",
-        "false",
-        "inmemory",
-        "memory",
-    ]:
+    if clickhouse_host and clickhouse_host.lower() not in _DISABLED_HOSTS:
         return "clickhouse"
 
     # Default to in-memory
@@ -562,39 +1090,33 @@ def _auto_detect_database_type(**kwargs) -> str:
 
 def get_database() -> DatabaseInterface:
     """
-    Factory function to select the database backend based on env vars.
+    Factory function to select the database backend from the validated Config.
     Returns an instance of DatabaseInterface (ClickHouseDatabase or InMemoryDatabase).
     """
-    logger = logging.getLogger(__name__)
     # Feature gate: Use localhost instead of 0.0.0.0 if enabled
     use_localhost = os.getenv("component.UseLocalHostAsDefaultHost", "").lower() in [
         "true",
         "1",
         "yes",
     ]
-    db_type = os.getenv("DATABASE_TYPE", "").lower()
-    host = os.getenv("DATABASE_HOST", "") or os.getenv("CLICKHOUSE_HOST", "")
+    db_type = Config.DATABASE_TYPE.lower()
+    host = Config.DATABASE_HOST
     if use_localhost and host == "0.0.0.0":
         host = "localhost"
         logger.info(
             "Feature gate 'component.UseLocalHostAsDefaultHost' enabled, using localhost instead of 0.0.0.0"
         )
-    port = int(os.getenv("DATABASE_PORT", os.getenv("CLICKHOUSE_PORT", "8123")))
-    user = os.getenv("DATABASE_USER", "") or os.getenv("CLICKHOUSE_USER", "user")
-    password = os.getenv("DATABASE_PASSWORD", "") or os.getenv(
-        "CLICKHOUSE_PASSWORD", "password"
-    )
-    database = os.getenv("DATABASE_NAME", "") or os.getenv(
-        "CLICKHOUSE_DATABASE", "otel"
-    )
     try:
         db = create_database(
             db_type=db_type,
             host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database,
+            port=Config.DATABASE_PORT,
+            user=Config.DATABASE_USER,
+            password=Config.DATABASE_PASSWORD,
+            database=Config.DATABASE_NAME,
+            pool_size=Config.DATABASE_POOL_SIZE,
+            num_pools=Config.DATABASE_POOL_NUM_POOLS,
+            max_traces=Config.INMEMORY_MAX_TRACES,
         )
         logger.info(f"Database initialized: {type(db).__name__}")
         return db
@@ -610,4 +1132,5 @@ __all__ = [
     "InMemoryDatabase",
     "create_database",
     "get_database",
+    "is_ok_status",
 ]
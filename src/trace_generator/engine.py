@@ -14,16 +14,19 @@ from opentelemetry.sdk.trace.export import (
 )
 from opentelemetry.trace import StatusCode, SpanKind, Link
 from trace_generator.config import Config
-from trace_generator.resolver import ValueResolver
+from trace_generator.resolver import Template, ValueResolver
 from trace_generator.database import get_database, DatabaseInterface, InMemoryDatabase
 import random
 import time
-from threading import Thread, Lock
-from collections import deque, OrderedDict
+from threading import Thread, Lock, Event, local
+from collections import deque
 import fnmatch
 import re
 import atexit
-from datetime import datetime, timezone
+import sys
+from functools import lru_cache, partial
+from itertools import accumulate, count, islice
+from operator import attrgetter
 
 
 # Numeric status codes for ClickHouse and OTel
@@ -35,57 +38,276 @@ class NumericStatusCode:
 
 _trace_providers: List[TracerProvider] = []
 
+# Upper bound on context store shards; always a power of two
+CONTEXT_STORE_MAX_SHARDS = 64
+# Fewest entries a shard should hold before another shard is worth adding
+CONTEXT_STORE_MIN_SHARD_SIZE = 8
+_GLOB_CHARS = frozenset("*?[")
+
+
+@lru_cache(maxsize=256)
+def _compile_link_pattern(pattern: str):
+    """Compile a link_from_context glob once per distinct pattern."""
+    return re.compile(fnmatch.translate(pattern))
+
+
+def _constant(value):
+    """Return a resolver plan step that always yields ``value``."""
+    if isinstance(value, str):
+        value = sys.intern(value)
+    return lambda _context: value
+
+
+def _intern_key(key):
+    return sys.intern(key) if isinstance(key, str) else key
+
+
+# Most pooled context dicts a worker thread keeps for reuse
+CONTEXT_DICT_POOL_SIZE = 256
+
+
+class _DictPool(local):
+    """Per-thread free list of scratch dicts for span template contexts."""
+
+    def __init__(self):
+        self.free = []
+
+    def acquire(self) -> Dict:
+        return self.free.pop() if self.free else {}
+
+    def release(self, d: Dict) -> None:
+        if len(self.free) < CONTEXT_DICT_POOL_SIZE:
+            d.clear()
+            self.free.append(d)
+
+
+class ContextStore:
+    """Bounded store of exported span contexts, sharded by export key.
+
+    Each shard is a preallocated ring buffer chosen by hashing the export
+    key. Writers claim a slot from the shard's ``itertools.count`` and
+    overwrite it, both single atomic steps under the GIL, so neither writers
+    nor readers take a lock. Readers iterate the live part of each ring in
+    place; they may miss an entry that is being overwritten, which is fine
+    since links only need a recent match.
+    """
+
+    def __init__(self, capacity: int, max_shards: int = CONTEXT_STORE_MAX_SHARDS):
+        num_shards = 1
+        while (
+            num_shards * 2 <= max_shards
+            and capacity // (num_shards * 2) >= CONTEXT_STORE_MIN_SHARD_SIZE
+        ):
+            num_shards *= 2
+        self.capacity = capacity
+        self._mask = num_shards - 1
+        self._shard_size = -(-capacity // num_shards)
+        self._rings = [[None] * self._shard_size for _ in range(num_shards)]
+        self._write_index = [count() for _ in range(num_shards)]
+        # Slots written so far per shard, until the ring is full
+        self._filled = [0] * num_shards
+
+    @property
+    def num_shards(self) -> int:
+        return len(self._rings)
+
+    def _shard_of(self, key: str) -> int:
+        return hash(key) & self._mask
+
+    def append(self, entry) -> None:
+        """Store an ``(export_key, data)`` entry in its key's shard."""
+        shard = self._shard_of(entry[0])
+        written = next(self._write_index[shard])
+        if written < self._shard_size:
+            self._rings[shard][written] = entry
+            self._filled[shard] = max(self._filled[shard], written + 1)
+        else:
+            self._rings[shard][written % self._shard_size] = entry
+
+    def _entries(self, shards):
+        rings, filled = self._rings, self._filled
+        for shard in shards:
+            # Iterate in place: slots are only ever replaced, never removed
+            for entry in islice(rings[shard], filled[shard]):
+                if entry is not None:
+                    yield entry
+
+    def matches(self, pattern: str, regex=None) -> List:
+        """Return the stored ``(key, data)`` entries matching a link glob."""
+        if regex is None:
+            regex = _compile_link_pattern(pattern)
+        if _GLOB_CHARS.isdisjoint(pattern):
+            shards = (self._shard_of(pattern),)
+        else:
+            shards = range(len(self._rings))
+        match = regex.match
+        return [entry for entry in self._entries(shards) if match(entry[0])]
+
+    def get(self, key: str):
+        """Return the data of an entry stored under ``key``, or None."""
+        for stored_key, data in self._entries((self._shard_of(key),)):
+            if stored_key == key:
+                return data
+        return None
+
+    def __len__(self) -> int:
+        return sum(self._filled)
+
+    def __iter__(self):
+        return self._entries(range(len(self._rings)))
+
+
+# Most spans written to the in-memory database in one bulk insert
+SPAN_BATCH_SIZE = 64
+
+
+# id(resource) -> (resource, plain dict of its attributes); holding the
+# resource keeps its id from being reused while cached
+_resource_attributes = {}
+
+
+def _resource_attributes_dict(resource) -> Dict:
+    """Return one shared, read-only dict of a provider's resource attributes."""
+    cached = _resource_attributes.get(id(resource))
+    if cached is None or cached[0] is not resource:
+        attrs = resource.attributes
+        cached = (resource, dict(attrs) if attrs else {})
+        _resource_attributes[id(resource)] = cached
+    return cached[1]
+
+
+# Reads every span property _span_to_trace_dict needs in one C-level call
+_span_fields = attrgetter(
+    "name",
+    "parent",
+    "kind",
+    "status",
+    "start_time",
+    "end_time",
+    "attributes",
+    "resource",
+)
+
+
+def _span_to_trace_dict(span: ReadableSpan) -> Dict:
+    """Convert a finished span to the in-memory database's trace format.
+
+    The dict keys are string literals, which the compiler already interns.
+    Service and span names repeat across spans but are often freshly built
+    strings, so they are interned here to share one object per name.
+    """
+    (
+        name,
+        parent,
+        kind,
+        status,
+        start_time,
+        end_time,
+        span_attrs,
+        resource,
+    ) = _span_fields(span)
+    sc = span.get_span_context()
+    resource_attrs = _resource_attributes_dict(resource)
+    return {
+        # to_bytes + hex are single C calls and keep the zero padding
+        "TraceId": sc.trace_id.to_bytes(16, "big").hex(),
+        "SpanId": sc.span_id.to_bytes(8, "big").hex(),
+        "ParentSpanId": parent.span_id.to_bytes(8, "big").hex() if parent else "",
+        "SpanName": sys.intern(name),
+        "ServiceName": sys.intern(
+            resource_attrs.get("service.name", "unknown-service")
+        ),
+        "StatusCode": status.status_code.name,
+        "StatusMessage": status.description or "",
+        # Raw epoch ns; the database formats it for display when storing
+        "Timestamp": start_time,
+        "Duration": end_time - start_time,
+        "SpanKind": kind.name,
+        # copy() reaches the frozen attribute dict behind the mapping proxy
+        # and copies it in C, unlike dict() which walks the Mapping protocol
+        "SpanAttributes": span_attrs.copy() if span_attrs else {},
+        "ResourceAttributes": resource_attrs,
+    }
+
 
 class InMemorySpanProcessor(SpanProcessor):
-    """Custom span processor that stores traces in the in-memory database."""
+    """Custom span processor that stores traces in the in-memory database.
+
+    ``on_end`` only queues the finished span. A single writer thread converts
+    queued spans and stores them in batches through ``add_traces_bulk``, so
+    neither the conversion nor the database lock sits on the tracing thread.
+    """
 
-    def __init__(self, database: InMemoryDatabase):
+    def __init__(self, database: InMemoryDatabase, batch_size: int = SPAN_BATCH_SIZE):
         self.database = database
+        self.batch_size = batch_size
         self.logger = logging.getLogger(__name__)
+        # Many producers append, only the writer (or a flush) pops; deque
+        # append/popleft are atomic, so the queue itself needs no lock
+        self._queue = deque()
+        self._wakeup = Event()
+        # Held while a popped batch is being stored, so a flush can wait for it
+        self._write_lock = Lock()
+        self._stopping = False
+        self._writer = Thread(
+            target=self._writer_loop, name="InMemorySpanWriter", daemon=True
+        )
+        self._writer.start()
 
     def on_start(self, span: ReadableSpan, parent_context) -> None:
         """Called when a span starts."""
         pass
 
     def on_end(self, span: ReadableSpan) -> None:
-        """Called when a span ends - store it in the in-memory database."""
-        try:
-            # Convert span to trace dictionary format
-            trace_dict = {
-                "TraceId": format(span.get_span_context().trace_id, "032x"),
-                "SpanId": format(span.get_span_context().span_id, "016x"),
-                "ParentSpanId": format(span.parent.span_id, "016x")
-                if span.parent
-                else "",
-                "SpanName": span.name,
-                "ServiceName": span.resource.attributes.get(
-                    "service.name", "unknown-service"
-                ),
-                "StatusCode": span.status.status_code.name,
-                "StatusMessage": span.status.description or "",
-                "Timestamp": datetime.fromtimestamp(
-                    span.start_time / 1_000_000_000, tz=timezone.utc
-                ),
-                "Duration": span.end_time - span.start_time,
-                "SpanKind": span.kind.name,
-                "SpanAttributes": dict(span.attributes) if span.attributes else {},
-                "ResourceAttributes": dict(span.resource.attributes)
-                if span.resource.attributes
-                else {},
-            }
-
-            # Add the trace to the in-memory database
-            self.database.add_trace(trace_dict)
-
-        except Exception as e:
-            self.logger.error(f"Error storing span in in-memory database: {e}")
+        """Called when a span ends - queue it for the writer thread."""
+        self._queue.append(span)
+        if self._stopping:
+            # No writer left to pick it up
+            self._drain()
+        else:
+            self._wakeup.set()
+
+    def _writer_loop(self) -> None:
+        while not self._stopping:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self._drain()
+
+    def _drain(self) -> None:
+        """Convert and store everything currently queued."""
+        queue = self._queue
+        with self._write_lock:
+            while queue:
+                batch = []
+                try:
+                    while len(batch) < self.batch_size:
+                        span = queue.popleft()
+                        try:
+                            batch.append(_span_to_trace_dict(span))
+                        except Exception as e:
+                            self.logger.error(
+                                f"Error storing span in in-memory database: {e}"
+                            )
+                except IndexError:
+                    pass
+                if not batch:
+                    continue
+                try:
+                    self.database.add_traces_bulk(batch)
+                except Exception as e:
+                    self.logger.error(f"Error storing spans in in-memory database: {e}")
 
     def shutdown(self) -> None:
-        """Shutdown the processor."""
-        pass
+        """Stop the writer thread after storing any queued spans."""
+        if not self._stopping:
+            self._stopping = True
+            self._wakeup.set()
+            self._writer.join(timeout=5.0)
+        self._drain()
 
     def force_flush(self, timeout_millis: int = 30000) -> bool:
-        """Force flush - no-op for in-memory processor."""
+        """Store every span queued so far before returning."""
+        self._drain()
         return True
 
 
@@ -103,6 +325,11 @@ def setup_opentelemetry_providers(
 
     logger.info("Setting up OpenTelemetry TracerProviders for each service...")
 
+    # One in-memory processor (and writer thread) is shared by every provider
+    inmemory_processor = None
+    if isinstance(database, InMemoryDatabase):
+        inmemory_processor = InMemorySpanProcessor(database)
+
     for service_name in service_names:
         resource = Resource(attributes={"service.name": service_name})
         provider = TracerProvider(resource=resource)
@@ -113,8 +340,7 @@ def setup_opentelemetry_providers(
         provider.add_span_processor(otlp_processor)
 
         # If using in-memory database, also add the in-memory processor
-        if isinstance(database, InMemoryDatabase):
-            inmemory_processor = InMemorySpanProcessor(database)
+        if inmemory_processor is not None:
             provider.add_span_processor(inmemory_processor)
             logger.debug(f"Added in-memory span processor for service: {service_name}")
 
@@ -166,10 +392,6 @@ class TraceGenerator:
         database: DatabaseInterface = None,
     ):
         self.tracers = tracers
-        self.scenarios = scenarios_config.get("scenarios", [])
-        self.scenario_weights = OrderedDict()
-        for i, scenario in enumerate(self.scenarios):
-            self.scenario_weights[i] = scenario.get("weight", 1)
         self.running = False
         self.trace_count = 0
         self.threads = []  # List of worker threads
@@ -179,19 +401,34 @@ class TraceGenerator:
             Config.MAX_TEMPLATE_ITERATIONS
         )  # Pass config to resolver
         self.database = database or get_database()
+        # Compiled copies carry the per-span plans; the caller's config (also
+        # used by validation and the UI) is left untouched
+        self.scenarios = [
+            self._compile_scenario(scenario)
+            for scenario in scenarios_config.get("scenarios", [])
+        ]
+        # Scenarios are static, so the weighted-choice tables are built once
+        self._scenario_weights = tuple(s.get("weight", 1) for s in self.scenarios)
+        self._scenario_indices = tuple(range(len(self.scenarios)))
+        self._cum_weights = tuple(accumulate(self._scenario_weights))
 
         context_store_size = self._calculate_context_store_size()
-        self.context_store = deque(maxlen=context_store_size)
-        self.context_store_lock = Lock()
+        self.context_store = ContextStore(context_store_size)
+        self._dict_pool = _DictPool()
+        # Each worker draws from its own Random instead of the shared module one
+        self._tls = local()
 
         logger = logging.getLogger(__name__)
-        logger.info(f"Auto-configured context store size: {context_store_size}")
+        logger.info(
+            f"Auto-configured context store size: {context_store_size} "
+            f"({self.context_store.num_shards} shards)"
+        )
         logger.info(f"Using database: {type(self.database).__name__}")
 
     def _calculate_context_store_size(self) -> int:
         export_scenarios = 0
         total_export_weight = 0
-        total_weight = sum(self.scenario_weights.values())
+        total_weight = sum(self._scenario_weights)
         for i, scenario in enumerate(self.scenarios):
             if self._scenario_exports_context(scenario):
                 export_scenarios += 1
@@ -217,6 +454,115 @@ class TraceGenerator:
         )
         return optimal_size
 
+    def _compile_value(self, value):
+        """Return a callable resolving ``value`` against a context.
+
+        Values without templates short-circuit to a constant, so the hot path
+        never hands them to the resolver; templates are parsed once here.
+        """
+        if isinstance(value, str) and "{{" in value:
+            return partial(self.resolver.resolve, Template.compile(value))
+        return _constant(value)
+
+    def _compile_attributes(self, attributes: Dict):
+        return tuple(
+            (_intern_key(key), self._compile_value(value))
+            for key, value in attributes.items()
+        )
+
+    @staticmethod
+    def _delay_range(span_def: Dict):
+        """Return a span's delay as a (min, max) range in seconds, or None."""
+        if "delay_ms" in span_def:
+            low, high = span_def["delay_ms"]
+            delay_range = (low / 1000.0, high / 1000.0)
+        elif "delay" in span_def:
+            delay_range = tuple(span_def["delay"])
+        else:
+            return None
+        if delay_range[0] > 0 or delay_range[1] > 0:
+            return delay_range
+        return None
+
+    @staticmethod
+    def _error_thresholds(span_def: Dict):
+        """Return cumulative (threshold, type, message) error bands in percent.
+
+        One roll in [0, 100) picks the first band it falls below, so each
+        condition fires with its own probability. Conditions beyond a running
+        total of 100% can no longer fire.
+        """
+        thresholds = []
+        cumulative = 0.0
+        for error_cond in span_def.get("error_conditions", []):
+            probability = error_cond.get("probability", 0)
+            if probability <= 0:
+                continue
+            cumulative += probability
+            thresholds.append(
+                (
+                    cumulative,
+                    error_cond.get("type", "UnknownError"),
+                    error_cond.get("message", "An error occurred"),
+                )
+            )
+        return tuple(thresholds)
+
+    def _compile_scenario(self, scenario: Dict) -> Dict:
+        """Return a copy of the scenario with its vars split into resolved
+        literals and per-trace templates, and its span tree compiled."""
+        scenario = dict(scenario)
+        literal_vars, dynamic_vars = {}, []
+        for key, val_template in scenario.get("vars", {}).items():
+            if isinstance(val_template, str) and "{{" in val_template:
+                dynamic_vars.append((key, self._compile_value(val_template)))
+            else:
+                literal_vars[key] = val_template
+        scenario["_literal_vars"] = literal_vars
+        scenario["_dynamic_vars"] = tuple(dynamic_vars)
+        if scenario.get("root_span"):
+            scenario["root_span"] = self._compile_span(scenario["root_span"])
+        return scenario
+
+    def _compile_span(self, span_def: Dict) -> Dict:
+        """Return a copy of the span with per-span lookup data precomputed,
+        recursing into child calls. The input dict is not modified.
+
+        Raises ValueError if a span names a service without a tracer.
+        """
+        service_name = span_def.get("service")
+        if service_name not in self.tracers:
+            raise ValueError(f"No tracer found for service: {service_name}")
+        span_def = dict(span_def)
+        span_def["_tracer"] = self.tracers[service_name]
+        span_def["_span_kind"] = getattr(
+            SpanKind, span_def.get("kind", "INTERNAL").upper(), SpanKind.INTERNAL
+        )
+        if "link_from_context" in span_def:
+            span_def["_link_re"] = _compile_link_pattern(span_def["link_from_context"])
+        span_def["_op_plan"] = self._compile_value(
+            span_def.get("operation", "Unknown Op")
+        )
+        if "export_context_as" in span_def:
+            span_def["_export_plan"] = self._compile_value(
+                span_def["export_context_as"]
+            )
+        span_def["_attr_plan"] = self._compile_attributes(
+            span_def.get("attributes", {})
+        )
+        span_def["_delay_range_s"] = self._delay_range(span_def)
+        span_def["_err_cum"] = self._error_thresholds(span_def)
+        span_def["_event_plans"] = tuple(
+            (
+                self._compile_value(event_def.get("name", "unnamed_event")),
+                self._compile_attributes(event_def.get("attributes", {})),
+            )
+            for event_def in span_def.get("events", [])
+        )
+        if "calls" in span_def:
+            span_def["calls"] = [self._compile_span(call) for call in span_def["calls"]]
+        return span_def
+
     def _scenario_exports_context(self, scenario: Dict) -> bool:
         root_span = scenario.get("root_span", {})
         return self._span_exports_context(root_span)
@@ -269,146 +615,197 @@ class TraceGenerator:
             else True,
         }
 
+    def _rng(self) -> random.Random:
+        """Return the calling thread's random generator, creating it on first use."""
+        try:
+            return self._tls.rng
+        except AttributeError:
+            rng = self._tls.rng = random.Random()
+            return rng
+
     def _generate_traces_loop(self):
         logging.info("Starting trace generation loop...")
+        rng = self._rng()
         while self.running:
             try:
                 self.trace_count += 1
-                self._generate_single_trace()
+                self._generate_single_trace(rng)
                 time.sleep(
-                    random.uniform(Config.TRACE_INTERVAL_MIN, Config.TRACE_INTERVAL_MAX)
+                    rng.uniform(Config.TRACE_INTERVAL_MIN, Config.TRACE_INTERVAL_MAX)
                 )
             except Exception as e:
                 logging.error(f"Error in generation loop: {e}", exc_info=True)
                 time.sleep(1)
         logging.info("Trace generation loop stopped.")
 
-    def _generate_single_trace(self):
+    def _generate_single_trace(self, rng: random.Random = None):
         if not self.scenarios:
             return
-        scenario_indices = list(self.scenario_weights.keys())
-        weights = list(self.scenario_weights.values())
-        selected_index = random.choices(scenario_indices, weights=weights, k=1)[0]
-        scenario = self.scenarios[selected_index]
+        rng = rng or self._rng()
+        selected_index = rng.choices(
+            self._scenario_indices, cum_weights=self._cum_weights, k=1
+        )[0]
+        self._emit_scenario(self.scenarios[selected_index], rng)
+
+    def burst_generate(self, n: int) -> int:
+        """Generate ``n`` traces back to back on the calling thread.
+
+        Meant for load tests: scenarios for the whole burst are drawn in one
+        weighted ``choices`` call and traces are emitted without the usual
+        pause between them. Returns the number of traces generated.
+        """
+        if not self.scenarios or n <= 0:
+            return 0
+        rng = self._rng()
+        scenarios = self.scenarios
+        selected = rng.choices(
+            self._scenario_indices, cum_weights=self._cum_weights, k=n
+        )
+        for index in selected:
+            self._emit_scenario(scenarios[index], rng)
+        self.trace_count += n
+        return n
+
+    def _emit_scenario(self, scenario: Dict, rng: random.Random):
         root_span_def = scenario.get("root_span")
         if not root_span_def:
             return
-        scenario_context = {}
-        for key, val_template in scenario.get("vars", {}).items():
-            scenario_context[key] = self.resolver.resolve(
-                val_template, scenario_context
-            )
+        # Literal vars were settled at compile time; only templates resolve
+        scenario_context = dict(scenario["_literal_vars"])
+        for key, resolve in scenario["_dynamic_vars"]:
+            scenario_context[key] = resolve(scenario_context)
         self._process_span_definition(
-            root_span_def, scenario_context, parent_attributes={}
+            root_span_def, scenario_context, parent_attributes={}, rng=rng
         )
 
     def _process_span_definition(
-        self, span_def: Dict, scenario_context: Dict, parent_attributes: Dict
+        self,
+        span_def: Dict,
+        scenario_context: Dict,
+        parent_attributes: Dict,
+        rng: random.Random = None,
     ):
-        service_name = span_def.get("service")
-        tracer = self.tracers.get(service_name)
-        if not tracer:
-            logging.warning(f"No tracer found for service: {service_name}")
-            return
-        links, linked_context = [], {}
+        """Emit the span tree rooted at ``span_def``, depth first, without recursion.
+
+        The stack holds ``(span_def, parent_attributes)`` pairs still to start,
+        plus a ``None`` marker after each open span's children. Popping the
+        marker ends that span, so spans close in the same nested order (and
+        with the same current-span context) as nested ``with`` blocks would.
+        """
+        if "_attr_plan" not in span_def:
+            span_def = self._compile_span(span_def)
+        rng = rng or self._rng()
+        stack = [(span_def, parent_attributes)]
+        open_spans = []
+        try:
+            while stack:
+                item = stack.pop()
+                if item is None:
+                    open_spans.pop().__exit__(None, None, None)
+                    continue
+                started = self._start_span(*item, scenario_context, rng)
+                if started is None:
+                    continue
+                span_cm, resolved_attrs, children = started
+                if children:
+                    open_spans.append(span_cm)
+                    stack.append(None)
+                    stack.extend(
+                        (child, resolved_attrs) for child in reversed(children)
+                    )
+                else:
+                    span_cm.__exit__(None, None, None)
+        except BaseException:
+            exc_info = sys.exc_info()
+            while open_spans:
+                open_spans.pop().__exit__(*exc_info)
+            raise
+
+    def _start_span(
+        self,
+        span_def: Dict,
+        parent_attributes: Dict,
+        scenario_context: Dict,
+        rng: random.Random,
+    ):
+        """Start one span and do its own work, leaving it open for its children.
+
+        Returns ``(span_cm, resolved_attrs, children)``, where ``children`` are
+        the calls to make before ending the span (none after an error), or
+        None if an exception was suppressed while the span was open.
+        """
+        tracer = span_def["_tracer"]
+        links, linked_attributes = [], None
         if "link_from_context" in span_def:
-            with self.context_store_lock:
-                pattern = span_def["link_from_context"]
-                compiled_pattern = fnmatch.translate(pattern)
-                regex_pattern = re.compile(compiled_pattern)
-                matching_keys = [
-                    key for key, _ in self.context_store if regex_pattern.match(key)
-                ]
-                if matching_keys:
-                    key_to_link = random.choice(matching_keys)
-                    for i, (key, data) in enumerate(self.context_store):
-                        if key == key_to_link:
-                            _, (stored_span_context, stored_attributes) = (
-                                self.context_store[i]
-                            )
-                            links.append(Link(context=stored_span_context))
-                            linked_context = {
-                                "linked": {"attributes": stored_attributes}
-                            }
-                            logging.debug(f"Created link from '{key_to_link}'")
-                            break
-        current_context = {
-            "parent": {"attributes": parent_attributes},
-            **scenario_context,
-            **linked_context,
-        }
-        op_name = self.resolver.resolve(
-            span_def.get("operation", "Unknown Op"), current_context
-        )
-        export_key = ""
-        if "export_context_as" in span_def:
-            export_key = self.resolver.resolve(
-                span_def["export_context_as"], current_context
+            matches = self.context_store.matches(
+                span_def["link_from_context"], span_def.get("_link_re")
             )
+            if matches:
+                key_to_link, (stored_span_context, linked_attributes) = rng.choice(
+                    matches
+                )
+                links.append(Link(context=stored_span_context))
+                logging.debug(f"Created link from '{key_to_link}'")
+        # Scratch contexts only live until the events are resolved, so they
+        # come from (and go back to) this worker's dict pool.
+        pool = self._dict_pool
+        current_context = pool.acquire()
+        current_context["parent"] = {"attributes": parent_attributes}
+        current_context.update(scenario_context)
+        if linked_attributes is not None:
+            current_context["linked"] = {"attributes": linked_attributes}
+        op_name = span_def["_op_plan"](current_context)
+        export_key = ""
+        if "_export_plan" in span_def:
+            export_key = span_def["_export_plan"](current_context)
             current_context["context_key"] = export_key
         resolved_attrs = {
-            k: self.resolver.resolve(v, current_context)
-            for k, v in span_def.get("attributes", {}).items()
+            k: resolve(current_context) for k, resolve in span_def["_attr_plan"]
         }
-        resolved_attrs["service.name"] = service_name
-        span_kind_str = span_def.get("kind", "INTERNAL").upper()
-        span_kind = getattr(SpanKind, span_kind_str, SpanKind.INTERNAL)
-        with tracer.start_as_current_span(op_name, kind=span_kind, links=links) as span:
+        resolved_attrs["service.name"] = span_def["service"]
+        span_cm = tracer.start_as_current_span(
+            op_name, kind=span_def["_span_kind"], links=links
+        )
+        span = span_cm.__enter__()
+        try:
             span.set_attributes(resolved_attrs)
             if export_key:
-                with self.context_store_lock:
-                    self.context_store.append(
-                        (export_key, (span.get_span_context(), resolved_attrs))
-                    )
-                    logging.debug(f"Exported context as '{export_key}'")
-            event_context = {**current_context, **resolved_attrs}
-            for event_def in span_def.get("events", []):
-                event_name = self.resolver.resolve(
-                    event_def.get("name", "unnamed_event"), event_context
+                self.context_store.append(
+                    (export_key, (span.get_span_context(), resolved_attrs))
                 )
-                event_attrs = {
-                    k: self.resolver.resolve(v, event_context)
-                    for k, v in event_def.get("attributes", {}).items()
-                }
-                span.add_event(name=event_name, attributes=event_attrs)
-            delay_range = None
-            if "delay_ms" in span_def:
-                delay_ms_range = span_def["delay_ms"]
-                if delay_ms_range[0] > 0 or delay_ms_range[1] > 0:
-                    delay_range = [
-                        delay_ms_range[0] / 1000.0,
-                        delay_ms_range[1] / 1000.0,
-                    ]
-                    logging.debug(
-                        f"Using delay_ms: {delay_ms_range}ms -> {delay_range}s"
-                    )
-            elif "delay" in span_def:
-                delay_range = span_def["delay"]
-                logging.debug(f"Using legacy delay: {delay_range}s")
-            if delay_range and (delay_range[0] > 0 or delay_range[1] > 0):
-                sleep_duration = random.uniform(*delay_range)
-                time.sleep(sleep_duration)
+                logging.debug(f"Exported context as '{export_key}'")
+            if span_def["_event_plans"]:
+                event_context = pool.acquire()
+                event_context.update(current_context)
+                event_context.update(resolved_attrs)
+                for resolve_name, attr_plan in span_def["_event_plans"]:
+                    event_name = resolve_name(event_context)
+                    event_attrs = {
+                        k: resolve(event_context) for k, resolve in attr_plan
+                    }
+                    span.add_event(name=event_name, attributes=event_attrs)
+                pool.release(event_context)
+            pool.release(current_context)
+            delay_range = span_def["_delay_range_s"]
+            if delay_range:
+                time.sleep(rng.uniform(*delay_range))
             is_error = False
-            error_conditions = span_def.get("error_conditions", [])
-            if error_conditions:
-                for error_cond in error_conditions:
-                    probability_percent = error_cond.get("probability", 0)
-                    random_percent = random.randint(1, 100)
-                    if random_percent <= probability_percent:
-                        error_type = error_cond.get("type", "UnknownError")
-                        error_message = error_cond.get("message", "An error occurred")
+            error_thresholds = span_def["_err_cum"]
+            if error_thresholds:
+                roll = rng.random() * 100.0
+                for threshold, error_type, error_message in error_thresholds:
+                    if roll < threshold:
                         set_span_status_error(span, error_message, error_type)
                         is_error = True
                         logging.debug(
-                            f"Generated error ({probability_percent}% chance, rolled {random_percent}): {error_type} - {error_message}"
+                            f"Generated error (rolled {roll:.2f} < {threshold}): "
+                            f"{error_type} - {error_message}"
                         )
                         break
             if not is_error:
                 set_span_status_ok(span)
-            if not is_error:
-                for child_span_def in span_def.get("calls", []):
-                    self._process_span_definition(
-                        child_span_def,
-                        scenario_context,
-                        parent_attributes=resolved_attrs,
-                    )
+        except BaseException:
+            if not span_cm.__exit__(*sys.exc_info()):
+                raise
+            return None
+        return span_cm, resolved_attrs, () if is_error else span_def.get("calls")
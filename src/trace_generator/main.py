@@ -23,7 +23,7 @@ from trace_generator.engine import (
     shutdown_opentelemetry_providers,
     TraceGenerator,
 )
-from trace_generator.data import TraceDataService
+from trace_generator.data import get_trace_data_service
 from trace_generator.database import get_database
 from trace_generator.ui import TraceUI
 
@@ -153,7 +153,8 @@ def main():
     )
 
     # Initialize data service with the same database instance
-    trace_data_service = TraceDataService(database)
+    trace_data_service = get_trace_data_service(database)
+    trace_data_service.warmup()
 
     # Initialize UI
     trace_ui = TraceUI(
@@ -184,6 +185,7 @@ def main():
     # Setup cleanup
     def cleanup():
         trace_generator.stop()
+        trace_data_service.flush()
         shutdown_opentelemetry_providers()
         if hasattr(database, "disconnect"):
             database.disconnect()
@@ -7,16 +7,174 @@ context variables, and nested key resolution.
 
 import re
 import random
-import uuid
+import os
 import ast
 import time
 import logging
-from datetime import datetime, timezone
-from threading import Lock, get_ident
-from typing import Any, Dict, Set
+from functools import lru_cache
+from threading import local
+from typing import Any, Dict
 
 logger = logging.getLogger(__name__)
 
+# Compiled once and shared by every resolver instance
+TEMPLATE_RE = re.compile(r"\{\{([\w\.]+)\}\}")
+# One alternation finds every random/time placeholder in a single scan;
+# group 1 names the generator, group 2 holds its arguments, if any
+RANDOM_RE = re.compile(
+    r"\{\{(random\.int|random\.float|random\.choice|random\.uuid"
+    r"|random\.ipv4|random\.user_agent|time\.now|time\.iso)"
+    r"(?:\((.*?)\))?\}\}"
+)
+# Both placeholder shapes in one scan, used when compiling a Template
+_TOKEN_RE = re.compile(f"{RANDOM_RE.pattern}|{TEMPLATE_RE.pattern}")
+
+# Template op kinds
+_LITERAL, _RANDOM, _SHARED, _LAST_MATCH, _CONTEXT, _NESTED = range(6)
+# Argument-less placeholders draw one value per render: a string that repeats
+# {{random.uuid}} means the same id everywhere it appears
+_SHARED_PLACEHOLDERS = frozenset(
+    ("random.uuid", "random.ipv4", "random.user_agent", "time.now", "time.iso")
+)
+
+# Quoted items of a random.choice list, and the shape of a list made only of them
+_CHOICE_ITEM = re.compile(r"'([^'\\]*)'|\"([^\"\\]*)\"")
+_CHOICE_LIST = re.compile(r"\[\s*(?:(?:'[^'\\]*'|\"[^\"\\]*\")\s*(?:,\s*|(?=\])))*\]")
+
+_USER_AGENTS = (
+    "curl/7.68.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 16_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.1 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 10; SM-G975F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Mobile Safari/537.36",
+)
+
+# Each thread draws from its own generator so concurrent resolvers never
+# contend on the module-level random instance
+_thread_state = local()
+
+
+def _rng() -> random.Random:
+    """Return the calling thread's random generator, creating it on first use."""
+    rng = getattr(_thread_state, "rng", None)
+    if rng is None:
+        rng = _thread_state.rng = random.Random()
+    return rng
+
+
+def _random_uuid() -> str:
+    """Random version-4 UUID string, formatted straight from os.urandom."""
+    raw = bytearray(os.urandom(16))
+    raw[6] = (raw[6] & 0x0F) | 0x40  # version 4
+    raw[8] = (raw[8] & 0x3F) | 0x80  # RFC 4122 variant
+    digits = raw.hex()
+    return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+
+_last_iso_second = (None, "")
+
+
+def _iso_now() -> str:
+    """UTC isoformat() of the current time without building a datetime.
+
+    The date/time prefix only changes once a second, so it is cached and
+    only the microseconds are formatted per call.
+    """
+    global _last_iso_second
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    cached_second, prefix = _last_iso_second
+    if seconds != cached_second:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
+        # Replace the whole tuple so concurrent readers never see a torn entry
+        _last_iso_second = (seconds, prefix)
+    micros = nanos // 1000
+    if micros:
+        return f"{prefix}.{micros:06d}+00:00"
+    return f"{prefix}+00:00"
+
+
+@lru_cache(maxsize=4096)
+def _split_key_path(path: str) -> tuple:
+    """Precompute the greedy lookup candidates for a dotted key path.
+
+    Entry i lists (key, next_index) pairs for the segments starting at i,
+    longest key first, so a lookup never rebuilds the joined prefixes.
+    """
+    parts = path.split(".")
+    return tuple(
+        tuple((".".join(parts[start:end]), end) for end in range(len(parts), start, -1))
+        for start in range(len(parts))
+    )
+
+
+@lru_cache(maxsize=1024)
+def _parse_choices(args: str):
+    """Parse random.choice arguments once into a tuple of strings.
+
+    Plain lists of quoted strings are tokenized with a regex; anything else
+    (numbers, escapes) falls back to ast.literal_eval. Returns None when the
+    arguments are not a non-empty list.
+    """
+    args = args.strip()
+    if _CHOICE_LIST.fullmatch(args):
+        choices = [single or double for single, double in _CHOICE_ITEM.findall(args)]
+    else:
+        try:
+            choices = ast.literal_eval(args)
+        except (ValueError, SyntaxError):
+            logger.warning(f"Could not parse choices for random.choice: {args}")
+            return None
+        if not isinstance(choices, list):
+            return None
+        choices = [str(choice) for choice in choices]
+    return tuple(choices) or None
+
+
+class Template:
+    """
+    A template string parsed once into a tuple of (kind, payload) ops.
+
+    Rendering walks the ops and joins the pieces, so no regex work happens
+    per call. Compile with Template.compile() to share parsed templates.
+    """
+
+    __slots__ = ("source", "ops")
+
+    def __init__(self, source: str):
+        self.source = source
+        ops = []
+        position = 0
+        for match in _TOKEN_RE.finditer(source):
+            if match.start() > position:
+                ops.append((_LITERAL, source[position : match.start()]))
+            name, args, key = match.groups()
+            if name in _SHARED_PLACEHOLDERS and args is None:
+                ops.append((_SHARED, name))
+            elif name is not None:
+                ops.append((_RANDOM, (name, args, match.group(0))))
+            elif key == "last_match":
+                ops.append((_LAST_MATCH, None))
+            else:
+                ops.append((_CONTEXT, (key, match.group(0))))
+            position = match.end()
+        if position < len(source):
+            ops.append((_LITERAL, source[position:]))
+        self.ops = tuple(ops)
+
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def compile(cls, source: str) -> "Template":
+        """Return the parsed template for a source string, cached by source."""
+        return cls(source)
+
+    def render(self, context: Dict = None, resolver: "ValueResolver" = None) -> str:
+        """Render against a context using the given (or default) resolver."""
+        return (resolver or _DEFAULT_RESOLVER).resolve(self, context)
+
+    def __repr__(self):
+        return f"Template({self.source!r})"
+
 
 class ValueResolver:
     """
@@ -31,172 +189,195 @@ class ValueResolver:
     - User agents: {{random.user_agent}}
     """
 
+    MAX_TEMPLATE_ITERATIONS = 10
+    user_agents = _USER_AGENTS
+
     def __init__(self):
-        self.last_match_map = {}
-        self.last_match_lock = Lock()  # Thread safety for last_match_map
-        self.user_agents = [
-            "curl/7.68.0",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (iPhone; CPU iPhone OS 16_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.1 Mobile/15E148 Safari/604.1",
-            "Mozilla/5.0 (Linux; Android 10; SM-G975F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Mobile Safari/537.36",
-        ]
-
-        # Pre-compile regexes for performance
-        self.template_regex = re.compile(r"\{\{([\w\.]+)\}\}")
-        self.random_int_regex = re.compile(r"\{\{random\.int\((\d+),\s*(\d+)\)\}\}")
-        self.random_float_regex = re.compile(
-            r"\{\{random\.float\(([\d\.]+),\s*([\d\.]+)\)\}\}"
-        )
-        self.random_choice_regex = re.compile(r"\{\{random\.choice\((.*?)\)\}\}")
+        self._tls = local()  # Per-thread last_match, no locking needed
+        self.random_handlers = {
+            "random.int": self._random_int,
+            "random.float": self._random_float,
+            "random.choice": self._random_choice,
+            "random.uuid": _random_uuid,
+            "random.ipv4": self._random_ipv4,
+            "random.user_agent": lambda: _rng().choice(self.user_agents),
+            "time.now": lambda: str(int(time.time())),
+            "time.iso": _iso_now,
+        }
 
     def resolve(self, value: Any, context: Dict = None) -> Any:
         """
         Resolves template variables in a value.
 
         Args:
-            value: The value to resolve (only processes strings)
+            value: The value to resolve (strings and compiled Templates)
             context: Context dictionary for variable resolution
 
         Returns:
             Resolved value with templates replaced
         """
-        if not isinstance(value, str):
+        if isinstance(value, Template):
+            return self._render(value, context or {}, 0)
+        if not isinstance(value, str) or "{{" not in value:
+            # Plain strings are the common case; skip template processing entirely
             return value
 
-        iteration_count = 0
-        seen_values: Set[str] = set()
-        max_iterations = getattr(self, "MAX_TEMPLATE_ITERATIONS", 10)
-
-        while iteration_count < max_iterations:
-            if value in seen_values:
-                logger.warning(f"Circular reference detected in template: {value}")
-                break
-            seen_values.add(value)
+        return self._resolve_templates(value, context or {})
 
-            resolved_value = self._resolve_templates(value, context or {})
-            if resolved_value == value:
-                break
-            value = resolved_value
-            iteration_count += 1
-
-        if iteration_count >= max_iterations:
-            logger.warning(
-                f"Template resolution hit max iterations ({max_iterations}): {value}"
-            )
-
-        return value
+    def _resolve_templates(self, value: str, context: Dict, depth: int = 0) -> str:
+        """Compile (or fetch the cached compiled form of) a string and render it."""
+        if "{{" not in value:
+            return value
+        return self._render(Template.compile(value), context, depth)
 
-    def _resolve_templates(self, value: str, context: Dict) -> str:
+    def _render(self, template: Template, context: Dict, depth: int) -> str:
         """
-        Resolves templates in the correct order:
+        Renders a compiled template in the correct order:
         1. Random values first (to handle templates that resolve to random expressions)
         2. Special syntax (last_match)
         3. Context variables (nested key support)
+
+        Context values that are themselves templates are resolved recursively,
+        up to MAX_TEMPLATE_ITERATIONS levels deep. Argument-less placeholders
+        (uuid, ipv4, user_agent, time.now, time.iso) are drawn once per render,
+        however often they repeat.
         """
-        # CRITICAL: Process random values FIRST, then templates
-        # This ensures that if a template resolves to {{random.uuid}}, it gets processed
-        value = self._resolve_random_values(value)
-        value = self._resolve_special_syntax(value)
-
-        # Handle nested keys like 'parent.attributes.id'
-        for match in self.template_regex.finditer(value):
-            key_path = match.group(1).split(".")
-            original_template = match.group(0)
-
-            # Greedy traversal logic to handle keys with dots
-            current_level = context
-            remaining_path = key_path[:]
-
-            while remaining_path:
-                found_match = False
-                # Try to match the longest possible key first
-                for i in range(len(remaining_path), 0, -1):
-                    potential_key = ".".join(remaining_path[:i])
-                    if (
-                        isinstance(current_level, dict)
-                        and potential_key in current_level
-                    ):
-                        current_level = current_level[potential_key]
-                        remaining_path = remaining_path[i:]
-                        found_match = True
-                        break
-                if not found_match:
-                    current_level = None
+        parts = []
+        pending = []
+        shared = None
+        for op in template.ops:
+            kind, payload = op
+            if kind == _LITERAL:
+                parts.append(payload)
+                continue
+            if kind == _SHARED:
+                if shared is None:
+                    shared = {}
+                text = shared.get(payload)
+                if text is None:
+                    text = shared[payload] = self.random_handlers[payload]()
+                parts.append(text)
+                continue
+            if kind == _RANDOM:
+                text = self._random_value(*payload)
+                if "{{" not in text:
+                    parts.append(text)
+                    continue
+                # e.g. a random.choice item that is itself a template
+                op = (_NESTED, text)
+            pending.append(len(parts))
+            parts.append(op)
+
+        if pending:
+            # Filled after every random value is drawn, so {{last_match}}
+            # sees the last random.int in the string wherever it appears
+            last_match = str(getattr(self._tls, "last_match", ""))
+            for index in pending:
+                kind, payload = parts[index]
+                if kind == _LAST_MATCH:
+                    parts[index] = last_match
+                elif kind == _CONTEXT:
+                    parts[index] = self._context_value(*payload, context, depth)
+                else:
+                    parts[index] = self._resolve_nested(payload, context, depth)
+
+        return "".join(parts)
+
+    def _context_value(self, path: str, raw: str, context: Dict, depth: int) -> str:
+        """Look up a context placeholder, including nested keys like 'a.b.id'."""
+        current_level = self._lookup_key_path(context, path)
+        if current_level is None:
+            # Log warning for missing template keys to aid debugging
+            logger.warning(
+                f"Template key not found: '{raw}' - available context keys: {list(context.keys())}"
+            )
+            return raw
+        text = str(current_level)
+        if "{{" in text:
+            # The value is itself a template; resolve it in place
+            return self._resolve_nested(text, context, depth)
+        return text
+
+    def _resolve_nested(self, text: str, context: Dict, depth: int) -> str:
+        if depth + 1 >= self.MAX_TEMPLATE_ITERATIONS:
+            logger.warning(
+                f"Template resolution hit max iterations ({self.MAX_TEMPLATE_ITERATIONS}): {text}"
+            )
+            return text
+        return self._resolve_templates(text, context, depth + 1)
+
+    @staticmethod
+    def _lookup_key_path(context: Dict, path: str) -> Any:
+        """Greedily walk a dotted key path, preferring the longest matching key."""
+        current_level = context
+        candidates = _split_key_path(path)
+        position = 0
+
+        while position < len(candidates):
+            # Try to match the longest possible key first
+            for potential_key, next_position in candidates[position]:
+                if isinstance(current_level, dict) and potential_key in current_level:
+                    current_level = current_level[potential_key]
+                    position = next_position
                     break
-
-            if current_level is not None:
-                value = value.replace(original_template, str(current_level), 1)
             else:
-                # Log warning for missing template keys to aid debugging
-                logger.warning(
-                    f"Template key not found: '{original_template}' - available context keys: {list(context.keys())}"
-                )
-
-        return value
-
-    def _resolve_special_syntax(self, value: str) -> str:
-        """Resolves special template syntax like {{last_match}}"""
-        if "{{last_match}}" in value:
-            thread_id = get_ident()
-            with self.last_match_lock:  # Thread-safe access
-                last_val = self.last_match_map.get(thread_id, "")
-            value = value.replace("{{last_match}}", str(last_val))
-        return value
-
-    def _resolve_random_values(self, value: str) -> str:
-        """
-        Resolves all random value templates.
-        Processes in specific order to handle dependencies.
-        """
-        # Random integers with last_match tracking
-        for match in self.random_int_regex.finditer(value):
-            min_val, max_val = map(int, match.groups())
-            rand_val = str(random.randint(min_val, max_val))
-            thread_id = get_ident()
-            with self.last_match_lock:  # Thread-safe access
-                self.last_match_map[thread_id] = rand_val
-            value = value.replace(match.group(0), rand_val, 1)
-
-        # Random floats
-        for match in self.random_float_regex.finditer(value):
-            min_val, max_val = map(float, match.groups())
-            rand_val = f"{random.uniform(min_val, max_val):.2f}"
-            value = value.replace(match.group(0), rand_val, 1)
-
-        # Random choice from list
-        for match in self.random_choice_regex.finditer(value):
-            try:
-                choices = ast.literal_eval(match.group(1))
-                if isinstance(choices, list):
-                    value = value.replace(match.group(0), random.choice(choices), 1)
-            except (ValueError, SyntaxError):
-                logger.warning(
-                    f"Could not parse choices for random.choice: {match.group(1)}"
-                )
-
-        # Simple string replacements
-        replacements = {
-            "{{random.uuid}}": lambda: str(uuid.uuid4()),
-            "{{random.ipv4}}": lambda: f"{random.randint(1, 254)}.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}",
-            "{{random.user_agent}}": lambda: random.choice(self.user_agents),
-            "{{time.now}}": lambda: str(int(time.time())),
-            "{{time.iso}}": lambda: datetime.now(timezone.utc).isoformat(),
-        }
+                return None
 
-        for placeholder, generator in replacements.items():
-            if placeholder in value:
-                value = value.replace(placeholder, generator())
+        return current_level
 
-        return value
+    def _random_value(self, name: str, args: str, raw: str) -> str:
+        """Draw a random/time value; unparseable arguments keep the placeholder."""
+        handler = self.random_handlers[name]
+        try:
+            if args is None:
+                result = handler()
+            else:
+                result = handler(args)
+        except (TypeError, ValueError, SyntaxError):
+            # Wrong argument shape for this generator; keep the placeholder
+            result = None
+        return raw if result is None else result
+
+    def _random_int(self, args: str) -> str:
+        """Random integer with last_match tracking."""
+        min_val, max_val = map(int, args.split(","))
+        if min_val < 0 or max_val < 0:
+            return None
+        rand_val = str(_rng().randint(min_val, max_val))
+        self._tls.last_match = rand_val
+        return rand_val
+
+    def _random_float(self, args: str) -> str:
+        min_val, max_val = map(float, args.split(","))
+        if min_val < 0 or max_val < 0:
+            return None
+        return f"{_rng().uniform(min_val, max_val):.2f}"
+
+    def _random_ipv4(self) -> str:
+        # One 16-bit draw supplies both inner octets; the outer octets are
+        # drawn uniformly from 1-254 like the per-octet randint calls did
+        rng = _rng()
+        inner = rng.getrandbits(16)
+        return (
+            f"{rng.randrange(1, 255)}.{inner >> 8}.{inner & 0xFF}."
+            f"{rng.randrange(1, 255)}"
+        )
+
+    def _random_choice(self, args: str) -> str:
+        """Random choice from a list literal."""
+        choices = _parse_choices(args)
+        if choices is None:
+            return None
+        return _rng().choice(choices)
 
 
 # Backwards compatibility and convenience functions
+_DEFAULT_RESOLVER = ValueResolver()
+
+
 def resolve_value(value: Any, context: Dict = None) -> Any:
     """Convenience function for one-off value resolution"""
-    resolver = ValueResolver()
-    return resolver.resolve(value, context)
+    return _DEFAULT_RESOLVER.resolve(value, context)
 
 
 def create_resolver() -> ValueResolver:
@@ -206,4 +387,4 @@ def create_resolver() -> ValueResolver:
 
 def resolve_template(template, context):
     """Convenience function for template resolution, for test and API compatibility."""
-    return ValueResolver().resolve(template, context)
+    return _DEFAULT_RESOLVER.resolve(template, context)
@@ -2,16 +2,30 @@
 #                               UI COMPONENTS
 # =========================================================================
 # NiceGUI-based UI for controlling and monitoring the trace generator
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from nicegui import ui
 from trace_generator.config import Config
 from trace_generator.data import TraceDataService
+from trace_generator.database import is_ok_status
 
 logger = logging.getLogger(__name__)
 
 
+def _status_ok(trace: Dict) -> bool:
+    """Prefer the status the backend classified at ingest over re-parsing it."""
+    color = trace.get("status_color")
+    if color is not None:
+        return color == "positive"
+    return is_ok_status(trace.get("StatusCode"))
+
+
+# Shared by every page for blocking calls such as TraceGenerator.stop()
+_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="traceui")
+
+
 class TraceUI:
     """Handles all UI-related functionality"""
 
@@ -27,6 +41,11 @@ class TraceUI:
         self.status_label: Optional[ui.label] = None
         self.trace_table: Optional[ui.table] = None
         self.trace_cards_container: Optional[ui.column] = None
+        # Last values pushed to the clients, so unchanged refreshes send nothing
+        self._last_status_text: Optional[str] = None
+        self._last_trace_rows: Optional[List[Dict]] = None
+        # Cards currently in trace_cards_container, keyed by span, in display order
+        self._rendered_cards: Dict[str, ui.card] = {}
 
     async def update_status(self):
         if self.status_label:
@@ -36,7 +55,10 @@ class TraceUI:
                 f"Traces: {status['trace_count']} | "
                 f"Services: {status['services_configured']}"
             )
+            if status_text == self._last_status_text:
+                return
             self.status_label.text = status_text
+            self._last_status_text = status_text
 
     def create_main_page(self):
         ui.page_title("🔭 OTel Trace Generator Engine")
@@ -46,6 +68,7 @@ class TraceUI:
             with ui.row().classes("w-full items-center justify-between px-4"):
                 ui.label("🔭 Trace Generator").classes("text-xl font-bold")
                 self.status_label = ui.label("Loading...").classes("text-sm")
+                self._last_status_text = None
         with ui.column().classes("w-full max-w-6xl mx-auto p-4 gap-6"):
             self._create_control_panel()
             self._create_configuration_display()
@@ -93,17 +116,11 @@ class TraceUI:
 
     async def _maybe_async(self, func, *args, **kwargs):
         # Helper to await if func is async, else run in thread
-        import asyncio
-
         if asyncio.iscoroutinefunction(func):
             return await func(*args, **kwargs)
         else:
-            from concurrent.futures import ThreadPoolExecutor
-
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(
-                ThreadPoolExecutor(), lambda: func(*args, **kwargs)
-            )
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_EXECUTOR, lambda: func(*args, **kwargs))
 
     def _create_configuration_display(self):
         with ui.card().classes("w-full"):
@@ -140,33 +157,21 @@ class TraceUI:
                 self.trace_data_service.fetch_unique_traces
             )
             if self.trace_cards_container:
-                self.trace_cards_container.clear()
-                with self.trace_cards_container:
-                    if not traces:
-                        with ui.card().classes("w-full text-center p-8"):
-                            ui.icon("info", size="2rem", color="blue")
-                            ui.label(
-                                "No traces found. Is the generator running?"
-                            ).classes("text-lg mt-2")
-                    for trace in traces[: Config.CARD_DISPLAY_LIMIT]:
-                        self._create_trace_card(trace)
+                self._render_trace_cards(traces[: Config.CARD_DISPLAY_LIMIT])
 
-            if self.trace_table:
-                self.trace_table.rows = traces
-                self.trace_table.update()
+            # Skip the table diffs entirely when the rows haven't changed
+            if traces != self._last_trace_rows:
+                if self.trace_table:
+                    self.trace_table.rows = traces
+                    self.trace_table.update()
 
-            # Update the span context table as well
-            if hasattr(self, "span_context_table") and self.span_context_table:
-                self.span_context_table.rows = traces
-                self.span_context_table.update()
+                # Update the span context table as well
+                if hasattr(self, "span_context_table") and self.span_context_table:
+                    self.span_context_table.rows = traces
+                    self.span_context_table.update()
+                self._last_trace_rows = traces
 
-            error_count = len(
-                [
-                    t
-                    for t in traces
-                    if t.get("StatusCode", "").upper() not in ["OK", "STATUS_CODE_OK"]
-                ]
-            )
+            error_count = sum(1 for t in traces if not _status_ok(t))
             ui.notify(
                 f"Loaded {len(traces)} traces ({error_count} errors)",
                 type="positive",
@@ -176,13 +181,57 @@ class TraceUI:
             logger.error(f"Error fetching traces: {e}")
             ui.notify(f"Error fetching traces: {e}", type="negative")
 
+    def _render_trace_cards(self, traces):
+        """Diff the card list against what is shown, touching only changed cards.
+
+        Spans never change once stored, so a card is reused as-is while its
+        span stays in the list; only new spans get cards and only cards out
+        of place are moved.
+        """
+        container = self.trace_cards_container
+        shown = {}
+        for trace in traces:
+            shown.setdefault(trace.get("SpanId") or trace.get("ShortSpanId"), trace)
+
+        if not shown or not self._rendered_cards:
+            # Drop the placeholder card (or the cards) and start over
+            container.clear()
+            self._rendered_cards = {}
+        if not shown:
+            with container:
+                with ui.card().classes("w-full text-center p-8"):
+                    ui.icon("info", size="2rem", color="blue")
+                    ui.label("No traces found. Is the generator running?").classes(
+                        "text-lg mt-2"
+                    )
+            return
+
+        order = []
+        for key, card in list(self._rendered_cards.items()):
+            if key in shown:
+                order.append(key)
+            else:
+                container.remove(card)
+                del self._rendered_cards[key]
+        for key, trace in shown.items():
+            if key not in self._rendered_cards:
+                with container:
+                    self._rendered_cards[key] = self._create_trace_card(trace)
+                order.append(key)
+
+        for index, key in enumerate(shown):
+            if order[index] != key:
+                self._rendered_cards[key].move(container, target_index=index)
+                order.remove(key)
+                order.insert(index, key)
+        self._rendered_cards = {key: self._rendered_cards[key] for key in shown}
+
     def _create_trace_card(self, trace):
-        status_code = str(trace.get("StatusCode", "")).upper()
-        is_success = status_code in ("OK", "STATUS_CODE_OK")
+        is_success = _status_ok(trace)
         card_class = "w-full mb-2 border-l-4 " + (
             "border-green-500" if is_success else "border-red-500"
         )
-        with ui.card().classes(card_class):
+        with ui.card().classes(card_class) as card:
             with ui.row().classes("w-full items-center justify-between"):
                 with ui.column().classes("flex-grow"):
                     with ui.row().classes("items-center gap-2"):
@@ -217,6 +266,7 @@ class TraceUI:
                     ui.label(trace.get("DurationMs", "N/A")).classes(
                         "text-xs text-gray-500"
                     )
+        return card
 
     def _create_trace_viewer(self):
         with ui.card().classes("w-full"):
@@ -238,6 +288,7 @@ class TraceUI:
                 .classes("w-full gap-2")
                 .bind_visibility_from(view_toggle, "value", value="cards")
             )
+            self._rendered_cards = {}
             with self.trace_cards_container:
                 with ui.card().classes("w-full text-center p-8"):
                     ui.icon("info", size="2rem", color="blue")
@@ -289,6 +340,8 @@ class TraceUI:
                     "align": "right",
                 },
             ]
+            # Fresh tables start empty, so the next fetch must fill them
+            self._last_trace_rows = None
             self.trace_table = (
                 ui.table(columns=table_columns, rows=[], row_key="SpanId")
                 .classes("w-full")
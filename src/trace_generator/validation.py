@@ -2,12 +2,56 @@
 """YAML schema validation for trace generator scenarios."""
 
 from typing import Dict, List
+import hashlib
+import json
 import logging
+import mmap
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 import yaml
 
+try:
+    # libyaml's C parser is an order of magnitude faster than the pure-Python one
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlLoader
+
 logger = logging.getLogger(__name__)
 
+# Sentinel for "key absent", so each field costs a single dict lookup
+_MISSING = object()
+_NUMBER = (int, float)
+
+# Upper bound on threads reading scenario files concurrently
+MAX_LOAD_WORKERS = 8
+# Below this size a plain read beats the cost of setting up a mapping
+MMAP_MIN_BYTES = 4096
+
+
+def _load_yaml_file(path: str, size: int = 0):
+    """Parse a YAML file, mapping it into memory when it is large enough."""
+    with open(path, "rb") as f:
+        if size < MMAP_MIN_BYTES:
+            return yaml.load(f, Loader=_YamlLoader)
+        # The parser reads straight from the page cache through the mapping
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return yaml.load(mapped, Loader=_YamlLoader)
+
+
+class SchemaValidationError(ValueError):
+    """Raised by fail-fast validation on the first schema error found."""
+
+
+def _format_span_path(path) -> str:
+    """Expand a (parent_path, index) chain into "root.calls[i].calls[j]"."""
+    parts = []
+    while isinstance(path, tuple):
+        path, index = path
+        parts.append(f".calls[{index}]")
+    parts.append(path)
+    return "".join(reversed(parts))
+
 
 class SchemaValidator:
     """Validates scenarios YAML structure with updated probability and duration formats"""
@@ -16,43 +60,58 @@ class SchemaValidator:
     SUPPORTED_SCHEMA_VERSIONS = [1]
     CURRENT_SCHEMA_VERSION = 1
 
+    # Merged directory contents, reused while no scenario file has changed.
+    # Kept under the user cache dir: scenario directories may be read-only.
+    CACHE_DIRNAME = "trace-generator"
+
     @staticmethod
-    def validate_scenarios_config(config: Dict) -> List[str]:
-        """Validates the scenarios configuration and returns list of errors"""
+    def validate_scenarios_config(config: Dict, fail_fast: bool = False) -> List[str]:
+        """Validates the scenarios configuration and returns list of errors
+
+        With fail_fast=True, raises SchemaValidationError on the first error
+        instead, skipping the rest of the config.
+        """
+        # One list collects every error; the helpers append to it in place
         errors = []
 
         # Validate schema version first
-        schema_errors = SchemaValidator._validate_schema_version(config)
-        errors.extend(schema_errors)
+        SchemaValidator._validate_schema_version(config, errors)
+        if fail_fast and errors:
+            raise SchemaValidationError(errors[0])
 
-        if "services" not in config:
+        services = config.get("services", _MISSING)
+        if services is _MISSING:
             errors.append("Missing required 'services' key")
-        elif not isinstance(config["services"], list) or not config["services"]:
+        elif not isinstance(services, list) or not services:
             errors.append("'services' must be a non-empty list")
 
-        if "scenarios" not in config:
+        scenarios = config.get("scenarios", _MISSING)
+        if scenarios is _MISSING:
             errors.append("Missing required 'scenarios' key")
-        elif not isinstance(config["scenarios"], list) or not config["scenarios"]:
+            scenarios = []
+        elif not isinstance(scenarios, list) or not scenarios:
             errors.append("'scenarios' must be a non-empty list")
+        if fail_fast and errors:
+            raise SchemaValidationError(errors[0])
 
-        for i, scenario in enumerate(config.get("scenarios", [])):
-            scenario_errors = SchemaValidator._validate_scenario(scenario, i)
-            errors.extend(scenario_errors)
+        for i, scenario in enumerate(scenarios):
+            SchemaValidator._validate_scenario(scenario, i, errors, fail_fast)
 
         return errors
 
     @staticmethod
-    def _validate_schema_version(config: Dict) -> List[str]:
+    def _validate_schema_version(config: Dict, errors: List[str] = None) -> List[str]:
         """Validates the schema version for future compatibility"""
-        errors = []
+        if errors is None:
+            errors = []
 
-        if "schema_version" not in config:
+        version = config.get("schema_version", _MISSING)
+        if version is _MISSING:
             errors.append(
                 "Missing required 'schema_version' field. Current version is 1."
             )
             return errors
 
-        version = config["schema_version"]
         if not isinstance(version, int):
             errors.append("'schema_version' must be an integer")
             return errors
@@ -75,109 +134,154 @@ class SchemaValidator:
         return errors
 
     @staticmethod
-    def _validate_scenario(scenario: Dict, index: int) -> List[str]:
+    def _validate_scenario(
+        scenario: Dict, index: int, errors: List[str] = None, fail_fast: bool = False
+    ) -> List[str]:
         """Validates a single scenario"""
-        errors = []
+        if errors is None:
+            errors = []
         prefix = f"scenarios[{index}]"
 
+        if not isinstance(scenario, dict):
+            # Nothing to look up; report every required field as missing
+            scenario = {}
+        get = scenario.get
         if "name" not in scenario:
             errors.append(f"{prefix}: Missing required 'name' field")
-        if "root_span" not in scenario:
+        root_span = get("root_span", _MISSING)
+        if root_span is _MISSING:
             errors.append(f"{prefix}: Missing required 'root_span' field")
 
-        if "weight" in scenario and not isinstance(scenario["weight"], (int, float)):
+        weight = get("weight", _MISSING)
+        if weight is not _MISSING and not isinstance(weight, _NUMBER):
             errors.append(f"{prefix}: 'weight' must be a number")
+        if fail_fast and errors:
+            raise SchemaValidationError(errors[0])
 
-        if "root_span" in scenario:
-            span_errors = SchemaValidator._validate_span_definition(
-                scenario["root_span"], f"{prefix}.root_span"
+        if root_span is not _MISSING:
+            SchemaValidator._validate_span_definition(
+                root_span, f"{prefix}.root_span", errors, fail_fast
             )
-            errors.extend(span_errors)
 
         return errors
 
     @staticmethod
-    def _validate_span_definition(span_def: Dict, path: str) -> List[str]:
-        """Validates a span definition recursively with updated formats"""
-        errors = []
-
-        if "service" not in span_def:
-            errors.append(f"{path}: Missing required 'service' field")
-
-        if "delay_ms" in span_def:
-            delay = span_def["delay_ms"]
-            if not isinstance(delay, list) or len(delay) != 2:
-                errors.append(
-                    f"{path}: 'delay_ms' must be a list of two numbers [min_ms, max_ms]"
-                )
-            elif not all(isinstance(x, (int, float)) for x in delay):
-                errors.append(
-                    f"{path}: 'delay_ms' values must be numbers (milliseconds)"
-                )
-            elif any(x < 0 for x in delay):
-                errors.append(f"{path}: 'delay_ms' values must be non-negative")
-
-        # Support legacy 'delay' field for backward compatibility
-        if "delay" in span_def:
-            delay = span_def["delay"]
-            if not isinstance(delay, list) or len(delay) != 2:
-                errors.append(
-                    f"{path}: 'delay' must be a list of two numbers [min_seconds, max_seconds]"
-                )
-            elif not all(isinstance(x, (int, float)) for x in delay):
-                errors.append(f"{path}: 'delay' values must be numbers (seconds)")
-
-        if "error_conditions" in span_def:
-            for i, error_cond in enumerate(span_def["error_conditions"]):
-                if not isinstance(error_cond, dict):
-                    errors.append(f"{path}.error_conditions[{i}]: Must be a dictionary")
-                    continue
-                if "type" not in error_cond:
+    def _validate_span_definition(
+        span_def: Dict, path: str, errors: List[str] = None, fail_fast: bool = False
+    ) -> List[str]:
+        """Validates a span definition and its nested calls with updated formats"""
+        if errors is None:
+            errors = []
+        # Explicit depth-first stack instead of recursion; children are pushed
+        # in reverse so errors come out in the same pre-order as before.
+        # Child paths stay as (parent_path, index) pairs and are only turned
+        # into strings when a node actually has errors.
+        stack = [(span_def, path)]
+
+        while stack:
+            node, node_path = stack.pop()
+            first_error = len(errors)
+            if not isinstance(node, dict):
+                node = {}
+            get = node.get
+
+            if "service" not in node:
+                errors.append(": Missing required 'service' field")
+
+            delay = get("delay_ms", _MISSING)
+            if delay is not _MISSING:
+                if not isinstance(delay, list) or len(delay) != 2:
                     errors.append(
-                        f"{path}.error_conditions[{i}]: Missing required 'type' field"
+                        ": 'delay_ms' must be a list of two numbers [min_ms, max_ms]"
                     )
-                if "message" not in error_cond:
+                elif not all(isinstance(x, _NUMBER) for x in delay):
+                    errors.append(": 'delay_ms' values must be numbers (milliseconds)")
+                elif any(x < 0 for x in delay):
+                    errors.append(": 'delay_ms' values must be non-negative")
+
+            # Support legacy 'delay' field for backward compatibility
+            delay = get("delay", _MISSING)
+            if delay is not _MISSING:
+                if not isinstance(delay, list) or len(delay) != 2:
                     errors.append(
-                        f"{path}.error_conditions[{i}]: Missing required 'message' field"
+                        ": 'delay' must be a list of two numbers [min_seconds, max_seconds]"
                     )
-                if "probability" in error_cond:
-                    prob = error_cond["probability"]
-                    if not isinstance(prob, (int, float)):
+                elif not all(isinstance(x, _NUMBER) for x in delay):
+                    errors.append(": 'delay' values must be numbers (seconds)")
+
+            error_conditions = get("error_conditions", _MISSING)
+            if error_conditions is not _MISSING:
+                for i, error_cond in enumerate(error_conditions):
+                    if not isinstance(error_cond, dict):
+                        errors.append(f".error_conditions[{i}]: Must be a dictionary")
+                        continue
+                    if "type" not in error_cond:
                         errors.append(
-                            f"{path}.error_conditions[{i}]: 'probability' must be a number"
+                            f".error_conditions[{i}]: Missing required 'type' field"
                         )
-                    elif not (0 <= prob <= 100):
+                    if "message" not in error_cond:
                         errors.append(
-                            f"{path}.error_conditions[{i}]: 'probability' must be between 0 and 100 (percentage)"
+                            f".error_conditions[{i}]: Missing required 'message' field"
                         )
-
-        if "calls" in span_def:
-            for i, call in enumerate(span_def["calls"]):
-                call_errors = SchemaValidator._validate_span_definition(
-                    call, f"{path}.calls[{i}]"
-                )
-                errors.extend(call_errors)
+                    prob = error_cond.get("probability", _MISSING)
+                    if prob is not _MISSING:
+                        if not isinstance(prob, _NUMBER):
+                            errors.append(
+                                f".error_conditions[{i}]: 'probability' must be a number"
+                            )
+                        elif not (0 <= prob <= 100):
+                            errors.append(
+                                f".error_conditions[{i}]: 'probability' must be between 0 and 100 (percentage)"
+                            )
+
+            calls = get("calls", _MISSING)
+            if calls is not _MISSING:
+                for i, call in reversed(list(enumerate(calls))):
+                    stack.append((call, (node_path, i)))
+
+            if len(errors) > first_error:
+                prefix = _format_span_path(node_path)
+                errors[first_error:] = [
+                    prefix + suffix for suffix in errors[first_error:]
+                ]
+                if fail_fast:
+                    raise SchemaValidationError(errors[first_error])
 
         return errors
 
     @staticmethod
     def load_scenarios_from_directory(scenarios_dir: str) -> Dict:
         """Load scenarios from a directory containing individual scenario files"""
-        if not os.path.exists(scenarios_dir):
+        # One readdir pass; DirEntry.is_file() needs no extra stat on most systems
+        try:
+            with os.scandir(scenarios_dir) as it:
+                yaml_entries = [
+                    entry
+                    for entry in it
+                    if entry.name.endswith(".yaml") and entry.is_file()
+                ]
+        except FileNotFoundError:
             raise FileNotFoundError(f"Scenarios directory not found: {scenarios_dir}")
-
-        if not os.path.isdir(scenarios_dir):
+        except NotADirectoryError:
             raise ValueError(f"Path is not a directory: {scenarios_dir}")
 
         # Load base configuration
         base_config_path = os.path.join(scenarios_dir, "_base.yaml")
-        if not os.path.exists(base_config_path):
+        if not any(entry.name == "_base.yaml" for entry in yaml_entries):
             raise FileNotFoundError(
                 f"Base configuration file not found: {base_config_path}"
             )
 
-        with open(base_config_path, "r") as f:
-            merged_config = yaml.safe_load(f)
+        cache_path = SchemaValidator._scenario_cache_path(scenarios_dir)
+        cache_key = SchemaValidator._scenario_cache_key(yaml_entries)
+        cached_config = SchemaValidator._read_scenario_cache(cache_path, cache_key)
+        if cached_config is not None:
+            logger.info(
+                f"Loaded {len(cached_config['scenarios'])} scenarios from cache {cache_path}"
+            )
+            return cached_config
+
+        merged_config = _load_yaml_file(base_config_path)
 
         if not merged_config:
             merged_config = {}
@@ -185,44 +289,53 @@ class SchemaValidator:
         # Initialize scenarios list
         merged_config["scenarios"] = []
 
-        # Load all scenario files (excluding _base.yaml)
-        scenario_files = []
-        for filename in os.listdir(scenarios_dir):
-            if filename.endswith(".yaml") and filename != "_base.yaml":
-                scenario_files.append(filename)
-
-        # Sort to ensure consistent loading order
-        scenario_files.sort()
+        # Load all scenario files (excluding _base.yaml), sorted to ensure
+        # consistent loading order
+        scenario_files = sorted(
+            (entry for entry in yaml_entries if entry.name != "_base.yaml"),
+            key=lambda entry: entry.name,
+        )
 
         logger.info(f"Found {len(scenario_files)} scenario files to load")
 
-        for filename in scenario_files:
-            file_path = os.path.join(scenarios_dir, filename)
-            try:
-                with open(file_path, "r") as f:
-                    scenario_data = yaml.safe_load(f)
-
-                if not scenario_data:
-                    logger.warning(f"Empty scenario file: {filename}")
-                    continue
-
-                # Validate that this is a list of scenarios
-                if isinstance(scenario_data, list):
-                    merged_config["scenarios"].extend(scenario_data)
-                    logger.info(
-                        f"Loaded {len(scenario_data)} scenario(s) from {filename}"
-                    )
-                else:
-                    logger.error(
-                        f"Invalid scenario file format in {filename}: expected list, got {type(scenario_data)}"
-                    )
+        # Read and parse files concurrently, but merge them in sorted order
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(MAX_LOAD_WORKERS, len(scenario_files)))
+        ) as executor:
+            pending = [
+                (
+                    entry.name,
+                    executor.submit(_load_yaml_file, entry.path, entry.stat().st_size),
+                )
+                for entry in scenario_files
+            ]
+            for filename, future in pending:
+                try:
+                    scenario_data = future.result()
+
+                    if not scenario_data:
+                        logger.warning(f"Empty scenario file: {filename}")
+                        continue
+
+                    # Validate that this is a list of scenarios
+                    if isinstance(scenario_data, list):
+                        merged_config["scenarios"].extend(scenario_data)
+                        logger.info(
+                            f"Loaded {len(scenario_data)} scenario(s) from {filename}"
+                        )
+                    else:
+                        logger.error(
+                            f"Invalid scenario file format in {filename}: expected list, got {type(scenario_data)}"
+                        )
 
-            except yaml.YAMLError as e:
-                logger.error(f"YAML error in {filename}: {e}")
-                raise
-            except Exception as e:
-                logger.error(f"Error loading {filename}: {e}")
-                raise
+                except yaml.YAMLError as e:
+                    logger.error(f"YAML error in {filename}: {e}")
+                    executor.shutdown(cancel_futures=True)
+                    raise
+                except Exception as e:
+                    logger.error(f"Error loading {filename}: {e}")
+                    executor.shutdown(cancel_futures=True)
+                    raise
 
         if not merged_config["scenarios"]:
             raise ValueError("No scenarios found in any scenario files")
@@ -230,4 +343,51 @@ class SchemaValidator:
         logger.info(
             f"Successfully loaded {len(merged_config['scenarios'])} total scenarios from directory"
         )
+        SchemaValidator._write_scenario_cache(cache_path, cache_key, merged_config)
         return merged_config
+
+    @staticmethod
+    def _scenario_cache_path(scenarios_dir: str) -> str:
+        """Cache file for a scenarios directory, named after its absolute path."""
+        base = os.environ.get("XDG_CACHE_HOME") or tempfile.gettempdir()
+        digest = hashlib.sha256(os.path.abspath(scenarios_dir).encode()).hexdigest()
+        return os.path.join(
+            base, SchemaValidator.CACHE_DIRNAME, f"scenarios-{digest[:16]}.json"
+        )
+
+    @staticmethod
+    def _scenario_cache_key(entries) -> List:
+        """Name, mtime and size of every YAML file; any edit changes the key."""
+        key = []
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            stat = entry.stat()
+            key.append([entry.name, stat.st_mtime_ns, stat.st_size])
+        return key
+
+    @staticmethod
+    def _read_scenario_cache(cache_path: str, cache_key: List):
+        """Return the cached merged config if it matches cache_key, else None."""
+        try:
+            with open(cache_path, "rb") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(cached, dict) or cached.get("key") != cache_key:
+            return None
+        return cached.get("config")
+
+    @staticmethod
+    def _write_scenario_cache(cache_path: str, cache_key: List, config: Dict) -> None:
+        """Best-effort cache write; read-only or unusual configs are just skipped."""
+        try:
+            payload = json.dumps({"key": cache_key, "config": config})
+            # YAML can produce values JSON can't round-trip (dates, int keys)
+            if json.loads(payload)["config"] != config:
+                return
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(payload)
+            os.replace(tmp_path, cache_path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.debug(f"Not caching scenarios at {cache_path}: {e}")
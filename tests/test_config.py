@@ -1,9 +1,4 @@
-import sys
-import os
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
-
-import importlib
+import pytest
 
 from trace_generator import config
 
@@ -11,35 +6,35 @@ from trace_generator import config
 class TestConfig:
     def test_otlp_endpoint_default(self, monkeypatch):
         monkeypatch.delenv("OTEL_EXPORTER_OTLP_ENDPOINT", raising=False)
-        importlib.reload(config)
+        config.Config.refresh()
         assert config.Config.OTLP_ENDPOINT == "http://otel-collector:4317"
 
     def test_scenarios_path_env_override(self, monkeypatch):
         monkeypatch.setenv("SCENARIOS_PATH", "custom_scenarios/")
-        importlib.reload(config)
+        config.Config.refresh()
         assert config.Config.SCENARIOS_PATH == "custom_scenarios/"
         monkeypatch.delenv("SCENARIOS_PATH", raising=False)
-        importlib.reload(config)
+        config.Config.refresh()
 
     def test_trace_interval_min_max(self, monkeypatch):
         monkeypatch.setenv("TRACE_INTERVAL_MIN", "1.5")
         monkeypatch.setenv("TRACE_INTERVAL_MAX", "3.5")
-        importlib.reload(config)
+        config.Config.refresh()
         assert config.Config.TRACE_INTERVAL_MIN == 1.5
         assert config.Config.TRACE_INTERVAL_MAX == 3.5
         monkeypatch.delenv("TRACE_INTERVAL_MIN", raising=False)
         monkeypatch.delenv("TRACE_INTERVAL_MAX", raising=False)
-        importlib.reload(config)
+        config.Config.refresh()
 
     def test_database_type_detection(self, monkeypatch):
         monkeypatch.setenv("DATABASE_TYPE", "clickhouse")
-        importlib.reload(config)
+        config.Config.refresh()
         assert config.Config._detect_database_type() == "clickhouse"
         monkeypatch.setenv("DATABASE_TYPE", "inmemory")
-        importlib.reload(config)
+        config.Config.refresh()
         assert config.Config._detect_database_type() == "inmemory"
         monkeypatch.delenv("DATABASE_TYPE", raising=False)
-        importlib.reload(config)
+        config.Config.refresh()
 
     def test_get_database_config_keys(self):
         db_cfg = config.Config.get_database_config()
@@ -54,6 +49,12 @@ class TestConfig:
         ]:
             assert key in db_cfg
 
+    def test_get_database_config_is_shared_and_read_only(self):
+        db_cfg = config.Config.get_database_config()
+        assert db_cfg is config.Config.get_database_config()
+        with pytest.raises(TypeError):
+            db_cfg["host"] = "elsewhere"
+
     def test_print_config_runs(self, caplog):
         caplog.set_level("INFO")
         config.Config.print_config()
@@ -61,13 +62,13 @@ class TestConfig:
 
     def test_inmemory_max_traces_default(self, monkeypatch):
         monkeypatch.delenv("INMEMORY_MAX_TRACES", raising=False)
-        importlib.reload(config)
+        config.Config.refresh()
         assert config.Config.INMEMORY_MAX_TRACES == 100
 
     def test_server_port_and_host_defaults(self, monkeypatch):
         monkeypatch.delenv("SERVER_HOST", raising=False)
         monkeypatch.delenv("SERVER_PORT", raising=False)
-        importlib.reload(config)
+        config.Config.refresh()
         assert config.Config.SERVER_HOST == "0.0.0.0"
         assert config.Config.SERVER_PORT == 8000
 
@@ -75,7 +76,76 @@ class TestConfig:
         monkeypatch.delenv("TRACE_FETCH_LIMIT", raising=False)
         monkeypatch.delenv("CARD_DISPLAY_LIMIT", raising=False)
         monkeypatch.delenv("STATUS_UPDATE_INTERVAL", raising=False)
-        importlib.reload(config)
+        config.Config.refresh()
         assert config.Config.TRACE_FETCH_LIMIT == 30
         assert config.Config.CARD_DISPLAY_LIMIT == 10
         assert config.Config.STATUS_UPDATE_INTERVAL == 2.0
+
+    def test_database_settings_resolved_once(self, monkeypatch):
+        monkeypatch.delenv("DATABASE_TYPE", raising=False)
+        monkeypatch.setenv("DATABASE_HOST", "ch.example")
+        monkeypatch.setenv("DATABASE_PORT", "9000")
+        config.Config.refresh()
+        db = config.Config.DATABASE
+        assert isinstance(db, config.DatabaseSettings)
+        assert (db.type, db.host, db.port) == ("clickhouse", "ch.example", 9000)
+        assert config.Config.get_database_config()["host"] == "ch.example"
+        monkeypatch.delenv("DATABASE_HOST", raising=False)
+        monkeypatch.delenv("DATABASE_PORT", raising=False)
+        config.Config.refresh()
+
+    def test_invalid_numeric_env_names_variable(self, monkeypatch):
+        monkeypatch.setenv("SERVER_PORT", "eighty")
+        with pytest.raises(ValueError, match="SERVER_PORT"):
+            config.Config.refresh()
+        monkeypatch.setenv("SERVER_PORT", "8000")
+        monkeypatch.setenv("INMEMORY_MAX_TRACES", "0")
+        with pytest.raises(ValueError, match="INMEMORY_MAX_TRACES"):
+            config.Config.refresh()
+        monkeypatch.delenv("SERVER_PORT", raising=False)
+        monkeypatch.delenv("INMEMORY_MAX_TRACES", raising=False)
+        config.Config.refresh()
+
+    def test_empty_numeric_env_uses_default(self, monkeypatch):
+        monkeypatch.setenv("DATABASE_PORT", "")
+        monkeypatch.setenv("CLICKHOUSE_PORT", "9440")
+        monkeypatch.setenv("TRACE_FETCH_LIMIT", "")
+        config.Config.refresh()
+        assert config.Config.DATABASE_PORT == 9440
+        assert config.Config.TRACE_FETCH_LIMIT == 30
+        monkeypatch.delenv("DATABASE_PORT", raising=False)
+        monkeypatch.delenv("CLICKHOUSE_PORT", raising=False)
+        monkeypatch.delenv("TRACE_FETCH_LIMIT", raising=False)
+        config.Config.refresh()
+
+    def test_refresh_updates_class_in_place(self, monkeypatch):
+        cls = config.Config
+        monkeypatch.setenv("SERVER_PORT", "9001")
+        config.Config.refresh()
+        assert config.Config is cls
+        assert cls.SERVER_PORT == 9001
+        # A bad value leaves every setting as it was
+        monkeypatch.setenv("SERVER_HOST", "example.host")
+        monkeypatch.setenv("TRACE_FETCH_LIMIT", "0")
+        with pytest.raises(ValueError, match="TRACE_FETCH_LIMIT"):
+            config.Config.refresh()
+        assert cls.SERVER_HOST == "0.0.0.0"
+        monkeypatch.delenv("SERVER_PORT", raising=False)
+        monkeypatch.delenv("SERVER_HOST", raising=False)
+        monkeypatch.delenv("TRACE_FETCH_LIMIT", raising=False)
+        config.Config.refresh()
+
+    def test_database_cache_settings(self, monkeypatch):
+        monkeypatch.setenv("DATABASE_CACHE_TTL", "0.5")
+        monkeypatch.setenv("DATABASE_LATEST_VIEW", "Yes")
+        config.Config.refresh()
+        assert config.Config.DATABASE_CACHE_TTL == 0.5
+        assert config.Config.DATABASE_LATEST_VIEW is True
+        monkeypatch.setenv("DATABASE_CACHE_TTL", "-1")
+        with pytest.raises(ValueError, match="DATABASE_CACHE_TTL"):
+            config.Config.refresh()
+        monkeypatch.delenv("DATABASE_CACHE_TTL", raising=False)
+        monkeypatch.delenv("DATABASE_LATEST_VIEW", raising=False)
+        config.Config.refresh()
+        assert config.Config.DATABASE_CACHE_TTL == 3.0
+        assert config.Config.DATABASE_LATEST_VIEW is False
@@ -1,9 +1,7 @@
-import sys
-import os
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+import time
 
 from trace_generator import data
+from trace_generator.database import DatabaseInterface
 
 
 class DummyDB:
@@ -44,6 +42,81 @@ class TestTraceDataService:
         names = ds.get_service_names()
         assert names == ["svc"]
 
+    def test_get_service_names_cached(self):
+        class CountingDB(DummyDB):
+            calls = 0
+
+            def get_service_names(self):
+                CountingDB.calls += 1
+                return ["svc"]
+
+        ds = data.TraceDataService(CountingDB())
+        assert ds.get_service_names() == ["svc"]
+        assert ds.get_service_names() == ["svc"]
+        assert CountingDB.calls == 1
+
+        ds._service_names_cache.ttl = 0
+        ds._service_names_cache.put(None, ["stale"])
+        assert ds.get_service_names() == ["svc"]
+        assert CountingDB.calls == 2
+
+    def test_warmup_primes_service_names(self):
+        class WarmDB(DummyDB):
+            connected = False
+
+            def connect(self):
+                self.connected = True
+                return True
+
+        db = WarmDB()
+        ds = data.TraceDataService(db)
+        ds.warmup()
+        assert db.connected
+        assert ds._service_names_cache.get(None) == ["svc"]
+
+    def test_warmup_tolerates_backend_errors(self, caplog):
+        ds = data.TraceDataService(DummyDB())  # no connect() method
+        with caplog.at_level("WARNING"):
+            ds.warmup()
+        assert "Database warmup failed" in caplog.text
+        assert ds.get_service_names() == ["svc"]
+
+    def test_fetch_unique_traces_cached_per_limit(self):
+        class CountingDB(DummyDB):
+            calls = 0
+
+            def fetch_unique_traces(self, limit=10):
+                CountingDB.calls += 1
+                return [{"TraceId": str(limit)}]
+
+        ds = data.TraceDataService(CountingDB())
+        assert ds.fetch_unique_traces(5) == [{"TraceId": "5"}]
+        assert ds.fetch_unique_traces(5) == [{"TraceId": "5"}]
+        assert CountingDB.calls == 1
+        ds.fetch_unique_traces(10)
+        assert CountingDB.calls == 2
+
+    def test_add_trace_invalidates_caches(self):
+        class CountingDB(DummyDB):
+            calls = 0
+
+            def get_trace_counts(self):
+                CountingDB.calls += 1
+                return {"total": CountingDB.calls}
+
+            def add_trace(self, trace):
+                pass
+
+        ds = data.TraceDataService(CountingDB())
+        assert ds.get_trace_counts() == {"total": 1}
+        assert ds.get_trace_counts() == {"total": 1}
+        ds.add_trace({"TraceId": "t"})
+        assert ds.get_trace_counts() == {"total": 2}
+
+    def test_service_has_no_instance_dict(self):
+        ds = data.TraceDataService(DummyDB())
+        assert not hasattr(ds, "__dict__")
+
     def test_get_database_info(self):
         ds = data.TraceDataService(DummyDB())
         info = ds.get_database_info()
@@ -114,6 +187,21 @@ class TestTraceDataService:
         ]
         assert ds.count_error_traces(traces) == 3
 
+    def test_count_error_traces_uses_ingest_classification(self):
+        ds = data.TraceDataService(DummyDB())
+        traces = [
+            {"StatusCode": "Error", "status_color": "negative"},
+            {"StatusCode": "Ok", "status_color": "positive"},
+            {"StatusCode": "ERROR"},
+        ]
+        assert ds.count_error_traces(traces) == 2
+
+    def test_count_error_traces_mixed_case_batch(self):
+        ds = data.TraceDataService(DummyDB())
+        traces = [{"StatusCode": "ok"}, {"StatusCode": "Status_Code_Ok"}] * 50
+        traces += [{"StatusCode": "Error"}] * 7
+        assert ds.count_error_traces(traces) == 7
+
     def test_health_check_success_and_error(self, caplog):
         ds = data.TraceDataService(DummyDB())
         assert ds.health_check() is True
@@ -145,6 +233,25 @@ class TestTraceDataService:
         assert "host" not in info and "port" not in info
 
 
+class TestGetTraceDataService:
+    def teardown_method(self):
+        data._instance = None
+
+    def test_returns_shared_instance(self):
+        db = DummyDB()
+        service = data.get_trace_data_service(db)
+        assert data.get_trace_data_service() is service
+        assert data.get_trace_data_service(db) is service
+        assert service.db is db
+
+    def test_rebinds_to_new_database(self):
+        first = data.get_trace_data_service(DummyDB())
+        other_db = DummyDB()
+        second = data.get_trace_data_service(other_db)
+        assert second is not first
+        assert second.db is other_db
+
+
 class TestTraceDataServiceWithInMemoryDB:
     def setup_method(self):
         from trace_generator.database import InMemoryDatabase
@@ -204,8 +311,64 @@ class TestTraceDataServiceWithInMemoryDB:
         assert info["supports_direct_insert"] is True
         assert "max_traces" in info
 
+    def test_add_trace_buffers_until_read(self, monkeypatch):
+        monkeypatch.setattr(data, "ADD_TRACE_FLUSH_INTERVAL", 60.0)
+        for i in range(3):
+            self.ds.add_trace({"TraceId": f"b{i}", "ServiceName": "svc"})
+        assert len(self.db.traces) == 0
+
+        traces = self.ds.fetch_unique_traces()
+        assert [t["TraceId"] for t in traces] == ["b2", "b1", "b0"]
+
+    def test_add_trace_flushes_at_batch_size(self, monkeypatch):
+        monkeypatch.setattr(data, "ADD_TRACE_FLUSH_INTERVAL", 60.0)
+        monkeypatch.setattr(data, "ADD_TRACE_BATCH_SIZE", 2)
+        self.ds.add_trace({"TraceId": "x1"})
+        assert len(self.db.traces) == 0
+        self.ds.add_trace({"TraceId": "x2"})
+        assert len(self.db.traces) == 2
+
+    def test_add_trace_flushes_on_timer_without_further_adds(self, monkeypatch):
+        monkeypatch.setattr(data, "ADD_TRACE_FLUSH_INTERVAL", 0.01)
+        self.ds.add_trace({"TraceId": "idle"})
+        deadline = time.monotonic() + 2.0
+        while not self.db.traces and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert [t["TraceId"] for t in self.db.traces] == ["idle"]
+
+    def test_add_trace_writes_directly_without_bulk_override(self):
+        class AddOnlyDB(DatabaseInterface):
+            def __init__(self):
+                self.added = []
+
+            def connect(self):
+                pass
+
+            def disconnect(self):
+                pass
+
+            def health_check(self):
+                return True
+
+            def fetch_unique_traces(self, limit=30):
+                return []
+
+            def get_trace_counts(self):
+                return {}
+
+            def get_service_names(self):
+                return []
+
+            def add_trace(self, trace):
+                self.added.append(trace)
+
+        db = AddOnlyDB()
+        ds = data.TraceDataService(db)
+        ds.add_trace({"TraceId": "direct"})
+        assert db.added == [{"TraceId": "direct"}]
+
     def test_sample_traces_when_empty(self):
-        self.db.traces.clear()
+        self.db.disconnect()
         traces = self.ds.fetch_unique_traces(2)
         assert len(traces) == 2
         assert all("ServiceName" in t for t in traces)
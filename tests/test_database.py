@@ -1,14 +1,11 @@
-import sys
-import os
 import uuid
 import threading
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
-
 import pytest
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from unittest import mock
 from trace_generator import database
+from trace_generator.config import Config
 
 
 def make_trace(**kwargs):
@@ -27,6 +24,30 @@ def make_trace(**kwargs):
     return d
 
 
+def make_row_stream(column_names, rows):
+    """Mimic the context-managed stream returned by query_row_block_stream"""
+    stream = mock.MagicMock()
+    stream.__enter__.return_value = stream
+    stream.source.column_names = column_names
+    stream.__iter__.return_value = iter([rows] if rows else [])
+    return stream
+
+
+def make_clickhouse_db():
+    """ClickHouseDatabase with a mocked driver; no server is contacted"""
+    db = database.ClickHouseDatabase("localhost", 8123, "user", "password", "testdb")
+    db.clickhouse_connect = mock.MagicMock()
+    return db
+
+
+@pytest.fixture(autouse=True)
+def restore_config(monkeypatch):
+    """Re-read Config once a test's environment patches are undone."""
+    yield
+    monkeypatch.undo()
+    Config.refresh()
+
+
 class DummyDB(database.DatabaseInterface):
     def connect(self):
         pass
@@ -201,6 +222,16 @@ class TestInMemoryDatabase:
         assert traces[0]["TraceId"] == "new"  # Most recent first
         assert traces[1]["TraceId"] == "old"
 
+    def test_fetch_limit_returns_newest_slice(self):
+        """Test a small limit returns only the newest traces, newest first"""
+        db = database.InMemoryDatabase(max_traces=50)
+        for i in range(50):
+            db.add_trace(make_trace(TraceId=f"trace-{i}"))
+
+        traces = db.fetch_unique_traces(3)
+        assert [t["TraceId"] for t in traces] == ["trace-49", "trace-48", "trace-47"]
+        assert db.fetch_unique_traces(0) == []
+
     def test_disconnect_clears_traces(self):
         """Test that disconnect clears all traces"""
         db = database.InMemoryDatabase()
@@ -262,6 +293,183 @@ class TestInMemoryDatabase:
         # Should have exactly 100 traces (max limit)
         assert db.get_trace_counts()["total"] == 100
 
+    def test_counts_track_evicted_traces(self):
+        """Test aggregate counts follow the traces that are still stored"""
+        db = database.InMemoryDatabase(max_traces=2)
+        db.add_trace(make_trace(StatusCode="Error", ServiceName="old-service"))
+        db.add_trace(make_trace(StatusCode="OK", ServiceName="svc-a"))
+        db.add_trace(make_trace(StatusCode="OK", ServiceName="svc-b"))
+
+        assert db.get_trace_counts() == {"total": 2, "errors": 0, "success": 2}
+        assert db.get_service_names() == ["svc-a", "svc-b"]
+
+    def test_error_count_matches_stored_traces_under_churn(self):
+        """Test the running error tally agrees with a full rescan"""
+        db = database.InMemoryDatabase(max_traces=5)
+        for i in range(23):
+            db.add_trace(make_trace(StatusCode="Error" if i % 3 == 0 else "OK"))
+            expected = sum(t["status_color"] == "negative" for t in db.traces)
+            assert db.get_trace_counts()["errors"] == expected
+
+        db.disconnect()
+        db.add_trace(make_trace(StatusCode="Error"))
+        assert db.get_trace_counts() == {"total": 1, "errors": 1, "success": 0}
+
+    def test_service_names_drop_fully_evicted_services(self):
+        """Test a service disappears only once its last trace is evicted"""
+        db = database.InMemoryDatabase(max_traces=3)
+        for name in ("svc-a", "svc-b", "svc-a"):
+            db.add_trace(make_trace(ServiceName=name))
+        db.add_trace(make_trace(ServiceName=None))
+        assert db.get_service_names() == ["svc-a", "svc-b"]
+
+        db.add_trace(make_trace(ServiceName="svc-c"))
+        assert db.get_service_names() == ["svc-a", "svc-c"]
+
+    def test_traces_are_formatted_before_they_are_published(self):
+        """Test readers never see a trace the formatter has not finished"""
+        db = database.InMemoryDatabase()
+        visible = []
+        real_format = database._format_trace_data
+
+        def spy(trace, **kwargs):
+            visible.append(any(t is trace for t in db.traces))
+            real_format(trace, **kwargs)
+
+        with mock.patch.object(database, "_format_trace_data", spy):
+            db.add_trace(make_trace())
+            db.add_traces_bulk([make_trace(), make_trace()])
+
+        assert visible == [False, False, False]
+        assert all("status_color" in t for t in db.traces)
+        assert len(db.traces) == 3
+
+    def test_already_formatted_traces_are_not_reformatted(self):
+        """Test re-adding a formatted trace skips the formatter"""
+        source = database.InMemoryDatabase()
+        trace = make_trace(StatusCode="Error")
+        source.add_trace(trace)
+
+        db = database.InMemoryDatabase()
+        with mock.patch.object(database, "_format_trace_data") as fmt:
+            db.add_trace(trace)
+            db.add_traces_bulk([dict(trace)])
+        fmt.assert_not_called()
+        assert db.get_trace_counts() == {"total": 2, "errors": 2, "success": 0}
+
+        # Rows formatted for ClickHouse display still get in-memory KeyInfo
+        partial = make_trace()
+        database._format_trace_data(partial)
+        db.add_trace(partial)
+        assert partial["KeyInfo"] == "👤 42"
+
+    def test_caller_supplied_key_info_is_still_formatted(self):
+        """Test a raw trace that already has KeyInfo is formatted on add"""
+        db = database.InMemoryDatabase(max_traces=5)
+        trace = {
+            "TraceId": "t",
+            "SpanId": "s",
+            "ServiceName": "a",
+            "StatusCode": "OK",
+            "KeyInfo": "x",
+        }
+        db.add_trace(trace)
+        db.add_traces_bulk([{"TraceId": "u", "StatusCode": "Error", "KeyInfo": "y"}])
+
+        assert trace["status_color"] == "positive"
+        assert "formatted_timestamp" in trace
+        assert db.get_trace_counts() == {"total": 2, "errors": 1, "success": 1}
+
+    def test_add_traces_bulk(self):
+        """Test adding a batch of traces in one call"""
+        db = database.InMemoryDatabase(max_traces=3)
+        batch = [make_trace(TraceId=f"bulk-{i}") for i in range(4)]
+        batch[0].pop("Timestamp")
+
+        db.add_traces_bulk(batch)
+
+        traces = db.fetch_unique_traces(10)
+        assert [t["TraceId"] for t in traces] == ["bulk-3", "bulk-2", "bulk-1"]
+        assert isinstance(batch[0]["Timestamp"], datetime)
+        assert all("DurationMs" in t for t in traces)
+
+    def test_ring_rounds_capacity_and_keeps_max_traces(self):
+        """Test the ring is a power of two but only max_traces are visible"""
+        db = database.InMemoryDatabase(max_traces=5, evict_batch=1)
+        assert len(db._ring._seqs) == 8
+        for i in range(11):
+            db.add_trace(make_trace(TraceId=f"t{i}"))
+
+        assert [t["TraceId"] for t in db.traces] == [f"t{i}" for i in range(6, 11)]
+        assert db.get_trace_counts()["total"] == 5
+
+    def test_ring_keeps_eviction_headroom(self):
+        """Test the ring reserves spare slots beyond max_traces"""
+        db = database.InMemoryDatabase(max_traces=100)
+        assert db._evict_batch == 16
+        assert len(db._ring._seqs) == 128
+        db = database.InMemoryDatabase(max_traces=1024)
+        assert db._evict_batch == 64
+        assert len(db._ring._seqs) == 2048
+        for i in range(1100):
+            db.add_trace(make_trace(TraceId=f"t{i}"))
+        assert db.get_trace_counts()["total"] == 1024
+        assert db.fetch_unique_traces(1)[0]["TraceId"] == "t1099"
+
+    def test_ring_skips_slots_of_unexpected_sequence(self):
+        """Test readers ignore lapped slots and catch up with a lagging hint"""
+        ring = database._TraceRing(4)
+        for i in range(3):
+            ring.push({"TraceId": i, "status_color": "positive"})
+        # A writer that stored its slot but has not advanced the hint yet
+        ring._seqs[3] = 3
+        ring._traces[3] = {"TraceId": 3}
+        assert [t["TraceId"] for t in ring.newest(4, 10)] == [3, 2, 1, 0]
+
+        # A slot claimed by a later lap is not returned as an older trace
+        ring._seqs[1] = 9
+        assert [t["TraceId"] for t in ring.newest(4, 10)] == [3, 2, 0]
+        # Nor is a slot whose columns are still being rewritten
+        ring._seqs[2] = -1
+        assert [t["TraceId"] for t in ring.newest(4, 10)] == [3, 0]
+        assert ring.column_stats(4)[0] == 2
+
+    def test_ring_column_stats_match_stored_rows(self):
+        """Test the column aggregates agree with a rescan of the rows"""
+        ring = database._TraceRing(8)
+        for i in range(13):
+            ring.push(
+                {
+                    "status_color": "negative" if i % 3 == 0 else "positive",
+                    "ServiceName": f"svc-{i % 4}" if i % 5 else None,
+                }
+            )
+        rows = ring.newest(6, 6)
+        total, errors, services = ring.column_stats(6)
+        assert total == len(rows) == 6
+        assert errors == sum(t["status_color"] == "negative" for t in rows)
+        assert services == {t["ServiceName"] for t in rows} - {None}
+
+    def test_disconnect_swaps_in_an_empty_ring(self):
+        """Test a writer still holding the old ring cannot refill the store"""
+        db = database.InMemoryDatabase()
+        old_ring = db._ring
+        db.add_trace(make_trace())
+        db.disconnect()
+        late = make_trace(TraceId="late")
+        database._format_trace_data(late, key_info=True)
+        old_ring.push(late)
+
+        assert db.traces == []
+        assert db.get_trace_counts() == {"total": 2, "errors": 1, "success": 1}
+
+    def test_interface_add_traces_bulk_defaults_to_add_trace(self):
+        """Test the interface's bulk insert falls back to add_trace"""
+        db = DummyDB()
+        with mock.patch.object(db, "add_trace") as add_trace:
+            db.add_traces_bulk([{"TraceId": "a"}, {"TraceId": "b"}])
+        assert add_trace.call_count == 2
+
 
 class TestInMemoryDatabaseFormatting:
     """Test the data formatting logic without mocking"""
@@ -278,6 +486,29 @@ class TestInMemoryDatabaseFormatting:
         assert trace_dict["formatted_timestamp"] == "2023-06-15 14:30:45"
         assert trace_dict["FormattedTime"] == "14:30:45"
 
+    def test_format_trace_data_with_epoch_ns_timestamp(self):
+        """Test formatting of raw span start times in epoch nanoseconds"""
+        db = database.InMemoryDatabase()
+        now = datetime(2023, 6, 15, 14, 30, 45, tzinfo=timezone.utc)
+        trace_dict = {
+            "Timestamp": int(now.timestamp()) * 1_000_000_000 + 123_456_789,
+            "TraceId": "test",
+        }
+
+        db._format_trace_data(trace_dict)
+
+        assert trace_dict["formatted_timestamp"] == "2023-06-15 14:30:45"
+        assert trace_dict["FormattedTime"] == "14:30:45"
+
+    def test_epoch_ns_and_datetime_share_the_second_cache(self):
+        """A cached second is reused without building a datetime"""
+        now = datetime(2023, 6, 15, 14, 30, 45, tzinfo=timezone.utc)
+        database._format_datetime(now)
+        with mock.patch.object(database, "datetime") as fake_datetime:
+            formatted = database._format_epoch_ns(int(now.timestamp()) * 10**9 + 5)
+        fake_datetime.fromtimestamp.assert_not_called()
+        assert formatted == ("2023-06-15 14:30:45", "14:30:45")
+
     def test_format_trace_data_with_missing_timestamp(self):
         """Test formatting when timestamp is missing"""
         db = database.InMemoryDatabase()
@@ -345,6 +576,13 @@ class TestInMemoryDatabaseFormatting:
         assert trace_dict["ShortTraceId"] == "unknown"
         assert trace_dict["ShortSpanId"] == "unknown"
 
+    def test_is_ok_status(self):
+        """Test the shared success check used by the data service and UI"""
+        for status in ["OK", "STATUS_CODE_OK", "ok", "Status_Code_Ok"]:
+            assert database.is_ok_status(status), status
+        for status in ["Error", "UNSET", "", None]:
+            assert not database.is_ok_status(status), status
+
     def test_format_trace_data_status_colors(self):
         """Test status color determination"""
         db = database.InMemoryDatabase()
@@ -370,6 +608,40 @@ class TestInMemoryDatabaseFormatting:
         db._format_trace_data(trace_dict)
         assert trace_dict["status_color"] == "negative", "Failed for status: None"
 
+    def test_backends_share_one_formatter(self):
+        """Test both backends format identically apart from in-memory KeyInfo"""
+        ts = datetime(2023, 6, 15, 14, 30, 45, tzinfo=timezone.utc)
+        base = {"Timestamp": ts, "Duration": 2_500_000, "StatusCode": "OK"}
+        base["SpanAttributes"] = {"user.id": "7"}
+        in_memory, clickhouse = dict(base), dict(base)
+
+        database.InMemoryDatabase()._format_trace_data(in_memory)
+        database.ClickHouseDatabase(
+            "localhost", 8123, "user", "password", "testdb"
+        )._format_trace_data(clickhouse)
+
+        assert in_memory.pop("KeyInfo") == "👤 7"
+        assert "KeyInfo" not in clickhouse
+        assert in_memory == clickhouse
+        assert clickhouse["DurationMs"] == "2.5ms"
+
+    def test_timestamp_strings_reused_within_a_second(self):
+        """Test same-second timestamps reuse strings but respect time zones"""
+        ts = datetime(2023, 6, 15, 14, 30, 45, 1000, tzinfo=timezone.utc)
+        first = database._format_datetime(ts)
+        with mock.patch.object(database, "_TIMESTAMP_FORMAT", "unused"):
+            assert database._format_datetime(ts.replace(microsecond=9000)) == first
+
+        shifted = ts.astimezone(timezone(timedelta(hours=2)))
+        assert database._format_datetime(shifted) == (
+            "2023-06-15 16:30:45",
+            "16:30:45",
+        )
+        assert database._format_datetime(datetime.min) == (
+            datetime.min.strftime("%Y-%m-%d %H:%M:%S"),
+            "00:00:00",
+        )
+
     def test_extract_key_info_with_different_attributes(self):
         """Test key info extraction with real attribute data"""
         db = database.InMemoryDatabase()
@@ -475,6 +747,18 @@ class TestInMemoryDatabaseSampleData:
 
         assert counts == {"total": 2, "errors": 1, "success": 1}
 
+    def test_sample_traces_built_once(self):
+        """Test empty fetches reuse the prebuilt samples without sharing dicts"""
+        db = database.InMemoryDatabase()
+        with mock.patch.object(database.uuid, "uuid4") as uuid4:
+            first = db.fetch_unique_traces(5)
+            first[0]["ServiceName"] = "mutated"
+            second = db.fetch_unique_traces(5)
+
+        uuid4.assert_not_called()
+        assert second[0]["ServiceName"] == "api-gateway"
+        assert [t["TraceId"] for t in first] == [t["TraceId"] for t in second]
+
     def test_get_sample_traces_formatting(self):
         """Test that _get_sample_traces properly formats all traces"""
         db = database.InMemoryDatabase()
@@ -592,10 +876,7 @@ class TestClickHouseDatabaseBasics:
 
     def test_clickhouse_connect_success(self):
         """Test successful ClickHouse connection"""
-        db = database.ClickHouseDatabase(
-            "localhost", 8123, "user", "password", "testdb"
-        )
-        db.clickhouse_connect = mock.MagicMock()
+        db = make_clickhouse_db()
         mock_client = mock.MagicMock()
         db.clickhouse_connect.get_client.return_value = mock_client
 
@@ -608,14 +889,43 @@ class TestClickHouseDatabaseBasics:
             user="user",
             password="password",
             database="testdb",
+            pool_mgr=db._pool_mgr,
+            autogenerate_session_id=False,
         )
 
-    def test_clickhouse_connect_error(self, caplog):
-        """Test ClickHouse connection error"""
+    def test_clickhouse_shares_pool_manager(self):
+        """Test every ClickHouse client reuses the instance's pool manager"""
         db = database.ClickHouseDatabase(
-            "localhost", 8123, "user", "password", "testdb"
+            "localhost", 8123, "user", "password", "testdb", pool_size=4
         )
+        assert db._pool_mgr is not None
+        assert db.pool_size == 4
+        assert db.num_pools == 12
         db.clickhouse_connect = mock.MagicMock()
+
+        db.health_check()
+        db.get_service_names()
+
+        for call in db.clickhouse_connect.get_client.call_args_list:
+            assert call.kwargs["pool_mgr"] is db._pool_mgr
+
+    def test_clickhouse_pool_manager_settings(self, monkeypatch):
+        """Test the pool manager is sized from Config and never blocks callers"""
+        monkeypatch.setenv("DATABASE_POOL_SIZE", "30")
+        monkeypatch.setenv("DATABASE_POOL_NUM_POOLS", "6")
+        Config.refresh()
+        with mock.patch(
+            "clickhouse_connect.driver.httputil.get_pool_manager"
+        ) as get_pool_manager:
+            db = database.ClickHouseDatabase(
+                "localhost", 8123, "user", "password", "testdb"
+            )
+        get_pool_manager.assert_called_once_with(maxsize=30, num_pools=6, block=False)
+        assert db._pool_mgr is get_pool_manager.return_value
+
+    def test_clickhouse_connect_error(self, caplog):
+        """Test ClickHouse connection error"""
+        db = make_clickhouse_db()
         db.clickhouse_connect.get_client.side_effect = Exception("Connection failed")
 
         with caplog.at_level("ERROR"):
@@ -651,14 +961,9 @@ class TestClickHouseDatabaseBasics:
 
     def test_clickhouse_health_check_success(self):
         """Test successful ClickHouse health check"""
-        db = database.ClickHouseDatabase(
-            "localhost", 8123, "user", "password", "testdb"
-        )
-        db.clickhouse_connect = mock.MagicMock()
+        db = make_clickhouse_db()
         mock_client = mock.MagicMock()
-        db.clickhouse_connect.get_client.return_value.__enter__.return_value = (
-            mock_client
-        )
+        db.clickhouse_connect.get_client.return_value = mock_client
 
         result = db.health_check()
         assert result is True
@@ -666,10 +971,7 @@ class TestClickHouseDatabaseBasics:
 
     def test_clickhouse_health_check_error(self, caplog):
         """Test ClickHouse health check error"""
-        db = database.ClickHouseDatabase(
-            "localhost", 8123, "user", "password", "testdb"
-        )
-        db.clickhouse_connect = mock.MagicMock()
+        db = make_clickhouse_db()
         db.clickhouse_connect.get_client.side_effect = Exception("Health check failed")
 
         with caplog.at_level("ERROR"):
@@ -683,14 +985,9 @@ class TestClickHouseDatabaseQueries:
 
     def test_fetch_unique_traces_success(self):
         """Test successful trace fetching"""
-        db = database.ClickHouseDatabase(
-            "localhost", 8123, "user", "password", "testdb"
-        )
-        db.clickhouse_connect = mock.MagicMock()
+        db = make_clickhouse_db()
         mock_client = mock.MagicMock()
-        db.clickhouse_connect.get_client.return_value.__enter__.return_value = (
-            mock_client
-        )
+        db.clickhouse_connect.get_client.return_value = mock_client
 
         # Mock query result
         mock_result = mock.MagicMock()
@@ -699,7 +996,8 @@ class TestClickHouseDatabaseQueries:
             ["trace2", "span2", "Error"],
         ]
         mock_result.column_names = ["TraceId", "SpanId", "StatusCode"]
-        mock_client.query.return_value = mock_result
+        stream = make_row_stream(mock_result.column_names, mock_result.result_rows)
+        mock_client.query_row_block_stream.return_value = stream
 
         traces = db.fetch_unique_traces(10)
 
@@ -707,17 +1005,18 @@ class TestClickHouseDatabaseQueries:
         assert traces[0]["TraceId"] == "trace1"
         assert traces[1]["StatusCode"] == "Error"
 
-        # Verify the complex query was called
-        mock_client.query.assert_called_once()
-        call_args = mock_client.query.call_args
+        # Verify the complex query was streamed in bounded blocks
+        mock_client.query_row_block_stream.assert_called_once()
+        call_args = mock_client.query_row_block_stream.call_args
         assert call_args[0][1] == [10]  # Verify limit parameter
+        assert call_args.kwargs["settings"] == {
+            "max_block_size": database.FETCH_BLOCK_SIZE
+        }
+        stream.__exit__.assert_called_once()
 
     def test_fetch_unique_traces_error(self, caplog):
         """Test fetch traces error handling"""
-        db = database.ClickHouseDatabase(
-            "localhost", 8123, "user", "password", "testdb"
-        )
-        db.clickhouse_connect = mock.MagicMock()
+        db = make_clickhouse_db()
         db.clickhouse_connect.get_client.side_effect = Exception("Query failed")
 
         with caplog.at_level("ERROR"):
@@ -727,37 +1026,26 @@ class TestClickHouseDatabaseQueries:
 
     def test_get_trace_counts_success(self):
         """Test successful trace count retrieval"""
-        db = database.ClickHouseDatabase(
-            "localhost", 8123, "user", "password", "testdb"
-        )
-        db.clickhouse_connect = mock.MagicMock()
+        db = make_clickhouse_db()
         mock_client = mock.MagicMock()
-        db.clickhouse_connect.get_client.return_value.__enter__.return_value = (
-            mock_client
-        )
+        db.clickhouse_connect.get_client.return_value = mock_client
 
-        # Mock results for both queries
-        total_result = mock.MagicMock()
-        total_result.result_rows = [[42]]
-        error_result = mock.MagicMock()
-        error_result.result_rows = [[5]]
-        mock_client.query.side_effect = [total_result, error_result]
+        # Totals and errors come back from a single query
+        counts_result = mock.MagicMock()
+        counts_result.result_rows = [(42, 5)]
+        mock_client.query.return_value = counts_result
 
         counts = db.get_trace_counts()
 
         assert counts == {"total": 42, "errors": 5, "success": 37}
-        assert mock_client.query.call_count == 2
+        mock_client.query.assert_called_once()
+        assert "uniqExactIf" in mock_client.query.call_args.args[0]
 
     def test_get_trace_counts_empty_results(self):
         """Test trace counts with empty result sets"""
-        db = database.ClickHouseDatabase(
-            "localhost", 8123, "user", "password", "testdb"
-        )
-        db.clickhouse_connect = mock.MagicMock()
+        db = make_clickhouse_db()
         mock_client = mock.MagicMock()
-        db.clickhouse_connect.get_client.return_value.__enter__.return_value = (
-            mock_client
-        )
+        db.clickhouse_connect.get_client.return_value = mock_client
 
         # Mock empty results
         empty_result = mock.MagicMock()
@@ -770,10 +1058,7 @@ class TestClickHouseDatabaseQueries:
 
     def test_get_trace_counts_error(self, caplog):
         """Test trace counts error handling"""
-        db = database.ClickHouseDatabase(
-            "localhost", 8123, "user", "password", "testdb"
-        )
-        db.clickhouse_connect = mock.MagicMock()
+        db = make_clickhouse_db()
         db.clickhouse_connect.get_client.side_effect = Exception("Count query failed")
 
         with caplog.at_level("ERROR"):
@@ -783,14 +1068,9 @@ class TestClickHouseDatabaseQueries:
 
     def test_get_service_names_success(self):
         """Test successful service name retrieval"""
-        db = database.ClickHouseDatabase(
-            "localhost", 8123, "user", "password", "testdb"
-        )
-        db.clickhouse_connect = mock.MagicMock()
+        db = make_clickhouse_db()
         mock_client = mock.MagicMock()
-        db.clickhouse_connect.get_client.return_value.__enter__.return_value = (
-            mock_client
-        )
+        db.clickhouse_connect.get_client.return_value = mock_client
 
         # Mock service names result
         mock_result = mock.MagicMock()
@@ -810,14 +1090,9 @@ class TestClickHouseDatabaseQueries:
 
     def test_get_service_names_empty_results(self):
         """Test service names with empty result set"""
-        db = database.ClickHouseDatabase(
-            "localhost", 8123, "user", "password", "testdb"
-        )
-        db.clickhouse_connect = mock.MagicMock()
+        db = make_clickhouse_db()
         mock_client = mock.MagicMock()
-        db.clickhouse_connect.get_client.return_value.__enter__.return_value = (
-            mock_client
-        )
+        db.clickhouse_connect.get_client.return_value = mock_client
 
         # Mock empty results
         empty_result = mock.MagicMock()
@@ -830,10 +1105,7 @@ class TestClickHouseDatabaseQueries:
 
     def test_get_service_names_error(self, caplog):
         """Test service names error handling"""
-        db = database.ClickHouseDatabase(
-            "localhost", 8123, "user", "password", "testdb"
-        )
-        db.clickhouse_connect = mock.MagicMock()
+        db = make_clickhouse_db()
         db.clickhouse_connect.get_client.side_effect = Exception("Service query failed")
 
         with caplog.at_level("ERROR"):
@@ -851,6 +1123,248 @@ class TestClickHouseDatabaseQueries:
             assert "ClickHouse trace insertion handled by OTLP pipeline" in caplog.text
 
 
+class TestClickHouseCircuitBreaker:
+    """Test ClickHouse queries fail fast while the backend is down"""
+
+    def make_db(self):
+        db = make_clickhouse_db()
+        db.clickhouse_connect.get_client.side_effect = Exception("timeout")
+        return db
+
+    def test_breaker_opens_after_repeated_failures(self, caplog):
+        db = self.make_db()
+        with caplog.at_level("WARNING"):
+            for _ in range(database.BREAKER_FAIL_MAX):
+                assert db.fetch_unique_traces(10) == []
+        assert db._breaker.is_open
+        assert "Database unavailable" in caplog.text
+
+        calls = db.clickhouse_connect.get_client.call_count
+        assert db.fetch_unique_traces(10) == []
+        assert db.get_trace_counts() == {"total": 0, "errors": 0, "success": 0}
+        assert db.get_service_names() == []
+        assert db.health_check() is False
+        assert db.clickhouse_connect.get_client.call_count == calls
+
+    def test_breaker_probe_closes_on_success(self):
+        db = self.make_db()
+        for _ in range(database.BREAKER_FAIL_MAX):
+            db.health_check()
+        assert db._breaker.is_open
+
+        db._breaker.reset_timeout = 0
+        db.clickhouse_connect.get_client.side_effect = None
+        assert db.health_check() is True
+        assert not db._breaker.is_open
+
+
+class TestClickHouseClientReuse:
+    """Test ClickHouse queries share one long-lived client"""
+
+    def test_client_created_once_across_queries(self):
+        db = make_clickhouse_db()
+        mock_client = db.clickhouse_connect.get_client.return_value
+        mock_client.query.return_value = mock.Mock(result_rows=[])
+        mock_client.query_row_block_stream.return_value = make_row_stream([], [])
+
+        db.health_check()
+        db.fetch_unique_traces(10)
+        db.get_service_names()
+
+        db.clickhouse_connect.get_client.assert_called_once()
+        assert mock_client.query.call_count == 2
+        mock_client.query_row_block_stream.assert_called_once()
+
+    def test_reconnects_once_on_operational_error(self):
+        db = make_clickhouse_db()
+
+        class ConnectionDropped(Exception):
+            pass
+
+        db._retryable_errors = (ConnectionDropped,)
+        stale_client = mock.MagicMock()
+        stale_client.query.side_effect = ConnectionDropped("connection reset")
+        fresh_client = mock.MagicMock()
+        db.clickhouse_connect.get_client.side_effect = [stale_client, fresh_client]
+
+        assert db.health_check() is True
+        stale_client.close.assert_called_once()
+        fresh_client.query.assert_called_once_with("SELECT 1")
+
+    def test_disconnect_drops_client(self):
+        db = make_clickhouse_db()
+        db.connect()
+        client = db._client
+        db.disconnect()
+        client.close.assert_called_once()
+        assert db._client is None
+
+
+class TestClickHouseQueryCache:
+    """Test aggregate ClickHouse queries are memoised for a short TTL"""
+
+    def make_db(self):
+        db = make_clickhouse_db()
+        self.mock_client = db.clickhouse_connect.get_client.return_value
+        return db
+
+    def test_trace_counts_cached_within_ttl(self):
+        db = self.make_db()
+        self.mock_client.query.return_value = mock.Mock(result_rows=[(10, 2)])
+        first = db.get_trace_counts()
+        first["total"] = -1
+        assert db.get_trace_counts() == {"total": 10, "errors": 2, "success": 8}
+        assert self.mock_client.query.call_count == 1
+
+    def test_trace_counts_window_uses_prewhere(self):
+        db = self.make_db()
+        self.mock_client.query.return_value = mock.Mock(result_rows=[(4, 1)])
+        db.get_trace_counts()
+        assert "PREWHERE" not in self.mock_client.query.call_args.args[0]
+
+        db = self.make_db()
+        db.counts_window = 3600
+        self.mock_client.query.return_value = mock.Mock(result_rows=[(4, 1)])
+        assert db.get_trace_counts() == {"total": 4, "errors": 1, "success": 3}
+        query, params = self.mock_client.query.call_args.args
+        assert "PREWHERE Timestamp" in query
+        assert params == [3600]
+
+    def test_service_names_refresh_after_ttl(self):
+        db = self.make_db()
+        self.mock_client.query.return_value = mock.Mock(result_rows=[("svc",)])
+        assert db.get_service_names() == ["svc"]
+        assert db.get_service_names() == ["svc"]
+        assert self.mock_client.query.call_count == 1
+
+        db._cache_ttl = 0
+        db.get_service_names()
+        assert self.mock_client.query.call_count == 2
+
+    def test_failures_are_not_cached(self):
+        db = self.make_db()
+        self.mock_client.query.side_effect = Exception("boom")
+        assert db.get_service_names() == []
+        self.mock_client.query.side_effect = None
+        self.mock_client.query.return_value = mock.Mock(result_rows=[("svc",)])
+        assert db.get_service_names() == ["svc"]
+
+    def test_cache_hits_bypass_the_breaker(self):
+        db = self.make_db()
+        self.mock_client.query.return_value = mock.Mock(result_rows=[(10, 2)])
+        assert db.get_trace_counts()["total"] == 10
+        db._breaker.allow = mock.Mock(return_value=False)
+
+        # Fresh results are still served while the breaker is open, and no
+        # half-open probe is spent on them
+        assert db.get_trace_counts()["total"] == 10
+        db._breaker.allow.assert_not_called()
+
+        db._cache_ttl = 0
+        assert db.get_trace_counts() == {"total": 0, "errors": 0, "success": 0}
+        db._breaker.allow.assert_called_once_with()
+        assert self.mock_client.query.call_count == 1
+
+
+class TestClickHouseBackgroundRefresh:
+    """Test counts and service names can be refreshed off the request path"""
+
+    def make_db(self):
+        db = make_clickhouse_db()
+        self.mock_client = db.clickhouse_connect.get_client.return_value
+        self.mock_client.query.return_value = mock.Mock(
+            result_rows=[(7, 2, ["svc-a", "svc-b"])]
+        )
+        return db
+
+    def test_refresh_fills_both_caches_with_one_query(self):
+        db = self.make_db()
+        db._refresh_aggregates()
+
+        self.mock_client.query.assert_called_once()
+        assert "groupUniqArray(ServiceName)" in self.mock_client.query.call_args.args[0]
+        assert db.get_trace_counts() == {"total": 7, "errors": 2, "success": 5}
+        assert db.get_service_names() == ["svc-a", "svc-b"]
+        self.mock_client.query.assert_called_once()
+
+    def test_refresh_applies_counts_window(self):
+        db = self.make_db()
+        db.counts_window = 600
+        db._refresh_aggregates()
+        query, params = self.mock_client.query.call_args.args
+        assert "toIntervalSecond(%s)" in query
+        assert params == [600, 600]
+
+    def test_refresh_failure_keeps_previous_values(self):
+        db = self.make_db()
+        db._refresh_aggregates()
+        self.mock_client.query.side_effect = Exception("boom")
+        db._refresh_aggregates()
+        assert db._services_cache[1] == ["svc-a", "svc-b"]
+
+    def test_connect_starts_and_disconnect_stops_refresher(self):
+        db = self.make_db()
+        db.refresh_interval = 30
+        assert db.connect() is True
+        thread = db._refresh_thread
+        assert thread.is_alive()
+        assert db._cache_ttl >= 60
+
+        db.disconnect()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        assert db._refresh_thread is None
+
+    def test_refresher_off_by_default(self):
+        db = self.make_db()
+        db.connect()
+        assert db._refresh_thread is None
+
+
+class TestClickHouseLatestView:
+    """Test the opt-in materialized view for per-trace latest spans"""
+
+    def make_db(self, monkeypatch):
+        monkeypatch.setenv("DATABASE_LATEST_VIEW", "true")
+        Config.refresh()
+        db = make_clickhouse_db()
+        self.mock_client = db.clickhouse_connect.get_client.return_value
+        self.mock_client.query_row_block_stream.return_value = make_row_stream([], [])
+        return db
+
+    def test_view_disabled_by_default(self, monkeypatch):
+        monkeypatch.delenv("DATABASE_LATEST_VIEW", raising=False)
+        Config.refresh()
+        db = make_clickhouse_db()
+        db.connect()
+        db.clickhouse_connect.get_client.return_value.command.assert_not_called()
+
+    def test_connect_creates_view_and_fetch_reads_it(self, monkeypatch):
+        db = self.make_db(monkeypatch)
+        assert db.connect() is True
+
+        ddl = self.mock_client.command.call_args.args[0]
+        assert "CREATE MATERIALIZED VIEW IF NOT EXISTS otel_traces_latest" in ddl
+        assert "argMaxState(" in ddl
+
+        db.fetch_unique_traces(5)
+        query = self.mock_client.query_row_block_stream.call_args.args[0]
+        assert "argMaxMerge(t)" in query
+        assert "FROM otel_traces_latest" in query
+
+    def test_view_creation_failure_falls_back(self, monkeypatch, caplog):
+        db = self.make_db(monkeypatch)
+        self.mock_client.command.side_effect = Exception("not allowed")
+
+        with caplog.at_level("WARNING"):
+            assert db.connect() is True
+        assert "Could not create otel_traces_latest" in caplog.text
+
+        db.fetch_unique_traces(5)
+        query = self.mock_client.query_row_block_stream.call_args.args[0]
+        assert "otel_traces_latest" not in query
+
+
 class TestClickHouseDatabaseFormatting:
     """Test ClickHouse trace data formatting"""
 
@@ -894,6 +1408,80 @@ class TestClickHouseDatabaseFormatting:
         assert "formatted_timestamp" in result[0]
         assert "DurationMs" in result[0]
 
+    def test_process_query_results_server_formatted(self):
+        """Test rows already formatted by ClickHouse are passed through"""
+        db = database.ClickHouseDatabase(
+            "localhost", 8123, "user", "password", "testdb"
+        )
+        mock_result = mock.MagicMock()
+        mock_result.result_rows = [["trace1", "OK", "12:00:00", "1.5ms", "positive"]]
+        mock_result.column_names = [
+            "TraceId",
+            "StatusCode",
+            "FormattedTime",
+            "DurationMs",
+            "status_color",
+        ]
+
+        with mock.patch.object(db, "_format_trace_data") as fmt:
+            result = db._process_query_results(mock_result)
+
+        fmt.assert_not_called()
+        assert result == [
+            {
+                "TraceId": "trace1",
+                "StatusCode": "OK",
+                "FormattedTime": "12:00:00",
+                "DurationMs": "1.5ms",
+                "status_color": "positive",
+            }
+        ]
+
+    def test_fetch_query_formats_display_fields(self):
+        """Test the fetch query asks ClickHouse for the display columns"""
+        db = make_clickhouse_db()
+        mock_client = db.clickhouse_connect.get_client.return_value
+        mock_client.query_row_block_stream.return_value = make_row_stream([], [])
+
+        db.fetch_unique_traces(5)
+
+        query, params = mock_client.query_row_block_stream.call_args.args
+        assert params == [5]
+        for column in ("formatted_timestamp", "DurationMs", "status_color", "KeyInfo"):
+            assert f"AS {column}" in query
+        # KeyInfo is derived in SQL; the attribute maps are not returned
+        assert "AS SpanAttributes" not in query
+        assert "SpanAttributes['error.type']" in query
+
+    def test_fetch_joins_streamed_blocks(self):
+        """Test rows from every streamed block end up in the result"""
+        db = make_clickhouse_db()
+        stream = make_row_stream(["TraceId", "status_color"], [])
+        stream.__iter__.return_value = iter(
+            [[("t1", "positive"), ("t2", "negative")], [("t3", "positive")]]
+        )
+        mock_client = db.clickhouse_connect.get_client.return_value
+        mock_client.query_row_block_stream.return_value = stream
+
+        traces = db.fetch_unique_traces(3)
+
+        assert [t["TraceId"] for t in traces] == ["t1", "t2", "t3"]
+        assert traces[1] == {"TraceId": "t2", "status_color": "negative"}
+
+    def test_fetch_query_picks_one_span_per_trace_with_argmax(self):
+        """Test the fetch query aggregates per trace rather than windowing"""
+        db = make_clickhouse_db()
+        mock_client = db.clickhouse_connect.get_client.return_value
+        mock_client.query_row_block_stream.return_value = make_row_stream([], [])
+
+        db.fetch_unique_traces(5)
+
+        query = mock_client.query_row_block_stream.call_args.args[0]
+        assert "argMax(" in query
+        assert "GROUP BY TraceId" in query
+        assert "ROW_NUMBER" not in query
+        assert "SELECT *" not in query
+
     def test_format_trace_data_comprehensive(self):
         """Test ClickHouse _format_trace_data comprehensively"""
         db = database.ClickHouseDatabase(
@@ -1139,6 +1727,7 @@ class TestGetDatabaseFunction:
         """Test get_database with in-memory configuration"""
         monkeypatch.setenv("DATABASE_TYPE", "inmemory")
         monkeypatch.delenv("DATABASE_HOST", raising=False)
+        Config.refresh()
 
         with caplog.at_level("INFO"):
             db = database.get_database()
@@ -1153,6 +1742,7 @@ class TestGetDatabaseFunction:
         monkeypatch.setenv("DATABASE_USER", "ch-user")
         monkeypatch.setenv("DATABASE_PASSWORD", "ch-pass")
         monkeypatch.setenv("DATABASE_NAME", "ch-db")
+        Config.refresh()
 
         db = database.get_database()
         assert isinstance(db, database.ClickHouseDatabase)
@@ -1167,6 +1757,7 @@ class TestGetDatabaseFunction:
         monkeypatch.setenv("component.UseLocalHostAsDefaultHost", "true")
         monkeypatch.setenv("DATABASE_TYPE", "clickhouse")
         monkeypatch.setenv("DATABASE_HOST", "0.0.0.0")
+        Config.refresh()
 
         with caplog.at_level("INFO"):
             db = database.get_database()
@@ -1182,6 +1773,7 @@ class TestGetDatabaseFunction:
         monkeypatch.setenv("component.UseLocalHostAsDefaultHost", "false")
         monkeypatch.setenv("DATABASE_TYPE", "clickhouse")
         monkeypatch.setenv("DATABASE_HOST", "0.0.0.0")
+        Config.refresh()
 
         db = database.get_database()
         assert isinstance(db, database.ClickHouseDatabase)
@@ -1206,6 +1798,7 @@ class TestGetDatabaseFunction:
 
         # Set DATABASE_TYPE to 'inmemory' to avoid ValueError
         monkeypatch.setenv("DATABASE_TYPE", "inmemory")
+        Config.refresh()
         db = database.get_database()
         assert isinstance(db, database.InMemoryDatabase)
 
@@ -1225,6 +1818,7 @@ class TestGetDatabaseFunction:
         monkeypatch.setenv("CLICKHOUSE_DATABASE", "ch-db")
         # Set DATABASE_TYPE to 'inmemory' to avoid ValueError
         monkeypatch.setenv("DATABASE_TYPE", "inmemory")
+        Config.refresh()
         db = database.get_database()
         assert isinstance(db, database.InMemoryDatabase)
 
@@ -1241,6 +1835,7 @@ class TestGetDatabaseFunction:
         monkeypatch.delenv("CLICKHOUSE_PASSWORD", raising=False)
         monkeypatch.delenv("DATABASE_NAME", raising=False)
         monkeypatch.delenv("CLICKHOUSE_DATABASE", raising=False)
+        Config.refresh()
 
         db = database.get_database()
         assert db.port == 8123
@@ -1256,6 +1851,7 @@ class TestGetDatabaseFunction:
         monkeypatch.setenv("DATABASE_USER", "u")
         monkeypatch.setenv("DATABASE_PASSWORD", "p")
         monkeypatch.setenv("DATABASE_NAME", "d")
+        Config.refresh()
 
         with caplog.at_level("ERROR"):
             with pytest.raises(ValueError):
@@ -1269,15 +1865,26 @@ class TestEnvironmentVariableHandling:
     def test_inmemory_max_traces_from_env(self, monkeypatch):
         """Test that INMEMORY_MAX_TRACES environment variable is respected"""
         monkeypatch.setenv("INMEMORY_MAX_TRACES", "75")
+        Config.refresh()
         db = database.InMemoryDatabase()
         assert db.max_traces == 75
 
     def test_inmemory_max_traces_from_create_database(self, monkeypatch):
         """Test INMEMORY_MAX_TRACES through create_database"""
         monkeypatch.setenv("INMEMORY_MAX_TRACES", "123")
+        Config.refresh()
         db = database.create_database(db_type="inmemory")
         assert db.max_traces == 123
 
+    def test_get_database_sizes_inmemory_from_config(self, monkeypatch):
+        """get_database passes the validated Config capacity through"""
+        monkeypatch.setenv("DATABASE_TYPE", "inmemory")
+        monkeypatch.setenv("INMEMORY_MAX_TRACES", "42")
+        Config.refresh()
+        db = database.get_database()
+        assert isinstance(db, database.InMemoryDatabase)
+        assert db.max_traces == 42
+
     def test_environment_variables_in_should_use_inmemory(self, monkeypatch):
         """Test environment variable usage in should_use_inmemory_database"""
         # Test with DATABASE_HOST
@@ -1310,6 +1917,7 @@ class TestModuleExports:
             "InMemoryDatabase",
             "create_database",
             "get_database",
+            "is_ok_status",
         ]
 
         assert hasattr(database, "__all__")
@@ -1421,9 +2029,7 @@ class TestRealWorldScenarios:
         )
         db.clickhouse_connect = mock.MagicMock()
         mock_client = mock.MagicMock()
-        db.clickhouse_connect.get_client.return_value.__enter__.return_value = (
-            mock_client
-        )
+        db.clickhouse_connect.get_client.return_value = mock_client
 
         # Simulate realistic trace data
         now = datetime.now(timezone.utc)
@@ -1461,7 +2067,9 @@ class TestRealWorldScenarios:
             "SpanAttributes",
             "ResourceAttributes",
         ]
-        mock_client.query.return_value = mock_result
+        mock_client.query_row_block_stream.return_value = make_row_stream(
+            mock_result.column_names, mock_result.result_rows
+        )
 
         traces = db.fetch_unique_traces(1)
 
@@ -1483,6 +2091,7 @@ class TestRealWorldScenarios:
         monkeypatch.setenv("DATABASE_PASSWORD", "secure_password")
         monkeypatch.setenv("DATABASE_NAME", "trace_analytics")
         monkeypatch.setenv("INMEMORY_MAX_TRACES", "500")
+        Config.refresh()
 
         # Test ClickHouse creation
         ch_db = database.get_database()
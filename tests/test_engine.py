@@ -1,9 +1,5 @@
-import sys
-import os
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
-
 import pytest
+import time
 import types
 from trace_generator.engine import (
     InMemorySpanProcessor,
@@ -90,8 +86,10 @@ def test_inmemory_span_processor_on_end():
     proc = InMemorySpanProcessor(db)
     span = DummySpan()
     proc.on_end(span)
+    assert proc.force_flush()
     traces = db.fetch_unique_traces(1)
     assert traces
+    assert traces[0]["TraceId"] == format(1, "032x")
     # error path
     proc.database = None
     proc.on_end(span)  # should not raise
@@ -175,8 +173,8 @@ def test_trace_generator_error_conditions(monkeypatch):
     tracers = {"svc": DummyTracer()}
     config = make_scenario(error=True)
     tg = TraceGenerator(tracers, config, num_workers=1, database=db)
-    # Patch random.randint to always trigger error
-    monkeypatch.setattr("random.randint", lambda a, b: 1)
+    # Patch the worker's roll to always trigger error
+    monkeypatch.setattr(tg._rng(), "random", lambda: 0.0)
     tg._generate_single_trace()
     # Should set error status
     # (no assertion needed, just exercise the code)
@@ -234,3 +232,493 @@ def test_trace_generator_delay_and_child_calls(monkeypatch):
         "error_conditions": [{"probability": 0}],
     }
     tg._process_span_definition(span_def, {}, {})
+
+
+def test_context_store_shards_and_capacity():
+    from trace_generator.engine import ContextStore
+
+    assert ContextStore(10).num_shards == 1
+    store = ContextStore(1000)
+    assert store.num_shards == 64
+    for i in range(5000):
+        store.append((f"order-{i}", (i, {})))
+    assert len(store) <= 1000 + store.num_shards
+    assert len(list(store)) == len(store)
+
+
+def test_context_store_literal_and_wildcard_lookup():
+    from trace_generator.engine import ContextStore
+
+    store = ContextStore(1000)
+    store.append(("order-1", ("ctx1", {"a": 1})))
+    store.append(("order-2", ("ctx2", {"a": 2})))
+    store.append(("user-1", ("ctx3", {"a": 3})))
+    assert store.matches("order-1") == [("order-1", ("ctx1", {"a": 1}))]
+    assert sorted(key for key, _ in store.matches("order-*")) == [
+        "order-1",
+        "order-2",
+    ]
+    assert store.matches("missing") == []
+    assert store.get("user-1") == ("ctx3", {"a": 3})
+    assert store.get("missing") is None
+
+
+def test_trace_generator_links_wildcard_context():
+    db = InMemoryDatabase()
+    tracers = {"svc": DummyTracer()}
+    tg = TraceGenerator(tracers, make_scenario(), num_workers=1, database=db)
+    tg.context_store.append(("order-7", (object(), {"order.id": "7"})))
+    captured = {}
+
+    class CapturingTracer(DummyTracer):
+        def start_as_current_span(self, *a, **k):
+            captured.update(k)
+            return super().start_as_current_span(*a, **k)
+
+    tg.tracers["svc"] = CapturingTracer()
+    span_def = {
+        "service": "svc",
+        "operation": "op",
+        "link_from_context": "order-*",
+        "attributes": {"linked": "{{linked.attributes.order.id}}"},
+    }
+    tg._process_span_definition(span_def, {}, {})
+    assert len(captured["links"]) == 1
+
+
+def test_trace_generator_precomputes_selection_and_link_patterns(monkeypatch):
+    db = InMemoryDatabase()
+    child = {"service": "svc", "operation": "child", "link_from_context": "k-*"}
+    config = {
+        "scenarios": [
+            {"root_span": {"service": "svc", "operation": "a"}, "weight": 2},
+            {"root_span": {"service": "svc", "calls": [child]}, "weight": 3},
+        ]
+    }
+    tg = TraceGenerator({"svc": DummyTracer()}, config, num_workers=1, database=db)
+    assert tg._scenario_indices == (0, 1)
+    assert tg._cum_weights == (2, 5)
+    compiled_child = tg.scenarios[1]["root_span"]["calls"][0]
+    assert compiled_child["_link_re"].match("k-1")
+
+    calls = []
+
+    def fake_choices(population, weights=None, cum_weights=None, k=1):
+        calls.append((population, weights, cum_weights))
+        return [population[-1]]
+
+    monkeypatch.setattr(tg._rng(), "choices", fake_choices)
+    tg._generate_single_trace()
+    assert calls == [((0, 1), None, (2, 5))]
+
+
+def test_compile_span_builds_resolver_plans(monkeypatch):
+    db = InMemoryDatabase()
+    tg = TraceGenerator({"svc": DummyTracer()}, make_scenario(), database=db)
+    span_def = {
+        "service": "svc",
+        "operation": "op-{{name}}",
+        "attributes": {"http.method": "GET", "user": "{{name}}", "count": 3},
+        "events": [{"name": "done", "attributes": {"who": "{{name}}"}}],
+    }
+    compiled = tg._compile_span(span_def)
+    assert "_attr_plan" not in span_def
+    plan = dict(compiled["_attr_plan"])
+    assert plan["http.method"]({}) == "GET"
+    assert plan["count"]({}) == 3
+    assert plan["user"]({"name": "ann"}) == "ann"
+    assert compiled["_op_plan"]({"name": "ann"}) == "op-ann"
+
+    resolved = []
+    original = tg.resolver.resolve
+
+    def tracking_resolve(value, context=None):
+        resolved.append(value.source)
+        return original(value, context)
+
+    monkeypatch.setattr(tg.resolver, "resolve", tracking_resolve)
+    compiled = tg._compile_span(span_def)
+    tg._process_span_definition(compiled, {"name": "ann"}, {})
+    assert "GET" not in resolved
+    assert sorted(resolved) == ["op-{{name}}", "{{name}}", "{{name}}"]
+
+
+def test_span_contexts_are_pooled_per_thread():
+    db = InMemoryDatabase()
+    tg = TraceGenerator({"svc": DummyTracer()}, make_scenario(), database=db)
+    span_def = {
+        "service": "svc",
+        "operation": "op-{{name}}",
+        "events": [{"name": "ev-{{name}}"}],
+    }
+    tg._process_span_definition(span_def, {"name": "a"}, {})
+    pooled = list(tg._dict_pool.free)
+    assert len(pooled) == 2 and all(d == {} for d in pooled)
+    tg._process_span_definition(span_def, {"name": "b"}, {})
+    assert sorted(map(id, tg._dict_pool.free)) == sorted(map(id, pooled))
+
+
+def test_inmemory_span_processor_batches_writes(monkeypatch):
+    db = InMemoryDatabase()
+    batches = []
+    monkeypatch.setattr(db, "add_traces_bulk", lambda traces: batches.append(traces))
+    proc = InMemorySpanProcessor(db, batch_size=4)
+    with proc._write_lock:
+        # Hold the writer off so all spans queue up behind it
+        for _ in range(9):
+            proc.on_end(DummySpan())
+    proc.force_flush()
+    assert sorted(len(b) for b in batches) == [1, 4, 4]
+    proc.shutdown()
+    assert not proc._writer.is_alive()
+
+
+def test_inmemory_span_processor_writes_off_the_calling_thread():
+    import threading
+
+    db = InMemoryDatabase()
+    writers = []
+    original = db.add_traces_bulk
+
+    def record_thread(traces):
+        writers.append(threading.current_thread().name)
+        original(traces)
+
+    db.add_traces_bulk = record_thread
+    proc = InMemorySpanProcessor(db)
+    proc.on_end(DummySpan())
+    for _ in range(100):
+        if writers:
+            break
+        time.sleep(0.01)
+    assert writers == ["InMemorySpanWriter"]
+    assert len(db.traces) == 1
+    proc.shutdown()
+    proc.on_end(DummySpan())
+    assert len(db.traces) == 2
+
+
+def test_setup_shares_one_inmemory_processor():
+    import trace_generator.engine as engine
+
+    # Other suites reload the database module, so use the class engine sees
+    db = engine.InMemoryDatabase()
+    engine.setup_opentelemetry_providers(["svc1", "svc2"], database=db)
+    processors = [
+        p
+        for provider in engine._trace_providers
+        for p in provider._active_span_processor._span_processors
+        if isinstance(p, engine.InMemorySpanProcessor)
+    ]
+    assert len(processors) == 2 and processors[0] is processors[1]
+    engine.shutdown_opentelemetry_providers()
+
+
+def test_context_store_ring_overwrites_oldest_entries():
+    from trace_generator.engine import ContextStore
+
+    store = ContextStore(10)
+    for i in range(25):
+        store.append((f"k{i}", (i, {})))
+    assert len(store) == 10
+    assert sorted(data[0] for _, data in store) == list(range(15, 25))
+    assert store.get("k3") is None
+    assert store.get("k24") == (24, {})
+
+
+def test_context_store_concurrent_writers_and_readers():
+    import threading
+    from trace_generator.engine import ContextStore
+
+    store = ContextStore(200)
+
+    def write(n):
+        for i in range(2000):
+            store.append((f"w{n}-{i}", (i, {})))
+
+    def read():
+        for _ in range(200):
+            store.matches("w*")
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+    threads += [threading.Thread(target=read) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(store) == store.num_shards * store._shard_size
+
+
+def test_span_to_trace_dict_pads_ids():
+    from trace_generator.engine import _span_to_trace_dict
+
+    span = DummySpan()
+    span.parent = types.SimpleNamespace(span_id=0xABC)
+    trace_dict = _span_to_trace_dict(span)
+    assert trace_dict["TraceId"] == "0" * 31 + "1"
+    assert trace_dict["SpanId"] == "0" * 15 + "2"
+    assert trace_dict["ParentSpanId"] == "0000000000000abc"
+    assert trace_dict["ServiceName"] == "svc"
+    assert trace_dict["Duration"] == 1_000_000_000
+    assert trace_dict["Timestamp"] == 1_000_000_000
+
+
+def test_span_to_trace_dict_interns_names():
+    from trace_generator.engine import _span_to_trace_dict
+
+    first, second = DummySpan(), DummySpan()
+    first.name = "".join(["GET ", "/orders"])
+    second.name = "".join(["GET ", "/orders"])
+    second.resource = types.SimpleNamespace(attributes={"service.name": "".join("svc")})
+    assert first.name is not second.name
+    a, b = _span_to_trace_dict(first), _span_to_trace_dict(second)
+    assert a["SpanName"] is b["SpanName"]
+    assert a["ServiceName"] is b["ServiceName"]
+
+
+def test_trace_generator_uses_a_random_per_thread():
+    import threading
+
+    db = InMemoryDatabase()
+    tg = TraceGenerator({"svc": DummyTracer()}, make_scenario(), database=db)
+    main_rng = tg._rng()
+    assert tg._rng() is main_rng
+    other = []
+    thread = threading.Thread(target=lambda: other.append(tg._rng()))
+    thread.start()
+    thread.join()
+    assert other[0] is not main_rng
+
+
+def test_compile_span_precomputes_delay_range(monkeypatch):
+    db = InMemoryDatabase()
+    tg = TraceGenerator({"svc": DummyTracer()}, make_scenario(), database=db)
+    delay_range = TraceGenerator._delay_range
+    assert delay_range({"delay_ms": [100, 250]}) == (0.1, 0.25)
+    assert delay_range({"delay_ms": [0, 0], "delay": [1, 2]}) is None
+    assert delay_range({"delay": [0.5, 1]}) == (0.5, 1)
+    assert delay_range({}) is None
+
+    sleeps = []
+    monkeypatch.setattr("time.sleep", sleeps.append)
+    monkeypatch.setattr(tg._rng(), "uniform", lambda a, b: b)
+    span_def = tg._compile_span(
+        {"service": "svc", "operation": "op", "delay_ms": [10, 20]}
+    )
+    tg._process_span_definition(span_def, {}, {})
+    assert span_def["_delay_range_s"] == (0.01, 0.02)
+    assert sleeps == [0.02]
+
+
+def test_error_conditions_use_one_roll_against_cumulative_bands(monkeypatch):
+    db = InMemoryDatabase()
+    tg = TraceGenerator({"svc": DummyTracer()}, make_scenario(), database=db)
+    span_def = {
+        "service": "svc",
+        "error_conditions": [
+            {"probability": 10, "type": "Timeout", "message": "slow"},
+            {"probability": 0, "type": "Never", "message": "never"},
+            {"probability": 30, "type": "Refused", "message": "down"},
+        ],
+    }
+    assert TraceGenerator._error_thresholds(span_def) == (
+        (10.0, "Timeout", "slow"),
+        (40.0, "Refused", "down"),
+    )
+
+    errors = []
+    monkeypatch.setattr(
+        "trace_generator.engine.set_span_status_error",
+        lambda span, message, error_type: errors.append(error_type),
+    )
+    rng = tg._rng()
+    for roll, expected in ((0.05, ["Timeout"]), (0.25, ["Refused"]), (0.5, [])):
+        errors.clear()
+        monkeypatch.setattr(rng, "random", lambda roll=roll: roll)
+        tg._process_span_definition(span_def, {}, {})
+        assert errors == expected
+
+
+def test_span_to_trace_dict_shares_resource_attributes():
+    from trace_generator.engine import _span_to_trace_dict
+
+    first, second = DummySpan(), DummySpan()
+    second.resource = first.resource
+    a, b = _span_to_trace_dict(first), _span_to_trace_dict(second)
+    assert a["ResourceAttributes"] == {"service.name": "svc"}
+    assert a["ResourceAttributes"] is b["ResourceAttributes"]
+    assert type(a["SpanAttributes"]) is dict
+    assert a["SpanAttributes"] == {"foo": "bar"}
+    assert a["SpanAttributes"] is not first.attributes
+
+
+def test_span_to_trace_dict_copies_sdk_attributes():
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.resources import Resource
+    from trace_generator.engine import _span_to_trace_dict
+
+    provider = TracerProvider(resource=Resource({"service.name": "svc"}))
+    with provider.get_tracer("t").start_as_current_span("op") as span:
+        span.set_attribute("http.method", "GET")
+    trace_dict = _span_to_trace_dict(span)
+    assert type(trace_dict["SpanAttributes"]) is dict
+    assert trace_dict["SpanAttributes"] == {"http.method": "GET"}
+    assert type(trace_dict["ResourceAttributes"]) is dict
+    assert trace_dict["ServiceName"] == "svc"
+
+
+def _sdk_tracer():
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    return provider.get_tracer("test"), exporter
+
+
+def test_span_tree_is_emitted_iteratively_with_nesting():
+    tracer, exporter = _sdk_tracer()
+    db = InMemoryDatabase()
+    tg = TraceGenerator({"svc": tracer}, make_scenario(), database=db)
+    grandchild = {"service": "svc", "operation": "c1a"}
+    root = {
+        "service": "svc",
+        "operation": "root",
+        "calls": [
+            {"service": "svc", "operation": "c1", "calls": [grandchild]},
+            {"service": "svc", "operation": "c2"},
+        ],
+    }
+    tg._process_span_definition(root, {}, {})
+    spans = exporter.get_finished_spans()
+    # Spans finish innermost first, siblings in declaration order
+    assert [s.name for s in spans] == ["c1a", "c1", "c2", "root"]
+    by_name = {s.name: s for s in spans}
+    assert by_name["c1a"].parent.span_id == by_name["c1"].context.span_id
+    assert by_name["c1"].parent.span_id == by_name["root"].context.span_id
+    assert by_name["c2"].parent.span_id == by_name["root"].context.span_id
+
+
+def test_span_tree_stops_below_errors_and_closes_spans_on_exceptions():
+    tracer, exporter = _sdk_tracer()
+    db = InMemoryDatabase()
+    tg = TraceGenerator({"svc": tracer}, make_scenario(), database=db)
+    failing = {
+        "service": "svc",
+        "operation": "fails",
+        "error_conditions": [{"probability": 100, "type": "E", "message": "m"}],
+        "calls": [{"service": "svc", "operation": "skipped"}],
+    }
+    tg._process_span_definition(failing, {}, {})
+    assert [s.name for s in exporter.get_finished_spans()] == ["fails"]
+
+    exporter.clear()
+    broken = {"service": "svc", "operation": "boom", "delay": [1, 1]}
+    root = tg._compile_span({"service": "svc", "operation": "root", "calls": [broken]})
+
+    def explode(*_):
+        raise RuntimeError("boom")
+
+    tg._rng().uniform = explode
+    with pytest.raises(RuntimeError):
+        tg._process_span_definition(root, {}, {})
+    del tg._rng().uniform
+    assert [s.name for s in exporter.get_finished_spans()] == ["boom", "root"]
+
+
+def test_compile_span_resolves_tracer_and_kind():
+    from opentelemetry.trace import SpanKind
+
+    db = InMemoryDatabase()
+    tracer = DummyTracer()
+    tg = TraceGenerator({"svc": tracer}, make_scenario(), database=db)
+    span_def = tg._compile_span({"service": "svc", "kind": "server"})
+    assert span_def["_tracer"] is tracer
+    assert span_def["_span_kind"] is SpanKind.SERVER
+    span_def = tg._compile_span({"service": "svc", "kind": "bogus"})
+    assert span_def["_span_kind"] is SpanKind.INTERNAL
+
+
+def test_compiling_leaves_scenarios_config_unchanged():
+    import copy
+
+    config = make_scenario()
+    config["scenarios"][0]["root_span"]["calls"] = [
+        {"service": "svc", "operation": "child", "attributes": {"a": "{{x}}"}}
+    ]
+    original = copy.deepcopy(config)
+    tg = TraceGenerator({"svc": DummyTracer()}, config, database=InMemoryDatabase())
+    assert config == original
+    compiled_root = tg.scenarios[0]["root_span"]
+    assert "_attr_plan" in compiled_root["calls"][0]
+    tg._generate_single_trace()
+    assert config == original
+
+
+def test_unknown_service_fails_at_construction():
+    config = make_scenario()
+    config["scenarios"][0]["root_span"]["calls"] = [{"service": "nope"}]
+    with pytest.raises(ValueError, match="nope"):
+        TraceGenerator({"svc": DummyTracer()}, config, database=InMemoryDatabase())
+
+
+def test_context_store_tracks_live_slots():
+    from trace_generator.engine import ContextStore
+
+    store = ContextStore(1000)
+    assert len(store) == 0 and list(store) == []
+    store.append(("only", ("ctx", {})))
+    shard = store._shard_of("only")
+    assert store._filled[shard] == 1
+    assert sum(store._filled) == len(store) == 1
+    assert list(store) == [("only", ("ctx", {}))]
+
+
+def test_burst_generate_draws_all_scenarios_at_once(monkeypatch):
+    tracer, exporter = _sdk_tracer()
+    config = {
+        "scenarios": [
+            {"root_span": {"service": "svc", "operation": "a"}, "weight": 1},
+            {"root_span": {"service": "svc", "operation": "b"}, "weight": 1},
+        ]
+    }
+    tg = TraceGenerator({"svc": tracer}, config, database=InMemoryDatabase())
+    rng = tg._rng()
+    draws = []
+    original = rng.choices
+
+    def counting_choices(*args, **kwargs):
+        draws.append(kwargs["k"])
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(rng, "choices", counting_choices)
+    assert tg.burst_generate(50) == 50
+    assert draws == [50]
+    assert tg.trace_count == 50
+    assert len(exporter.get_finished_spans()) == 50
+    assert tg.burst_generate(0) == 0
+
+
+def test_scenario_vars_split_into_literal_and_dynamic(monkeypatch):
+    captured = {}
+    config = make_scenario()
+    scenario = config["scenarios"][0]
+    scenario["vars"] = {"region": "eu-west", "retries": 3, "order": "ord-{{region}}"}
+    tg = TraceGenerator({"svc": DummyTracer()}, config, database=InMemoryDatabase())
+    assert "_literal_vars" not in scenario
+    scenario = tg.scenarios[0]
+    assert scenario["_literal_vars"] == {"region": "eu-west", "retries": 3}
+    assert [key for key, _ in scenario["_dynamic_vars"]] == ["order"]
+
+    def capture(span_def, scenario_context, parent_attributes, rng=None):
+        captured.update(scenario_context)
+
+    monkeypatch.setattr(tg, "_process_span_definition", capture)
+    tg._generate_single_trace()
+    assert captured == {"region": "eu-west", "retries": 3, "order": "ord-eu-west"}
+    captured["region"] = "changed"
+    assert scenario["_literal_vars"]["region"] == "eu-west"
@@ -1,7 +1,4 @@
 import sys
-import os
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
 
 from unittest import mock
 import importlib
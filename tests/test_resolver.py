@@ -1,9 +1,5 @@
-import sys
-import os
 import uuid
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
-
 from trace_generator import resolver
 
 
@@ -51,8 +47,8 @@ def test_template_missing_and_present():
 
 
 def test_resolve_random_int(monkeypatch):
-    # Patch random.randint to always return 42
-    monkeypatch.setattr("random.randint", lambda a, b: 42)
+    # Patch the thread-local randint to always return 42
+    monkeypatch.setattr(resolver._rng(), "randint", lambda a, b: 42)
     template = "Random: {{random.int(1,100)}}"
     context = {}
     result = resolver.resolve_template(template, context)
@@ -60,8 +56,8 @@ def test_resolve_random_int(monkeypatch):
 
 
 def test_resolve_random_float(monkeypatch):
-    # Patch random.uniform to always return 3.1415
-    monkeypatch.setattr("random.uniform", lambda a, b: 3.1415)
+    # Patch the thread-local uniform to always return 3.1415
+    monkeypatch.setattr(resolver._rng(), "uniform", lambda a, b: 3.1415)
     template = "Float: {{random.float(1.0,5.0)}}"
     context = {}
     result = resolver.resolve_template(template, context)
@@ -69,8 +65,8 @@ def test_resolve_random_float(monkeypatch):
 
 
 def test_resolve_random_choice(monkeypatch):
-    # Patch random.choice to always return 'foo'
-    monkeypatch.setattr("random.choice", lambda x: x[0])
+    # Patch the thread-local choice to always return 'foo'
+    monkeypatch.setattr(resolver._rng(), "choice", lambda x: x[0])
     template = "Choice: {{random.choice(['foo','bar'])}}"
     context = {}
     result = resolver.resolve_template(template, context)
@@ -78,14 +74,20 @@ def test_resolve_random_choice(monkeypatch):
 
 
 def test_resolve_random_uuid(monkeypatch):
-    # Patch uuid.uuid4 to always return a fixed value
+    # Patch os.urandom to always return fixed bytes
     monkeypatch.setattr(
-        "uuid.uuid4", lambda: uuid.UUID("12345678-1234-5678-1234-567812345678")
+        "os.urandom", lambda n: bytes.fromhex("12345678123456781234567812345678")
     )
     template = "UUID: {{random.uuid}}"
     context = {}
     result = resolver.resolve_template(template, context)
-    assert result == "UUID: 12345678-1234-5678-1234-567812345678"
+    assert result == "UUID: 12345678-1234-4678-9234-567812345678"
+
+
+def test_random_uuid_is_a_valid_version_4_uuid():
+    value = uuid.UUID(resolver.resolve_template("{{random.uuid}}", {}))
+    assert value.version == 4
+    assert value.variant == uuid.RFC_4122
 
 
 def test_resolve_time_now(monkeypatch):
@@ -97,24 +99,41 @@ def test_resolve_time_now(monkeypatch):
 
 
 def test_resolve_time_iso(monkeypatch):
-    class FakeDatetime:
-        @classmethod
-        def now(cls, tz=None):
-            class Fake:
-                def isoformat(self):
-                    return "2025-07-07T12:34:56+00:00"
-
-            return Fake()
-
-    monkeypatch.setattr("trace_generator.resolver.datetime", FakeDatetime)
+    # 2025-07-07T12:34:56.000123Z in epoch nanoseconds
+    monkeypatch.setattr("time.time_ns", lambda: 1751891696_000123456)
     template = "Time: {{time.iso}}"
     context = {}
     result = resolver.resolve_template(template, context)
-    assert result.startswith("Time: 2025-07-07T12:34:56")
+    assert result == "Time: 2025-07-07T12:34:56.000123+00:00"
+
+
+def test_time_iso_matches_datetime_isoformat(monkeypatch):
+    from datetime import datetime, timezone
+
+    for ns in (1751891696_000000000, 1751891696_500000000, 1751891697_999999000):
+        monkeypatch.setattr("time.time_ns", lambda ns=ns: ns)
+        expected = datetime.fromtimestamp(ns // 1000 / 1e6, tz=timezone.utc)
+        assert resolver.resolve_template("{{time.iso}}", {}) == expected.isoformat()
+
+
+def test_resolve_ipv4_octets_stay_in_range(monkeypatch):
+    rng = resolver._rng()
+    for bits, outer in ((0, "low"), (0xFFFF, "high"), (0x0A01, "low")):
+        monkeypatch.setattr(rng, "getrandbits", lambda k, b=bits: b)
+        monkeypatch.setattr(
+            rng, "randrange", lambda lo, hi, o=outer: lo if o == "low" else hi - 1
+        )
+        octets = [
+            int(o) for o in resolver.resolve_template("{{random.ipv4}}", {}).split(".")
+        ]
+        assert len(octets) == 4
+        edge = 1 if outer == "low" else 254
+        assert octets[0] == octets[3] == edge
+        assert octets[1:3] == [bits >> 8, bits & 0xFF]
 
 
 def test_resolve_user_agent(monkeypatch):
-    monkeypatch.setattr("random.choice", lambda x: x[-1])
+    monkeypatch.setattr(resolver._rng(), "choice", lambda x: x[-1])
     template = "UA: {{random.user_agent}}"
     context = {}
     result = resolver.resolve_template(template, context)
@@ -122,8 +141,8 @@ def test_resolve_user_agent(monkeypatch):
 
 
 def test_resolve_last_match(monkeypatch):
-    # Patch random.randint to always return 99
-    monkeypatch.setattr("random.randint", lambda a, b: 99)
+    # Patch the thread-local randint to always return 99
+    monkeypatch.setattr(resolver._rng(), "randint", lambda a, b: 99)
     template = "{{random.int(1,100)}}-{{last_match}}"
     context = {}
     result = resolver.resolve_template(template, context)
@@ -144,3 +163,155 @@ def test_resolve_missing_context_key(caplog):
     result = resolver.resolve_template(template, context)
     assert "Missing: {{not_in_context}}" in result
     assert "Template key not found" in caplog.text
+
+
+def test_random_placeholders_resolve_in_one_pass(monkeypatch):
+    monkeypatch.setattr(resolver._rng(), "randint", lambda a, b: b)
+    monkeypatch.setattr(resolver._rng(), "uniform", lambda a, b: a)
+    template = "{{random.int(1, 9)}}/{{random.float(0.5,2)}}/{{random.int(3,4)}}"
+    assert resolver.resolve_template(template, {}) == "9/0.50/4"
+
+
+def test_malformed_random_placeholders_are_left_untouched():
+    template = "{{random.int(a,b)}} {{random.int(-5,5)}} {{random.choice(oops)}}"
+    assert resolver.resolve_template(template, {}) == template
+
+
+def test_plain_strings_skip_template_processing(monkeypatch):
+    r = resolver.ValueResolver()
+
+    def fail(*args):
+        raise AssertionError("template pass should not run")
+
+    monkeypatch.setattr(r, "_resolve_templates", fail)
+    assert r.resolve("GET /orders", {"x": 1}) == "GET /orders"
+    assert r.resolve("{ not a template }") == "{ not a template }"
+
+
+def test_templates_resolve_each_placeholder_in_place():
+    template = "{{missing}}-{{a}}-{{missing}}-{{parent.attributes.id}}"
+    context = {"a": "x", "parent": {"attributes": {"id": 7}}}
+    result = resolver.resolve_template(template, context)
+    assert result == "{{missing}}-x-{{missing}}-7"
+
+
+def test_each_thread_gets_its_own_random_generator():
+    import threading
+
+    seen = []
+    worker = threading.Thread(target=lambda: seen.append(resolver._rng()))
+    worker.start()
+    worker.join()
+    assert resolver._rng() is resolver._rng()
+    assert seen[0] is not resolver._rng()
+
+
+def test_last_match_is_tracked_per_thread(monkeypatch):
+    import threading
+
+    r = resolver.ValueResolver()
+    monkeypatch.setattr(resolver._rng(), "randint", lambda a, b: 7)
+    r.resolve("{{random.int(1,10)}}")
+    seen = []
+    worker = threading.Thread(target=lambda: seen.append(r.resolve("{{last_match}}")))
+    worker.start()
+    worker.join()
+    assert seen == [""]
+    assert r.resolve("{{last_match}}") == "7"
+
+
+def test_nested_lookup_prefers_longest_dotted_key():
+    context = {"a.b": {"c": "long"}, "a": {"b": {"c": "short"}}}
+    assert resolver.resolve_template("{{a.b.c}}", context) == "long"
+    assert resolver.resolve_template("{{a.b.c}}", {"a": {"b.c": 1}}) == "1"
+    assert resolver._split_key_path("a.b") == ((("a.b", 2), ("a", 1)), (("b", 2),))
+
+
+def test_resolvers_share_the_default_instance():
+    assert resolver.create_resolver() is not resolver._DEFAULT_RESOLVER
+    assert resolver.resolve_value("{{x}}", {"x": 1}) == "1"
+
+
+def test_choice_arguments_are_parsed_once():
+    resolver._parse_choices.cache_clear()
+    assert resolver._parse_choices("['a', \"b c\",'']") == ("a", "b c", "")
+    assert resolver._parse_choices("[1, 2.5]") == ("1", "2.5")
+    assert resolver._parse_choices("['it\\'s']") == ("it's",)
+    assert resolver._parse_choices("[]") is None
+    assert resolver._parse_choices("'abc'") is None
+    resolver._parse_choices("['a', \"b c\",'']")
+    assert resolver._parse_choices.cache_info().hits == 1
+
+
+def test_context_values_that_are_templates_resolve_recursively(monkeypatch):
+    monkeypatch.setattr(resolver._rng(), "randint", lambda a, b: 5)
+    context = {"a": "<{{b}}>", "b": "{{random.int(1,9)}}"}
+    assert resolver.resolve_template("{{a}}-{{b}}", context) == "<5>-5"
+
+
+def test_circular_templates_stop_at_max_iterations(caplog):
+    r = resolver.ValueResolver()
+    r.MAX_TEMPLATE_ITERATIONS = 3
+    caplog.set_level("WARNING")
+    result = r.resolve("{{a}}", {"a": "{{b}}", "b": "{{a}}"})
+    assert result in ("{{a}}", "{{b}}")
+    assert "max iterations (3)" in caplog.text
+
+
+def test_template_compiles_once_into_ops(monkeypatch):
+    template = resolver.Template.compile("id={{random.int(1,9)}} user={{user.id}}!")
+    assert resolver.Template.compile(template.source) is template
+    kinds = [kind for kind, _ in template.ops]
+    assert kinds == [
+        resolver._LITERAL,
+        resolver._RANDOM,
+        resolver._LITERAL,
+        resolver._CONTEXT,
+        resolver._LITERAL,
+    ]
+    monkeypatch.setattr(resolver._rng(), "randint", lambda a, b: 4)
+    assert template.render({"user": {"id": "u1"}}) == "id=4 user=u1!"
+
+
+def test_last_match_sees_ints_drawn_later_in_the_string(monkeypatch):
+    monkeypatch.setattr(resolver._rng(), "randint", lambda a, b: b)
+    r = resolver.ValueResolver()
+    assert r.resolve("{{last_match}}/{{random.int(1,3)}}") == "3/3"
+
+
+def test_choice_items_can_reference_context(monkeypatch):
+    monkeypatch.setattr(resolver._rng(), "choice", lambda x: x[0])
+    result = resolver.resolve_template("{{random.choice(['{{a}}'])}}", {"a": "x"})
+    assert result == "x"
+
+
+def test_clock_is_read_once_per_resolve(monkeypatch):
+    calls = []
+
+    def fake_time():
+        calls.append(1)
+        return 1000 + len(calls)
+
+    monkeypatch.setattr("time.time", fake_time)
+    result = resolver.resolve_template("{{time.now}}/{{time.now}}/{{time.now}}", {})
+    assert result == "1001/1001/1001"
+    assert len(calls) == 1
+    assert resolver.resolve_template("{{time.now}}", {}) == "1002"
+
+
+def test_argumentless_placeholders_repeat_one_value_per_resolve():
+    template = (
+        "{{random.uuid}}|{{random.uuid}}|{{random.ipv4}}|{{random.ipv4}}|"
+        "{{random.user_agent}}|{{random.user_agent}}|{{time.iso}}|{{time.iso}}"
+    )
+    parts = resolver.resolve_template(template, {}).split("|")
+    assert parts[0] == parts[1]
+    assert parts[2] == parts[3]
+    assert parts[4] == parts[5]
+    assert parts[6] == parts[7]
+    # A new resolve draws new values; arguments still draw per occurrence
+    assert resolver.resolve_template("{{random.uuid}}", {}) != parts[0]
+    ints = resolver.resolve_template(
+        "{{random.int(1,1000000)}}|{{random.int(1,1000000)}}", {}
+    )
+    assert len(set(ints.split("|"))) == 2
@@ -1,7 +1,4 @@
 import sys
-import os
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
 
 import pytest
 from unittest import mock
@@ -380,3 +377,99 @@ def test_create_trace_viewer_slot_coverage():
     # Simulate slot call
     if hasattr(traceui, "span_context_table"):
         traceui.span_context_table.add_slot("body-row", "<q-tr></q-tr>")
+
+
+def test_update_status_skips_unchanged_text():
+    traceui = make_traceui()
+
+    class CountingLabel:
+        def __init__(self):
+            self.writes = 0
+
+        @property
+        def text(self):
+            return self._text
+
+        @text.setter
+        def text(self, value):
+            self.writes += 1
+            self._text = value
+
+    traceui.status_label = CountingLabel()
+    asyncio.run(traceui.update_status())
+    asyncio.run(traceui.update_status())
+    assert traceui.status_label.writes == 1
+
+
+def test_fetch_traces_skips_table_update_when_rows_unchanged():
+    traceui = make_traceui()
+    traceui.trace_cards_container = mock.MagicMock()
+    traceui.trace_table = mock.Mock(rows=[])
+    traceui.span_context_table = mock.Mock(rows=[])
+    asyncio.run(traceui.fetch_traces())
+    asyncio.run(traceui.fetch_traces())
+    assert traceui.trace_table.update.call_count == 1
+    assert traceui.span_context_table.update.call_count == 1
+
+
+def test_maybe_async_reuses_shared_executor():
+    import threading
+    import trace_generator.ui as ui_module
+
+    traceui = make_traceui()
+    names = [
+        asyncio.run(traceui._maybe_async(lambda: threading.current_thread().name))
+        for _ in range(3)
+    ]
+    assert all(name.startswith("traceui") for name in names)
+    assert len(ui_module._EXECUTOR._threads) <= 2
+
+
+def test_render_trace_cards_only_builds_new_cards():
+    traceui = make_traceui()
+    container = mock.MagicMock()
+    traceui.trace_cards_container = container
+    built = []
+
+    def fake_card(trace):
+        card = mock.Mock(name=trace["SpanId"])
+        built.append(trace["SpanId"])
+        return card
+
+    traceui._create_trace_card = fake_card
+    traceui._render_trace_cards([{"SpanId": "b"}, {"SpanId": "a"}])
+    assert built == ["b", "a"]
+    assert container.clear.call_count == 1
+    old_a = traceui._rendered_cards["a"]
+
+    traceui._render_trace_cards([{"SpanId": "c"}, {"SpanId": "b"}])
+    assert built == ["b", "a", "c"]
+    assert container.clear.call_count == 1
+    container.remove.assert_called_once_with(old_a)
+    assert list(traceui._rendered_cards) == ["c", "b"]
+    traceui._rendered_cards["c"].move.assert_called_once_with(container, target_index=0)
+
+    traceui._render_trace_cards([])
+    assert traceui._rendered_cards == {}
+    assert container.clear.call_count == 2
+
+
+def test_fetch_traces_leaves_stored_rows_untouched():
+    traceui = make_traceui()
+    traces = traceui.trace_data_service.fetch_unique_traces()
+    snapshot = [dict(t) for t in traces]
+    traceui.trace_data_service.fetch_unique_traces = lambda: traces
+    with mock.patch("trace_generator.ui.ui.notify") as notify_mock:
+        asyncio.run(traceui.fetch_traces())
+    assert traces == snapshot
+    assert "(1 errors)" in notify_mock.call_args_list[-1].args[0]
+
+
+def test_status_ok_prefers_ingest_classification():
+    from trace_generator.ui import _status_ok
+
+    assert _status_ok({"status_color": "positive", "StatusCode": "Error"})
+    assert not _status_ok({"status_color": "negative", "StatusCode": "OK"})
+    assert _status_ok({"StatusCode": "status_code_ok"})
+    assert not _status_ok({"StatusCode": "ERROR"})
+    assert not _status_ok({})
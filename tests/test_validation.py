@@ -1,12 +1,15 @@
-import sys
-import os
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
-
 import pytest
 from trace_generator import validation
 
 
+@pytest.fixture(autouse=True)
+def scenario_cache_dir(tmp_path, monkeypatch):
+    """Keep the scenario parse cache inside each test's tmp_path"""
+    cache_home = tmp_path / "xdg-cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+    return cache_home / validation.SchemaValidator.CACHE_DIRNAME
+
+
 def test_validation_module_exists():
     assert hasattr(validation, "SchemaValidator")
 
@@ -421,3 +424,206 @@ def test_load_scenarios_from_directory_empty_yaml(tmp_path):
     # Should raise ValueError for no scenarios found
     with pytest.raises(ValueError):
         validation.SchemaValidator.load_scenarios_from_directory(str(scenarios_dir))
+
+
+def test_load_scenarios_from_directory_reads_utf8(tmp_path):
+    scenarios_dir = tmp_path / "scenarios_utf8"
+    scenarios_dir.mkdir()
+    (scenarios_dir / "_base.yaml").write_text("services: [svc]\n", encoding="utf-8")
+    (scenarios_dir / "01.yaml").write_text(
+        "- name: café ☕\n  root_span: {service: svc}\n", encoding="utf-8"
+    )
+    merged = validation.SchemaValidator.load_scenarios_from_directory(
+        str(scenarios_dir)
+    )
+    assert merged["scenarios"][0]["name"] == "café ☕"
+
+
+def test_load_scenarios_from_directory_skips_non_files(tmp_path):
+    scenarios_dir = tmp_path / "scenarios_dirs"
+    scenarios_dir.mkdir()
+    (scenarios_dir / "_base.yaml").write_text("services: [svc]\n")
+    (scenarios_dir / "01.yaml").write_text("- name: a\n  root_span: {service: svc}\n")
+    (scenarios_dir / "02.yaml").mkdir()
+    merged = validation.SchemaValidator.load_scenarios_from_directory(
+        str(scenarios_dir)
+    )
+    assert [s["name"] for s in merged["scenarios"]] == ["a"]
+
+    with pytest.raises(FileNotFoundError, match="Scenarios directory not found"):
+        validation.SchemaValidator.load_scenarios_from_directory(
+            str(tmp_path / "does-not-exist")
+        )
+
+
+def test_load_scenarios_from_directory_uses_cache_until_files_change(
+    tmp_path, monkeypatch, scenario_cache_dir
+):
+    scenarios_dir = tmp_path / "scenarios_cached"
+    scenarios_dir.mkdir()
+    (scenarios_dir / "_base.yaml").write_text("services: [svc]\n")
+    scenario_file = scenarios_dir / "01.yaml"
+    scenario_file.write_text("- name: a\n  root_span: {service: svc}\n")
+    load = validation.SchemaValidator.load_scenarios_from_directory
+    first = load(str(scenarios_dir))
+    assert len(list(scenario_cache_dir.iterdir())) == 1
+    assert sorted(p.name for p in scenarios_dir.iterdir()) == ["01.yaml", "_base.yaml"]
+
+    def no_yaml(*args, **kwargs):
+        raise AssertionError("cache hit should skip YAML parsing")
+
+    monkeypatch.setattr(validation.yaml, "load", no_yaml)
+    assert load(str(scenarios_dir)) == first
+
+    monkeypatch.undo()
+    scenario_file.write_text("- name: b\n  root_span: {service: svc}\n  weight: 2\n")
+    assert [s["name"] for s in load(str(scenarios_dir))["scenarios"]] == ["b"]
+
+
+def test_scenario_cache_skips_values_json_cannot_round_trip(
+    tmp_path, scenario_cache_dir
+):
+    scenarios_dir = tmp_path / "scenarios_dates"
+    scenarios_dir.mkdir()
+    (scenarios_dir / "_base.yaml").write_text("services: [svc]\n")
+    (scenarios_dir / "01.yaml").write_text(
+        "- name: a\n  since: 2024-01-01\n  root_span: {service: svc}\n"
+    )
+    validation.SchemaValidator.load_scenarios_from_directory(str(scenarios_dir))
+    assert not list(scenario_cache_dir.glob("*.json"))
+
+
+def test_scenario_cache_write_failure_is_skipped(tmp_path, monkeypatch, caplog):
+    scenarios_dir = tmp_path / "scenarios_nocache"
+    scenarios_dir.mkdir()
+    (scenarios_dir / "_base.yaml").write_text("services: [svc]\n")
+    (scenarios_dir / "01.yaml").write_text("- name: a\n  root_span: {service: svc}\n")
+    # A file where the cache directory should go makes every write fail
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(blocker))
+
+    with caplog.at_level("DEBUG", logger="trace_generator.validation"):
+        config = validation.SchemaValidator.load_scenarios_from_directory(
+            str(scenarios_dir)
+        )
+    assert [s["name"] for s in config["scenarios"]] == ["a"]
+    assert "Not caching scenarios" in caplog.text
+
+
+def test_load_scenarios_from_directory_keeps_order_with_parallel_parsing(
+    tmp_path, caplog
+):
+    scenarios_dir = tmp_path / "scenarios_many"
+    scenarios_dir.mkdir()
+    (scenarios_dir / "_base.yaml").write_text("services: [svc]\n")
+    for i in range(20):
+        (scenarios_dir / f"{i:02d}.yaml").write_text(
+            f"- name: s{i}\n  root_span: {{service: svc}}\n"
+        )
+    merged = validation.SchemaValidator.load_scenarios_from_directory(
+        str(scenarios_dir)
+    )
+    assert [s["name"] for s in merged["scenarios"]] == [f"s{i}" for i in range(20)]
+
+    (scenarios_dir / "10.yaml").write_text("- name: [unclosed\n")
+    with pytest.raises(validation.yaml.YAMLError):
+        validation.SchemaValidator.load_scenarios_from_directory(str(scenarios_dir))
+    assert "YAML error in 10.yaml" in caplog.text
+
+
+def test_validate_span_definition_reports_nested_errors_in_order():
+    span = {
+        "service": "svc",
+        "calls": [
+            {"calls": [{"delay_ms": [1]}]},
+            {"service": "svc", "delay": "x"},
+        ],
+    }
+    errors = validation.SchemaValidator._validate_span_definition(span, "root")
+    assert errors == [
+        "root.calls[0]: Missing required 'service' field",
+        "root.calls[0].calls[0]: Missing required 'service' field",
+        "root.calls[0].calls[0]: 'delay_ms' must be a list of two numbers [min_ms, max_ms]",
+        "root.calls[1]: 'delay' must be a list of two numbers [min_seconds, max_seconds]",
+    ]
+
+
+def test_validate_span_definition_handles_trees_deeper_than_recursion_limit():
+    import sys
+
+    span = {"service": "svc"}
+    for _ in range(sys.getrecursionlimit() + 100):
+        span = {"service": "svc", "calls": [span]}
+    assert validation.SchemaValidator._validate_span_definition(span, "root") == []
+
+
+def test_validators_append_to_a_shared_error_list():
+    errors = ["earlier"]
+    returned = validation.SchemaValidator._validate_scenario({"name": "x"}, 3, errors)
+    assert returned is errors
+    assert errors == ["earlier", "scenarios[3]: Missing required 'root_span' field"]
+
+
+def test_large_scenario_files_are_memory_mapped(tmp_path, monkeypatch):
+    scenarios_dir = tmp_path / "scenarios_large"
+    scenarios_dir.mkdir()
+    (scenarios_dir / "_base.yaml").write_text("services: [svc]\n")
+    big = "".join(f"- name: s{i}\n  root_span: {{service: svc}}\n" for i in range(200))
+    assert len(big) > validation.MMAP_MIN_BYTES
+    (scenarios_dir / "01.yaml").write_text(big)
+    mapped = []
+    real_mmap = validation.mmap.mmap
+
+    def tracking_mmap(*args, **kwargs):
+        mapped.append(args)
+        return real_mmap(*args, **kwargs)
+
+    monkeypatch.setattr(validation.mmap, "mmap", tracking_mmap)
+    merged = validation.SchemaValidator.load_scenarios_from_directory(
+        str(scenarios_dir)
+    )
+    assert len(merged["scenarios"]) == 200
+    assert len(mapped) == 1
+
+
+def test_fail_fast_raises_on_first_error_and_skips_the_rest():
+    visited = []
+
+    class TrackingSpan(dict):
+        def get(self, key, default=None):
+            visited.append(self["id"])
+            return super().get(key, default)
+
+    config = {
+        "schema_version": 1,
+        "services": ["svc"],
+        "scenarios": [
+            {
+                "name": "a",
+                "root_span": TrackingSpan(
+                    id=0, service="svc", delay_ms=[1], calls=[TrackingSpan(id=1)]
+                ),
+            },
+            {"name": "b"},
+        ],
+    }
+    with pytest.raises(validation.SchemaValidationError) as exc_info:
+        validation.SchemaValidator.validate_scenarios_config(config, fail_fast=True)
+    assert str(exc_info.value) == (
+        "scenarios[0].root_span: 'delay_ms' must be a list of two numbers"
+        " [min_ms, max_ms]"
+    )
+    assert 1 not in visited
+
+    errors = validation.SchemaValidator.validate_scenarios_config(config)
+    assert len(errors) == 3
+
+
+def test_fail_fast_passes_valid_configs():
+    valid = {
+        "schema_version": 1,
+        "services": ["svc"],
+        "scenarios": [{"name": "foo", "root_span": {"service": "svc"}}],
+    }
+    assert validation.SchemaValidator.validate_scenarios_config(valid, True) == []